@@ -6,6 +6,17 @@ from pygame.locals import *
 import tkinter as tk
 from tkinter import filedialog
 import math
+from courier_core import (ROAD_TYPES, Courier, generate_map,
+                          random_position, random_job, start_route, advance_courier,
+                          EVENT_PICKUP, EVENT_DELIVERED, EVENT_NO_ROUTE)
+from compact_grid import CompactGrid
+from map_loader import MAP_TILE_SIZE
+from map_cache import start_precompile
+from map_worker import MapWorker, generate_map_state, load_map_state
+from road_graph import RoadGraph
+from renderer import MapRenderer, WHITE, YELLOW, RED, BLUE
+from instrumentation import Instrumentation
+from timestep import FixedTimestep, RENDER_FPS
 
 # Inisialisasi Pygame
 pygame.init()
@@ -21,48 +32,25 @@ GRID_HEIGHT = HEIGHT // TILE_SIZE
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Smart Courier Demo")
 
-# Warna
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-YELLOW = (255, 255, 0)
-RED = (255, 0, 0)
-BLUE = (0, 0, 255)
-GREEN = (0, 255, 0)
-TRANSPARENT = (0, 0, 0, 0)
+# Konfigurasi untuk loading map
+MAP_FOLDER = "maps"  # Folder untuk menyimpan peta
+SUPPORTED_IMAGE_FORMATS = [".png", ".jpg", ".jpeg", ".bmp"]
 
-# Arah hadap
-DIRECTIONS = {
-    "UP": (0, -1),
-    "RIGHT": (1, 0),
-    "DOWN": (0, 1),
-    "LEFT": (-1, 0)
-}
+# Kamera: panah untuk menggeser peta, scroll mouse untuk zoom, C untuk mengikuti kurir
+CAMERA_PAN_STEP = 60
 
-# Tipe tile jalan
-ROAD_TYPES = {
-    "STRAIGHT": 0,       # Jalan lurus (vertikal atau horizontal)
-    "TURN": 1,           # Tikungan (rotasi untuk 4 orientasi)
-    "T_JUNCTION": 2,     # Simpang tiga (rotasi untuk 4 orientasi)
-    "INTERSECTION": 3    # Simpang empat
-}
+# Kecepatan simulasi: 1-4 memilih x1, x10, x100, atau secepat mungkin; A menyalakan
+# paket otomatis (setelah diantar langsung ambil paket acak berikutnya)
+SPEED_KEYS = (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4)
+AUTO_JOB_ATTEMPTS = 10
 
-# Orientasi untuk tipe jalan
-ORIENTATIONS = {
-    "VERTICAL": 0,       # 0 derajat
-    "HORIZONTAL": 90,    # 90 derajat
-    "UP": 0,             # T menghadap atas
-    "RIGHT": 90,         # T menghadap kanan
-    "DOWN": 180,         # T menghadap bawah
-    "LEFT": 270,         # T menghadap kiri
-    "TURN_TL": 0,        # Tikungan kiri atas
-    "TURN_TR": 90,       # Tikungan kanan atas
-    "TURN_BR": 180,      # Tikungan kanan bawah
-    "TURN_BL": 270       # Tikungan kiri bawah
-}
+# Seed peta, posisi kurir, dan paket; isi angka agar sesi bisa diulang persis (None = acak)
+SEED = None
+rng = random.Random(SEED)
 
-# Konfigurasi untuk loading map
-MAP_FOLDER = "maps"  # Folder untuk menyimpan peta
-SUPPORTED_IMAGE_FORMATS = [".png", ".jpg", ".jpeg", ".bmp"]
+# Instrumentasi performa: F3 menampilkan/menyembunyikan HUD, selama aktif
+# setiap frame ditulis sebagai JSON lines ke file ini
+PERF_LOG_FILE = "perf_log.jsonl"
 
 # Muat aset dari file PNG atau gunakan fallback
 try:
@@ -113,322 +101,6 @@ road_intersection = pygame.transform.scale(road_intersection, (TILE_SIZE, TILE_S
 sand = pygame.transform.scale(sand, (TILE_SIZE, TILE_SIZE))
 courier_car = pygame.transform.scale(courier_car, (TILE_SIZE, TILE_SIZE))
 
-# Kelas Kurir
-class Courier:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.direction = "RIGHT"
-        self.target_direction = "RIGHT"
-        self.rotation_angle = 270  # 0=up, 90=left, 180=down, 270=right
-        self.has_package = False
-        self.moving = False
-        self.path = []
-        self.is_rotating = False
-        self.rotation_speed = 75  # Kecepatan rotasi lebih cepat
-
-    def move(self, dx, dy):
-        # Hanya bergerak jika sudah menghadap arah yang benar
-        if not self.is_rotating:
-            new_x = self.x + dx
-            new_y = self.y + dy
-            if 0 <= new_x < GRID_WIDTH and 0 <= new_y < GRID_HEIGHT and grid[new_y][new_x] != 1:
-                self.x = new_x
-                self.y = new_y
-
-    def turn(self, new_direction):
-        if self.direction != new_direction:
-            self.target_direction = new_direction
-            self.is_rotating = True
-
-    def update_rotation(self):
-        if not self.is_rotating:
-            return
-            
-        target_angle = 0
-        if self.target_direction == "UP":
-            target_angle = 0
-        elif self.target_direction == "LEFT":
-            target_angle = 90
-        elif self.target_direction == "DOWN":
-            target_angle = 180
-        elif self.target_direction == "RIGHT":
-            target_angle = 270
-
-        # Hitung perbedaan sudut terpendek
-        angle_diff = (target_angle - self.rotation_angle + 180) % 360 - 180
-        
-        if abs(angle_diff) <= self.rotation_speed:
-            self.rotation_angle = target_angle
-            self.direction = self.target_direction
-            self.is_rotating = False
-        else:
-            # Rotasi dengan arah yang paling pendek
-            self.rotation_angle += self.rotation_speed if angle_diff > 0 else -self.rotation_speed
-        
-        # Normalisasi sudut
-        self.rotation_angle %= 360
-
-    def try_pickup(self, source_x, source_y):
-        if self.x == source_x and self.y == source_y and not self.has_package:
-            self.has_package = True
-            return True
-        return False
-
-    def try_deliver(self, dest_x, dest_y):
-        if self.x == dest_x and self.y == dest_y and self.has_package:
-            self.has_package = False
-            return True
-        return False
-
-    def follow_path(self):
-        if self.path and self.moving:
-            # Jika sedang berputar, selesaikan putaran dulu
-            if self.is_rotating:
-                self.update_rotation()
-                return
-                
-            next_pos = self.path[0]
-            dx, dy = next_pos[0] - self.x, next_pos[1] - self.y
-            
-            # Tentukan arah yang diperlukan
-            required_direction = None
-            if dx > 0:
-                required_direction = "RIGHT"
-            elif dx < 0:
-                required_direction = "LEFT"
-            elif dy > 0:
-                required_direction = "DOWN"
-            elif dy < 0:
-                required_direction = "UP"
-            
-            # Jika perlu berubah arah, putar dulu
-            if required_direction and self.direction != required_direction:
-                self.turn(required_direction)
-            else:
-                # Jika sudah menghadap arah yang benar, bergerak
-                self.move(dx, dy)
-                if (self.x, self.y) == next_pos:
-                    self.path.pop(0)
-                    
-# Pathfinding (A* algorithm)
-def a_star(start, goal):
-    def heuristic(a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-    open_set = {start}
-    came_from = {}
-    g_score = {start: 0}
-    f_score = {start: heuristic(start, goal)}
-
-    while open_set:
-        current = min(open_set, key=lambda pos: f_score[pos])
-        if current == goal:
-            path = []
-            while current in came_from:
-                path.append(current)
-                current = came_from[current]
-            path.reverse()
-            return path
-
-        open_set.remove(current)
-        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-            neighbor = (current[0] + dx, current[1] + dy)
-            if 0 <= neighbor[0] < GRID_WIDTH and 0 <= neighbor[1] < GRID_HEIGHT and grid[neighbor[1]][neighbor[0]] != 1:
-                tentative_g_score = g_score[current] + 1
-                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = tentative_g_score + heuristic(neighbor, goal)
-                    open_set.add(neighbor)
-    return []
-
-# Fungsi untuk menentukan jenis jalan dan orientasinya berdasarkan koneksi
-def determine_road_type_and_orientation(x, y, grid):
-    # Periksa arah mana yang terhubung dengan jalan
-    connections = [0, 0, 0, 0]  # UP, RIGHT, DOWN, LEFT
-    
-    # Cek atas
-    if y > 0 and grid[y-1][x] != 1:
-        connections[0] = 1
-    
-    # Cek kanan
-    if x < GRID_WIDTH-1 and grid[y][x+1] != 1:
-        connections[1] = 1
-    
-    # Cek bawah
-    if y < GRID_HEIGHT-1 and grid[y+1][x] != 1:
-        connections[2] = 1
-    
-    # Cek kiri
-    if x > 0 and grid[y][x-1] != 1:
-        connections[3] = 1
-    
-    # Tentukan tipe jalan dan orientasi berdasarkan koneksi
-    connection_sum = sum(connections)
-    
-    if connection_sum == 4:
-        return ROAD_TYPES["INTERSECTION"], 0  # Simpang empat, tidak perlu rotasi
-    
-    elif connection_sum == 3:
-        # Simpang tiga (T-junction)
-        if connections[0] == 0:  # T menghadap bawah (tidak terhubung atas)
-            return ROAD_TYPES["T_JUNCTION"], ORIENTATIONS["DOWN"]
-        elif connections[1] == 0:  # T menghadap kiri (tidak terhubung kanan)
-            return ROAD_TYPES["T_JUNCTION"], ORIENTATIONS["LEFT"]
-        elif connections[2] == 0:  # T menghadap atas (tidak terhubung bawah)
-            return ROAD_TYPES["T_JUNCTION"], ORIENTATIONS["UP"]
-        else:  # connections[3] == 0, T menghadap kanan (tidak terhubung kiri)
-            return ROAD_TYPES["T_JUNCTION"], ORIENTATIONS["RIGHT"]
-    
-    elif connection_sum == 2:
-        # Cek apakah jalan lurus
-        if connections[0] == 1 and connections[2] == 1:
-            return ROAD_TYPES["STRAIGHT"], ORIENTATIONS["VERTICAL"]  # Jalan lurus vertikal
-        elif connections[1] == 1 and connections[3] == 1:
-            return ROAD_TYPES["STRAIGHT"], ORIENTATIONS["HORIZONTAL"]  # Jalan lurus horizontal
-        
-        # Tikungan
-        elif connections[0] == 1 and connections[1] == 1:
-            return ROAD_TYPES["TURN"], ORIENTATIONS["TURN_TR"]  # Tikungan kanan atas
-        elif connections[0] == 1 and connections[3] == 1:
-            return ROAD_TYPES["TURN"], ORIENTATIONS["TURN_TL"]  # Tikungan kiri atas
-        elif connections[2] == 1 and connections[1] == 1:
-            return ROAD_TYPES["TURN"], ORIENTATIONS["TURN_BR"]  # Tikungan kanan bawah
-        elif connections[2] == 1 and connections[3] == 1:
-            return ROAD_TYPES["TURN"], ORIENTATIONS["TURN_BL"]  # Tikungan kiri bawah
-    
-    elif connection_sum == 1:
-        # Jalan buntu, gunakan tipe lurus dengan orientasi yang sesuai
-        if connections[0] == 1:
-            return ROAD_TYPES["STRAIGHT"], ORIENTATIONS["VERTICAL"]
-        elif connections[1] == 1:
-            return ROAD_TYPES["STRAIGHT"], ORIENTATIONS["HORIZONTAL"]
-        elif connections[2] == 1:
-            return ROAD_TYPES["STRAIGHT"], ORIENTATIONS["VERTICAL"]
-        else:  # connections[3] == 1
-            return ROAD_TYPES["STRAIGHT"], ORIENTATIONS["HORIZONTAL"]
-    
-    # Default jika tidak ada koneksi (tidak seharusnya terjadi)
-    return ROAD_TYPES["INTERSECTION"], 0
-
-# Generate tilemap peta jalan kota dengan simpang dan tikungan
-def generate_map():
-    # Inisialisasi grid (1 = blok perumahan/non-jalan)
-    grid = [[1 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-    
-    # Buat grid jalan kota (horizontal dan vertikal)
-    road_spacing_x = random.randint(5, 8)
-    road_spacing_y = random.randint(5, 8)
-
-    # Buat jalan horizontal utama
-    for y in range(road_spacing_y, GRID_HEIGHT, road_spacing_y):
-        if y < GRID_HEIGHT:  # Pastikan masih dalam grid
-            for x in range(GRID_WIDTH):
-                grid[y][x] = 0  # 0 = jalan
-
-    # Buat jalan vertikal utama
-    for x in range(road_spacing_x, GRID_WIDTH, road_spacing_x):
-        if x < GRID_WIDTH:  # Pastikan masih dalam grid
-            for y in range(GRID_HEIGHT):
-                grid[y][x] = 0  # 0 = jalan
-
-    # Tambahkan beberapa jalan terputus untuk variasi
-    """for _ in range(random.randint(3, 6)):
-        if random.choice([True, False]):  # Jalan horizontal
-            y = random.randint(0, GRID_HEIGHT - 1)
-            start_x = random.randint(0, GRID_WIDTH - road_spacing_x)
-            end_x = start_x + random.randint(road_spacing_x//2, road_spacing_x)
-            end_x = min(end_x, GRID_WIDTH)
-            for x in range(start_x, end_x):
-                grid[y][x] = 0
-        else:  # Jalan vertikal
-            x = random.randint(0, GRID_WIDTH - 1)
-            start_y = random.randint(0, GRID_HEIGHT - road_spacing_y)
-            end_y = start_y + random.randint(road_spacing_y//2, road_spacing_y)
-            end_y = min(end_y, GRID_HEIGHT)
-            for y in range(start_y, end_y):
-                grid[y][x] = 0 """
-
-    # Tentukan tipe jalan dan orientasi untuk setiap tile jalan
-    road_types = [[1 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-    road_orientations = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-    
-    for y in range(GRID_HEIGHT):
-        for x in range(GRID_WIDTH):
-            if grid[y][x] == 0:  # Jika jalan
-                road_type, road_orientation = determine_road_type_and_orientation(x, y, grid)
-                road_types[y][x] = road_type
-                road_orientations[y][x] = road_orientation
-            else:
-                road_types[y][x] = 1  # Non-jalan
-                road_orientations[y][x] = 0  # Tidak ada orientasi
-
-    return grid, road_types, road_orientations
-
-# Fungsi untuk memuat peta dari gambar
-def load_map_from_image(image_path):
-    try:
-        map_image = pygame.image.load(image_path)
-        map_width = map_image.get_width()
-        map_height = map_image.get_height()
-        
-        # Validasi ukuran peta
-        if not (1000 <= map_width <= 1500) or not (700 <= map_height <= 1000):
-            print(f"Ukuran peta tidak valid: {map_width}x{map_height}. Harus 1000-1500x700-1000")
-            return None, None, None
-        
-        # Konversi ke grid dengan TILE_SIZE kecil (misal: 10px)
-        global GRID_WIDTH, GRID_HEIGHT, WIDTH, HEIGHT, TILE_SIZE
-        TILE_SIZE = 10
-        GRID_WIDTH = map_width // TILE_SIZE
-        GRID_HEIGHT = map_height // TILE_SIZE
-        WIDTH = map_width
-        HEIGHT = map_height
-        
-        # Update ukuran layar
-        global screen
-        screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        
-        grid = [[1 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        road_types = [[1 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        road_orientations = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        
-        # Proses deteksi garis kecil dengan memeriksa banyak pixel per tile
-        for y in range(GRID_HEIGHT):
-            for x in range(GRID_WIDTH):
-                road_pixels = 0
-                # Periksa semua pixel dalam tile saat ini (10x10 pixel)
-                for py in range(TILE_SIZE):
-                    for px in range(TILE_SIZE):
-                        pixel_x = x * TILE_SIZE + px
-                        pixel_y = y * TILE_SIZE + py
-                        if 0 <= pixel_x < map_width and 0 <= pixel_y < map_height:
-                            color = map_image.get_at((pixel_x, pixel_y))
-                            r, g, b, _ = color
-                            # Jika warna abu-abu (90-150), anggap sebagai jalan
-                            if 90 <= r <= 150 and 90 <= g <= 150 and 90 <= b <= 150:
-                                road_pixels += 1
-                
-                # Jika >25% pixel dalam tile adalah jalan, set sebagai jalan (0)
-                if road_pixels > (TILE_SIZE ** 2 * 0.25):
-                    grid[y][x] = 0
-                else:
-                    grid[y][x] = 1
-        
-        # Tentukan tipe jalan dan orientasi
-        for y in range(GRID_HEIGHT):
-            for x in range(GRID_WIDTH):
-                if grid[y][x] == 0:
-                    road_type, road_orientation = determine_road_type_and_orientation(x, y, grid)
-                    road_types[y][x] = road_type
-                    road_orientations[y][x] = road_orientation
-        
-        return grid, road_types, road_orientations
-    
-    except Exception as e:
-        print(f"Gagal memuat peta: {e}")
-        return None, None, None
 """
 def load_map_from_image(image_path):
     try:
@@ -523,99 +195,110 @@ def scan_map_files():
     print(f"Total {len(map_files)} file peta yang valid ditemukan")
     return map_files
 
-# Posisi acak di jalan
-def random_position():
-    positions = []
-    for y in range(GRID_HEIGHT):
-        for x in range(GRID_WIDTH):
-            if grid[y][x] != 1 :  # Bukan rumah (adalah jalan)
-                positions.append((x, y))
-    
-    if not positions:
-        # Fallback jika tidak ada posisi jalan yang valid
-        return (0, 0)
-    
-    return random.choice(positions)
-
-# Gambar peta
-def draw_map():
-    screen.fill(WHITE)
-    for y in range(GRID_HEIGHT):
-        for x in range(GRID_WIDTH):
-            if grid[y][x] != 1:  # Jalan
-                road_type = road_types[y][x]
-                road_orientation = road_orientations[y][x]
-                
-                # Pilih aset sesuai tipe jalan
-                if road_type == ROAD_TYPES["STRAIGHT"]:
-                    road_image = road_straight
-                elif road_type == ROAD_TYPES["TURN"]:
-                    road_image = road_turn
-                elif road_type == ROAD_TYPES["T_JUNCTION"]:
-                    road_image = road_t_junction
-                elif road_type == ROAD_TYPES["INTERSECTION"]:
-                    road_image = road_intersection
-                else:
-                    road_image = road_intersection  # Default fallback
-                
-                # Rotasi gambar sesuai orientasi
-                rotated_road = pygame.transform.rotate(road_image, road_orientation)
-                
-                # Menyesuaikan posisi setelah rotasi agar tetap berada di tengah tile
-                rect = rotated_road.get_rect(center=((x * TILE_SIZE) + TILE_SIZE//2, 
-                                               (y * TILE_SIZE) + TILE_SIZE//2))
-                screen.blit(rotated_road, rect)
-            else:  # Blok perumahan
-                screen.blit(sand, (x * TILE_SIZE, y * TILE_SIZE))
-    
-    # Gambar lokasi pengambilan (kuning) dan pengiriman (merah)
-    pygame.draw.rect(screen, BLUE, (courier_x * TILE_SIZE, courier_y * TILE_SIZE, TILE_SIZE, TILE_SIZE), 3)
-    pygame.draw.rect(screen, YELLOW, (source_x * TILE_SIZE, source_y * TILE_SIZE, TILE_SIZE, TILE_SIZE), 3)
-    pygame.draw.rect(screen, RED, (dest_x * TILE_SIZE, dest_y * TILE_SIZE, TILE_SIZE, TILE_SIZE), 3)
-    
-    # Rotasi mobil kurir dengan animasi halus
-    rotated_car = pygame.transform.rotate(courier_car, courier.rotation_angle)
-    # Menghitung posisi yang disesuaikan untuk rotasi
-    car_rect = rotated_car.get_rect(center=((courier.x * TILE_SIZE) + TILE_SIZE//2, 
-                                      (courier.y * TILE_SIZE) + TILE_SIZE//2))
-    screen.blit(rotated_car, car_rect)
-
-    # Gambar tombol
-    pygame.draw.rect(screen, GREEN, start_button)
-    pygame.draw.rect(screen, GREEN, stop_button)
-    pygame.draw.rect(screen, GREEN, randomize_button)
-    pygame.draw.rect(screen, GREEN, generate_button)
-    pygame.draw.rect(screen, GREEN, load_button)
-    
-    font = pygame.font.Font(None, 24)
-    screen.blit(font.render("Start", True, BLACK), (start_button.x + 10, start_button.y + 5))
-    screen.blit(font.render("Stop", True, BLACK), (stop_button.x + 10, stop_button.y + 5))
-    screen.blit(font.render("Randomize", True, BLACK), (randomize_button.x + 10, randomize_button.y + 5))
-    screen.blit(font.render("Generate Map", True, BLACK), (generate_button.x + 10, generate_button.y + 5))
-    screen.blit(font.render("Load Map", True, BLACK), (load_button.x + 10, load_button.y + 5))
+# Renderer dengan cache tile terotasi dan background statis
+renderer = MapRenderer({
+    ROAD_TYPES["STRAIGHT"]: road_straight,
+    ROAD_TYPES["TURN"]: road_turn,
+    ROAD_TYPES["T_JUNCTION"]: road_t_junction,
+    ROAD_TYPES["INTERSECTION"]: road_intersection,
+}, sand, courier_car)
+
+# Planner dengan statistik pencarian; road_graph diambil saat dipanggil karena dibangun ulang per peta
+instrumentation = Instrumentation(PERF_LOG_FILE)
+find_path = instrumentation.graph_planner(lambda: road_graph)
+
+# Siapkan peta baru: panggang ulang background dan bangun graf jalan untuk routing
+def prepare_map():
+    global road_graph
+    renderer.bake(grid, road_types, road_orientations, TILE_SIZE, (WIDTH, HEIGHT))
+    road_graph = RoadGraph(grid, road_types)
+
+# Ganti peta aktif dengan MapState dari worker sekaligus, di antara dua frame
+def apply_map_state(state):
+    global grid, road_types, road_orientations, road_graph, TILE_SIZE, GRID_WIDTH, GRID_HEIGHT
+    global source_x, source_y, dest_x, dest_y, courier_x, courier_y, courier, current_map_name
+    grid = state.grid
+    road_types = state.road_types
+    road_orientations = state.road_orientations
+    road_graph = state.road_graph
+    # Ukuran jendela tetap; peta yang lebih besar dilihat lewat kamera
+    TILE_SIZE = state.tile_size
+    GRID_WIDTH = len(grid[0])
+    GRID_HEIGHT = len(grid)
+    (source_x, source_y), (dest_x, dest_y) = state.source, state.dest
+    courier_x, courier_y = state.courier_position
+    courier = Courier(courier_x, courier_y, grid)
+    current_map_name = state.name
+    renderer.bake(grid, road_types, road_orientations, TILE_SIZE, (WIDTH, HEIGHT))
+
+# Gambar peta; alpha = posisi di antara dua langkah simulasi untuk interpolasi mobil
+def draw_map(alpha=1.0):
+    # Gambar lokasi kurir awal (biru), pengambilan (kuning) dan pengiriman (merah)
+    markers = [
+        (BLUE, (courier_x, courier_y)),
+        (YELLOW, (source_x, source_y)),
+        (RED, (dest_x, dest_y)),
+    ]
+    buttons = [
+        (start_button, "Start"),
+        (stop_button, "Stop"),
+        (randomize_button, "Randomize"),
+        (generate_button, "Generate Map"),
+        (load_button, "Load Map"),
+    ]
 
     # Status paket
     status_text = "Carrying Package" if courier.has_package else "No Package"
-    text = font.render(status_text, True, BLACK)
-    screen.blit(text, (10, 10))
     
     # Info peta saat ini
     if 'current_map_name' in globals():
         map_text = f"Map: {current_map_name}"
     else:
         map_text = "Map: Default"
-        
-    text = font.render(map_text, True, BLACK)
-    screen.blit(text, (10, 40))
+
+    # Router peta aktif: RoadGraph untuk peta generate, HierarchicalGraph untuk peta gambar
+    map_text += f" ({type(road_graph).__name__})"
+
+    speed_text = f"Speed: {timestep.speed_label()}" + (" (auto)" if auto_jobs else "")
+
+    hud_lines = [status_text, map_text, speed_text]
+    # Indikator progres selama peta baru disiapkan di latar belakang
+    worker_status = map_worker.status()
+    if worker_status is not None:
+        label, stage, progress = worker_status
+        hud_lines.append(f"{label}: {stage} ({progress:.0%})")
+    hud_lines += instrumentation.hud_lines()
+    return renderer.draw_frame(screen, [timestep.pose(courier, alpha)], markers, buttons, hud_lines,
+                               renderer.camera)
+
+# Paket acak berikutnya untuk mode otomatis; coba beberapa kali jika tidak ada rute
+def start_next_job():
+    global source_x, source_y, dest_x, dest_y
+    for _ in range(AUTO_JOB_ATTEMPTS):
+        (source_x, source_y), (dest_x, dest_y) = random_job(grid, rng, (courier.x, courier.y))
+        if start_route(courier, (source_x, source_y), (dest_x, dest_y), find_path):
+            return True
+    return False
+
+# Satu langkah simulasi dengan timestep tetap
+def simulation_step():
+    courier_event = advance_courier(courier, (source_x, source_y), (dest_x, dest_y), find_path)
+    if courier_event in (EVENT_PICKUP, EVENT_NO_ROUTE):
+        print("Package picked up!")
+        if courier_event == EVENT_NO_ROUTE:
+            print("Tidak dapat menemukan jalur ke tujuan!")
+    elif courier_event == EVENT_DELIVERED:
+        print("Package delivered!")
+        if auto_jobs and not start_next_job():
+            print("Tidak dapat menemukan paket yang bisa dijangkau!")
 
 # Inisialisasi peta
-grid, road_types, road_orientations = generate_map()
-source_x, source_y = random_position()
-dest_x, dest_y = random_position()
-while (dest_x, dest_y) == (source_x, source_y):
-    dest_x, dest_y = random_position()
-courier_x, courier_y = random_position()
-courier = Courier(courier_x, courier_y)
+grid, road_types, road_orientations = generate_map(GRID_WIDTH, GRID_HEIGHT, rng=rng)
+grid = CompactGrid.from_rows(grid)
+courier_x, courier_y = random_position(grid, rng)
+(source_x, source_y), (dest_x, dest_y) = random_job(grid, rng, (courier_x, courier_y))
+courier = Courier(courier_x, courier_y, grid)
+prepare_map()
 
 # Tombol
 button_width = 120
@@ -629,48 +312,61 @@ load_button = pygame.Rect(WIDTH - button_width - button_margin, 210, button_widt
 
 # Scan file peta yang tersedia
 map_files = scan_map_files()
+# Kompilasi peta di folder maps di latar belakang agar pemuatan pertama juga cepat
+start_precompile(MAP_FOLDER, MAP_TILE_SIZE)
 current_map_index = 0 if map_files else -1
 
-# Loop utama
+# Pekerjaan peta (muat gambar / generate) di thread latar
+map_worker = MapWorker()
+
+# Loop utama: render RENDER_FPS, simulasi berjalan dengan timestep tetap
 clock = pygame.time.Clock()
+timestep = FixedTimestep()
+frame_seconds = 0.0
 running = True
+follow_courier = False
+auto_jobs = False
 while running:
+    instrumentation.begin_frame()
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
-        elif event.type == pygame.MOUSEBUTTONDOWN:
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            instrumentation.toggle()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_c:
+            follow_courier = not follow_courier
+        elif event.type == pygame.KEYDOWN and event.key in SPEED_KEYS:
+            timestep.set_speed(SPEED_KEYS.index(event.key))
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_a:
+            auto_jobs = not auto_jobs
+            if auto_jobs and not courier.moving:
+                start_next_job()
+        elif event.type == pygame.MOUSEWHEEL:
+            renderer.camera.zoom_at(event.y, pygame.mouse.get_pos())
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             if start_button.collidepoint(event.pos):
-                if not courier.has_package:
-                    # Cari jalur ke sumber paket
-                    courier.path = a_star((courier.x, courier.y), (source_x, source_y))
-                    if not courier.path:
+                # Cari jalur ke sumber paket, atau ke tujuan jika sudah membawa paket
+                if not start_route(courier, (source_x, source_y), (dest_x, dest_y), find_path):
+                    if not courier.has_package:
                         print("Tidak dapat menemukan jalur ke sumber paket!")
                     else:
-                        courier.moving = True
-                else:
-                    courier.path = a_star((courier.x, courier.y), (dest_x, dest_y))
-                    if not courier.path:
                         print("Tidak dapat menemukan jalur ke tujuan!")
-                    else:
-                        courier.moving = True
             elif stop_button.collidepoint(event.pos):
                 courier.moving = False
                 courier.path = []
             elif randomize_button.collidepoint(event.pos):
-                source_x, source_y = random_position()
-                dest_x, dest_y = random_position()
-                while (dest_x, dest_y) == (source_x, source_y):
-                    dest_x, dest_y = random_position()
-                courier_x, courier_y = random_position()
-                courier = Courier(courier_x, courier_y)
+                courier_x, courier_y = random_position(grid, rng)
+                (source_x, source_y), (dest_x, dest_y) = random_job(grid, rng, (courier_x, courier_y))
+                courier = Courier(courier_x, courier_y, grid)
+            elif map_worker.busy() and (generate_button.collidepoint(event.pos)
+                                        or load_button.collidepoint(event.pos)):
+                print("Peta sebelumnya masih disiapkan, tunggu sebentar")
             elif generate_button.collidepoint(event.pos):
-                grid, road_types, road_orientations = generate_map()
-                source_x, source_y = random_position()
-                dest_x, dest_y = random_position()
-                while (dest_x, dest_y) == (source_x, source_y):
-                    dest_x, dest_y = random_position()
-                courier_x, courier_y = random_position()
-                courier = Courier(courier_x, courier_y)
+                # Peta dibuat di thread latar; peta lama tetap digambar sampai selesai.
+                # Worker memakai rng sendiri yang diturunkan dari rng sesi (tetap bisa diulang)
+                map_worker.start("Generate Map", lambda report, size=(GRID_WIDTH, GRID_HEIGHT, TILE_SIZE),
+                                 worker_rng=random.Random(rng.getrandbits(64)):
+                                 generate_map_state(*size, report=report, rng=worker_rng))
             elif load_button.collidepoint(event.pos):
                 # Buka dialog untuk memilih file
                 map_path = filedialog.askopenfilename(
@@ -681,49 +377,45 @@ while running:
                 if map_path:  # Jika user memilih file (tidak membatalkan dialog)
                     # Dapatkan hanya nama file (tanpa path folder)
                     map_filename = os.path.basename(map_path)
-                    new_grid, new_road_types, new_road_orientations = load_map_from_image(map_path)
-                    
-                    if new_grid and new_road_types and new_road_orientations:
-                        # Update variabel global
-                        grid = new_grid
-                        road_types = new_road_types
-                        road_orientations = new_road_orientations
-                        
-                        # Reset posisi kurir, sumber, dan tujuan
-                        source_x, source_y = random_position()
-                        dest_x, dest_y = random_position()
-                        while (dest_x, dest_y) == (source_x, source_y):
-                            dest_x, dest_y = random_position()
-                        courier_x, courier_y = random_position()
-                        courier = Courier(courier_x, courier_y)
-                        
-                        # Update nama file yang sedang aktif
-                        current_map_name = map_filename
-                    else:
-                        print("Gagal memuat peta, menggunakan peta default")
-                        grid, road_types, road_orientations = generate_map()
-                        current_map_name = "Generated Map"
-    # Update posisi kurir
-    if courier.moving:
-        courier.follow_path()
-        # Periksa jika path kosong dan kurir sudah tiba di tujuan
-        if not courier.path:
-            if not courier.has_package and courier.x == source_x and courier.y == source_y:
-                if courier.try_pickup(source_x, source_y):
-                    print("Package picked up!")
-                    # Setelah mengambil paket, tentukan rute ke tujuan
-                    courier.path = a_star((courier.x, courier.y), (dest_x, dest_y))
-                    if not courier.path:
-                        print("Tidak dapat menemukan jalur ke tujuan!")
-                        courier.moving = False
-            elif courier.has_package and courier.x == dest_x and courier.y == dest_y:
-                if courier.try_deliver(dest_x, dest_y):
-                    print("Package delivered!")
-                    courier.moving = False
-
-    draw_map()
-    pygame.display.flip()
-    clock.tick(7)
+                    # Konversi ke grid dengan tile kecil (misal: 10px) di thread latar; gambar
+                    # yang pernah dimuat dibaca dari cache peta terkompilasi
+                    map_worker.start("Load Map", lambda report, path=map_path, name=map_filename,
+                                     worker_rng=random.Random(rng.getrandbits(64)):
+                                     load_map_state(path, MAP_TILE_SIZE, name, report, worker_rng))
+
+    # Peta dari worker selesai: ganti grid, graf jalan, dan kurir sekaligus
+    finished = map_worker.poll()
+    if finished is not None:
+        state, error = finished
+        if error is not None:
+            print(f"Gagal memuat peta: {error}")
+        else:
+            apply_map_state(state)
+
+    # Geser kamera selama tombol panah ditekan
+    keys = pygame.key.get_pressed()
+    pan_x = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * CAMERA_PAN_STEP
+    pan_y = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * CAMERA_PAN_STEP
+    if pan_x or pan_y:
+        follow_courier = False
+        renderer.camera.pan(pan_x, pan_y)
+    instrumentation.lap("events")
+
+    # Update posisi kurir: sebanyak langkah yang muat dalam waktu frame sebelumnya
+    alpha = timestep.advance(frame_seconds, simulation_step, [courier])
+    if follow_courier:
+        pose = timestep.pose(courier, alpha)
+        renderer.camera.center_on(pose.x, pose.y)
+    instrumentation.lap("sim")
+
+    dirty_rects = draw_map(alpha)
+    if dirty_rects is None:
+        pygame.display.flip()
+    else:
+        pygame.display.update(dirty_rects)
+    instrumentation.lap("render")
+    frame_seconds = clock.tick(RENDER_FPS) / 1000
 
+instrumentation.close()
 pygame.quit()
 sys.exit()
\ No newline at end of file
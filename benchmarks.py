@@ -0,0 +1,331 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from courier_core import a_star, generate_map
+from compact_grid import CompactGrid
+from dispatch import road_neighbors
+from hierarchy import HierarchicalGraph
+from spatial_index import CourierIndex, suggest_bucket_size
+
+# Peta gambar dan renderer butuh pygame; tanpa pygame kasus tersebut dilewati
+try:
+    import pygame
+except ImportError:
+    pygame = None
+
+# Suite benchmark jalur panas dengan seed tetap. Setiap kasus diukur
+# beberapa kali dan dilaporkan median/p95 (ms) dalam JSON, lalu bisa
+# dibandingkan dengan hasil yang disimpan sebelumnya (baseline).
+
+SEED = 1234
+DEFAULT_REPEAT = 20
+DEFAULT_THRESHOLD = 0.10    # Regresi jika median naik lebih dari 10%
+
+MAP_IMAGES = ("maps/maps.png", "maps/maps2.png", "maps/simple_t_map.png")
+GENERATED_GRID = (150, 100)
+GENERATE_MAP_SIZES = ((33, 23), (150, 100), (300, 200))
+SHORT_QUERY_RANGE = (5, 15)     # Jarak Manhattan untuk query pendek
+QUERIES_PER_SET = 10
+INDEXED_COURIERS = 10000
+NEAREST_QUERIES = 1000
+# Peta gambar dengan tile kecil = grid besar (maps2.png jadi 600x400) untuk membandingkan hpa dengan a_star
+HPA_TILE_SIZE = 2
+
+# Ukuran layar dan tile sama dengan Smart_courier_fix.py
+SCREEN_SIZE = (1000, 700)
+SCREEN_TILE_SIZE = 30
+LARGE_MAP_GRID = (1500, 1000)
+MAP_TILE_SIZE = 10
+# Stress armada kooperatif di peta default 33x23 (sekitar 200 sel jalan): simulasi penuh per pengukuran
+DENSE_FLEET_SIZES = (25, 50)
+DENSE_TICKS = 300
+DENSE_REPEAT = 3
+
+
+def measure(func, repeat, warmup=1):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start_time) * 1000)
+    return samples
+
+def summarize(samples):
+    ordered = sorted(samples)
+    count = len(ordered)
+    middle = count // 2
+    if count % 2:
+        median = ordered[middle]
+    else:
+        median = (ordered[middle - 1] + ordered[middle]) / 2
+    return {
+        "median_ms": median,
+        "p95_ms": ordered[max(0, -(-95 * count // 100) - 1)],
+        "min_ms": ordered[0],
+        "runs": count,
+    }
+
+# Query a_star per kategori: pendek, panjang (sudut ke sudut), dan tak terjangkau
+def make_queries(grid, rng):
+    road_cells = [(x, y) for y in range(len(grid)) for x in range(len(grid[0])) if grid[y][x] != 1]
+    block_cells = [(x, y) for y in range(len(grid)) for x in range(len(grid[0])) if grid[y][x] == 1]
+
+    short = []
+    low, high = SHORT_QUERY_RANGE
+    while len(short) < QUERIES_PER_SET:
+        start = rng.choice(road_cells)
+        goal = rng.choice(road_cells)
+        if low <= abs(start[0] - goal[0]) + abs(start[1] - goal[1]) <= high:
+            short.append((start, goal))
+
+    # Sel jalan terjauh di kiri atas dan kanan bawah, serta kanan atas dan kiri bawah
+    long = [
+        (min(road_cells, key=lambda cell: cell[0] + cell[1]), max(road_cells, key=lambda cell: cell[0] + cell[1])),
+        (max(road_cells, key=lambda cell: cell[0] - cell[1]), min(road_cells, key=lambda cell: cell[0] - cell[1])),
+    ]
+
+    # Tujuan di blok bukan jalan: a_star menjelajahi seluruh komponen sebelum menyerah
+    unreachable = [(rng.choice(road_cells), rng.choice(block_cells)) for _ in range(2)]
+    return {"short": short, "long": long, "unreachable": unreachable}
+
+def _run_queries(grid, queries):
+    return lambda: [a_star(start, goal, grid) for start, goal in queries]
+
+def bench_a_star(results, repeat, name, grid):
+    rng = random.Random(SEED)
+    for kind, queries in make_queries(grid, rng).items():
+        results[f"a_star/{name}/{kind}"] = summarize(measure(_run_queries(grid, queries), repeat))
+
+# Query yang sama lewat graf hierarkis, ditambah waktu membangun grafnya per peta
+def bench_hpa(results, repeat, name, grid):
+    results[f"hpa/{name}/build"] = summarize(measure(lambda: HierarchicalGraph(grid), repeat))
+    graph = HierarchicalGraph(grid)
+    rng = random.Random(SEED)
+    for kind, queries in make_queries(grid, rng).items():
+        results[f"hpa/{name}/{kind}"] = summarize(
+            measure(lambda: [graph.find_path(start, goal) for start, goal in queries], repeat))
+
+# Query kurir terdekat di indeks spasial berisi INDEXED_COURIERS kurir (waktu per NEAREST_QUERIES query)
+def bench_spatial_index(results, repeat):
+    from courier_core import random_position
+    rng = random.Random(SEED)
+    grid, _, _ = generate_map(*GENERATED_GRID, rng=rng)
+    grid = CompactGrid.from_rows(grid)
+    index = CourierIndex(grid.width, grid.height, suggest_bucket_size(grid.width, grid.height, INDEXED_COURIERS))
+    for key in range(INDEXED_COURIERS):
+        index.insert(key, *random_position(grid, rng))
+    rng = random.Random(SEED)
+    queries = [grid.position(rng.choice(grid.road_cells())) for _ in range(NEAREST_QUERIES)]
+    neighbors = road_neighbors(grid)
+    results["spatial_index/nearest"] = summarize(measure(lambda: [index.nearest(x, y) for x, y in queries], repeat))
+    results["spatial_index/nearest_10"] = summarize(
+        measure(lambda: [index.nearest(x, y, 10) for x, y in queries], repeat))
+    results["spatial_index/nearest_reachable"] = summarize(
+        measure(lambda: [index.nearest_reachable(x, y, neighbors) for x, y in queries], repeat))
+
+def bench_generate_map(results, repeat):
+    for grid_width, grid_height in GENERATE_MAP_SIZES:
+        # rng baru tiap kali agar jarak jalan (acak 5-8) sama di setiap pengukuran
+        def run():
+            generate_map(grid_width, grid_height, rng=random.Random(SEED))
+        results[f"generate_map/{grid_width}x{grid_height}"] = summarize(measure(run, repeat))
+
+# Konversi gambar penuh dan baca ulang dari cache peta terkompilasi (folder sementara)
+def bench_load_map(results, repeat):
+    from map_loader import load_grid_from_image
+    from map_cache import load_map
+    with tempfile.TemporaryDirectory() as cache_folder:
+        for image_path in MAP_IMAGES:
+            name = os.path.splitext(os.path.basename(image_path))[0]
+            results[f"load_map/{name}"] = summarize(measure(lambda: load_grid_from_image(image_path), repeat))
+            # Pemanasan measure mengompilasi peta, pengukuran berikutnya membaca cache
+            results[f"load_map/{name}_cached"] = summarize(
+                measure(lambda: load_map(image_path, cache_folder=cache_folder), repeat))
+
+# Armada kooperatif padat di peta default: waktu DENSE_TICKS tick, ditambah jumlah
+# pengiriman, rute gagal, dan rute direncanakan (sama di setiap pengukuran karena seed tetap)
+def bench_cooperative(results, repeat):
+    from simulation import FleetSimulation
+    for couriers in DENSE_FLEET_SIZES:
+        finished = []
+
+        def run():
+            sim = FleetSimulation(couriers, cooperative=True, seed=SEED)
+            for _ in range(DENSE_TICKS):
+                sim.step()
+            finished.append(sim)
+
+        summary = summarize(measure(run, min(repeat, DENSE_REPEAT), warmup=0))
+        sim = finished[-1]
+        summary["deliveries"] = sim.deliveries
+        summary["failed_routes"] = sim.failed_routes
+        summary["plans"] = sim.fleet.plans
+        results[f"cooperative/dense_{couriers}"] = summary
+
+def _make_renderer():
+    from renderer import MapRenderer
+    from courier_core import ROAD_TYPES
+    road_image = pygame.image.load("road_intersection.png")
+    sand = pygame.image.load("sand.png")
+    courier_car = pygame.transform.rotate(pygame.image.load("courier_car.png"), 90)
+    return MapRenderer({road_type: road_image for road_type in ROAD_TYPES.values()}, sand, courier_car)
+
+# Satu frame draw_map di surface offscreen: frame penuh (background viewport disusun
+# ulang dari chunk), frame inkremental, dan frame saat kamera digeser
+def bench_draw_frame(results, repeat, name, grid_width, grid_height, tile_size):
+    from courier_core import Courier, random_position
+    rng = random.Random(SEED)
+    grid, road_types, road_orientations = generate_map(grid_width, grid_height, rng=rng)
+    screen = pygame.Surface(SCREEN_SIZE)
+    renderer = _make_renderer()
+    courier = Courier(*random_position(grid, rng), grid)
+    markers = [((0, 0, 255), random_position(grid, rng)), ((255, 255, 0), random_position(grid, rng)),
+               ((255, 0, 0), random_position(grid, rng))]
+    buttons = [(pygame.Rect(50 + 170 * i, SCREEN_SIZE[1] - 50, 150, 40), label)
+               for i, label in enumerate(("Start", "Stop", "Randomize", "Generate Map", "Load Map"))]
+    hud_lines = ["Carrying Package: No", "Map: Generated"]
+
+    def bake():
+        renderer.bake(grid, road_types, road_orientations, tile_size, SCREEN_SIZE)
+
+    def full_frame():
+        renderer.view_key = None
+        renderer.draw_frame(screen, [courier], markers, buttons, hud_lines)
+
+    def incremental_frame():
+        renderer.draw_frame(screen, [courier], markers, buttons, hud_lines)
+
+    # Geser bolak-balik agar chunk baru ikut dipanggang sesekali
+    pan_steps = [0]
+
+    def pan_frame():
+        pan_steps[0] += 1
+        direction = 1 if pan_steps[0] % 20 < 10 else -1
+        renderer.camera.pan(direction * 60, direction * 40)
+        renderer.draw_frame(screen, [courier], markers, buttons, hud_lines)
+
+    results[f"{name}/bake"] = summarize(measure(bake, repeat))
+    results[f"{name}/full_frame"] = summarize(measure(full_frame, repeat))
+    results[f"{name}/incremental_frame"] = summarize(measure(incremental_frame, repeat))
+    results[f"{name}/pan_frame"] = summarize(measure(pan_frame, repeat))
+
+def run_benchmarks(repeat=DEFAULT_REPEAT, only=None):
+    results = {}
+
+    # Grup kasus = bagian nama sebelum "/" pertama
+    def selected(group):
+        return only is None or any(prefix.split("/")[0] == group for prefix in only)
+
+    if selected("a_star"):
+        grid, _, _ = generate_map(*GENERATED_GRID, rng=random.Random(SEED))
+        bench_a_star(results, repeat, f"generated_{GENERATED_GRID[0]}x{GENERATED_GRID[1]}", grid)
+        bench_a_star(results, repeat, f"generated_{GENERATED_GRID[0]}x{GENERATED_GRID[1]}_compact",
+                     CompactGrid.from_rows(grid))
+        if pygame is not None:
+            from map_loader import load_grid_from_image
+            for image_path in MAP_IMAGES:
+                image_grid, _, _ = load_grid_from_image(image_path)
+                bench_a_star(results, repeat, os.path.splitext(os.path.basename(image_path))[0], image_grid)
+    if selected("hpa"):
+        grid, _, _ = generate_map(*GENERATED_GRID, rng=random.Random(SEED))
+        bench_hpa(results, repeat, f"generated_{GENERATED_GRID[0]}x{GENERATED_GRID[1]}", CompactGrid.from_rows(grid))
+        if pygame is not None:
+            from map_loader import load_grid_from_image
+            for image_path in MAP_IMAGES:
+                name = os.path.splitext(os.path.basename(image_path))[0]
+                image_grid = CompactGrid.from_rows(load_grid_from_image(image_path, HPA_TILE_SIZE)[0])
+                bench_a_star(results, repeat, f"{name}_tile{HPA_TILE_SIZE}", image_grid)
+                bench_hpa(results, repeat, f"{name}_tile{HPA_TILE_SIZE}", image_grid)
+    if selected("spatial_index"):
+        bench_spatial_index(results, repeat)
+    if selected("generate_map"):
+        bench_generate_map(results, repeat)
+    if selected("cooperative"):
+        bench_cooperative(results, repeat)
+    if pygame is not None:
+        if selected("load_map"):
+            bench_load_map(results, repeat)
+        if selected("draw_map"):
+            pygame.font.init()
+            bench_draw_frame(results, repeat, "draw_map", SCREEN_SIZE[0] // SCREEN_TILE_SIZE,
+                             SCREEN_SIZE[1] // SCREEN_TILE_SIZE, SCREEN_TILE_SIZE)
+            # Peta jauh lebih besar dari layar: waktu frame harus tetap sama
+            bench_draw_frame(results, repeat, "draw_map/large", *LARGE_MAP_GRID, MAP_TILE_SIZE)
+    else:
+        print("pygame tidak tersedia: benchmark peta gambar dan draw_map dilewati", file=sys.stderr)
+
+    if only is not None:
+        results = {name: value for name, value in results.items()
+                   if any(name.startswith(prefix) for prefix in only)}
+    return results
+
+def environment():
+    info = {"python": platform.python_version(), "platform": platform.platform()}
+    if pygame is not None:
+        info["pygame"] = pygame.version.ver
+    try:
+        import numpy
+        info["numpy"] = numpy.__version__
+    except ImportError:
+        info["numpy"] = None
+    return info
+
+# Bandingkan median dengan baseline: [(nama, median lama, median baru, rasio)]
+def compare(results, baseline):
+    rows = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = current["median_ms"] / previous["median_ms"] if previous["median_ms"] else float("inf")
+        rows.append((name, previous["median_ms"], current["median_ms"], ratio))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark a_star, hpa, indeks spasial, generate_map, armada kooperatif, load map, dan draw_map")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="jumlah pengukuran per kasus")
+    parser.add_argument("--only", nargs="*", default=None, help="hanya kasus dengan awalan ini (misal a_star/maps2)")
+    parser.add_argument("--output", default=None, help="simpan hasil JSON ke file (default: stdout)")
+    parser.add_argument("--compare", default=None, help="file JSON baseline untuk dibandingkan")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="batas kenaikan median sebelum dianggap regresi (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    # Path aset dan peta relatif terhadap folder proyek
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    results = run_benchmarks(args.repeat, args.only)
+    report = {"seed": SEED, "repeat": args.repeat, "environment": environment(), "results": results}
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = 0
+        for name, previous, current, ratio in compare(results, baseline):
+            flag = ""
+            if ratio > 1 + args.threshold:
+                flag = "  REGRESI"
+                regressions += 1
+            print(f"{name:45s} {previous:10.3f} -> {current:10.3f} ms  x{ratio:.2f}{flag}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
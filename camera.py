@@ -0,0 +1,80 @@
+# Kamera peta: menentukan bagian peta yang terlihat di layar (geser dan zoom),
+# sehingga renderer cukup menggambar tile di dalam viewport berapapun ukuran peta.
+
+# Tingkat zoom yang tersedia (1.0 = ukuran tile asli)
+ZOOM_LEVELS = (0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0)
+
+class Camera:
+    def __init__(self, viewport_width, viewport_height, tile_size, grid_width, grid_height):
+        self.viewport_width = viewport_width
+        self.viewport_height = viewport_height
+        self.tile_size = tile_size
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        # Posisi pojok kiri atas viewport dalam pixel peta (pada zoom saat ini)
+        self.x = 0
+        self.y = 0
+        self.zoom_index = ZOOM_LEVELS.index(1.0)
+
+    @property
+    def zoom(self):
+        return ZOOM_LEVELS[self.zoom_index]
+
+    # Ukuran satu tile di layar
+    @property
+    def screen_tile(self):
+        return max(1, round(self.tile_size * self.zoom))
+
+    # Kunci yang berubah setiap kali bagian peta yang terlihat berubah
+    @property
+    def view_key(self):
+        return (self.x, self.y, self.screen_tile, self.viewport_width, self.viewport_height)
+
+    def _clamp(self):
+        screen_tile = self.screen_tile
+        max_x = self.grid_width * screen_tile - self.viewport_width
+        max_y = self.grid_height * screen_tile - self.viewport_height
+        # Peta lebih kecil dari viewport tetap di pojok kiri atas
+        self.x = max(0, min(self.x, max_x))
+        self.y = max(0, min(self.y, max_y))
+
+    def pan(self, dx, dy):
+        self.x += dx
+        self.y += dy
+        self._clamp()
+
+    # Letakkan sel (x, y) di tengah viewport; x/y boleh pecahan (posisi interpolasi)
+    def center_on(self, x, y):
+        screen_tile = self.screen_tile
+        self.x = round(x * screen_tile) + screen_tile // 2 - self.viewport_width // 2
+        self.y = round(y * screen_tile) + screen_tile // 2 - self.viewport_height // 2
+        self._clamp()
+
+    # Zoom satu tingkat (steps > 0 = mendekat) dengan titik di bawah kursor tetap di tempat
+    def zoom_at(self, steps, screen_pos):
+        new_index = max(0, min(len(ZOOM_LEVELS) - 1, self.zoom_index + steps))
+        if new_index == self.zoom_index:
+            return False
+        old_tile = self.screen_tile
+        world_x = (self.x + screen_pos[0]) / old_tile
+        world_y = (self.y + screen_pos[1]) / old_tile
+        self.zoom_index = new_index
+        new_tile = self.screen_tile
+        self.x = round(world_x * new_tile - screen_pos[0])
+        self.y = round(world_y * new_tile - screen_pos[1])
+        self._clamp()
+        return True
+
+    # Rentang sel yang terlihat: (x0, y0, x1, y1), x1/y1 eksklusif
+    def visible_cells(self):
+        screen_tile = self.screen_tile
+        x0 = self.x // screen_tile
+        y0 = self.y // screen_tile
+        x1 = min(self.grid_width, -(-(self.x + self.viewport_width) // screen_tile))
+        y1 = min(self.grid_height, -(-(self.y + self.viewport_height) // screen_tile))
+        return x0, y0, x1, y1
+
+    # Posisi pojok kiri atas sel di layar
+    def cell_to_screen(self, x, y):
+        screen_tile = self.screen_tile
+        return x * screen_tile - self.x, y * screen_tile - self.y
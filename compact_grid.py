@@ -0,0 +1,333 @@
+from array import array
+from bisect import bisect_left, insort
+
+# Hitung mask seluruh grid sekaligus jika numpy tersedia
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Grid ringkas: sel disimpan dalam satu bytearray datar (indeks y * lebar + x,
+# 0 = jalan, 1 = blok) beserta mask koneksi 4-bit per sel, sehingga pencarian
+# jalur cukup membaca mask tanpa cek batas grid. Baris tetap bisa dibaca
+# dengan grid[y][x] dan len(grid), jadi kode yang memakai list of list tetap jalan.
+
+# Bit mask koneksi: tetangga ke arah tersebut ada di dalam grid dan berupa jalan
+MASK_UP = 1
+MASK_RIGHT = 2
+MASK_DOWN = 4
+MASK_LEFT = 8
+
+# Langkah (dx, dy) -> bit mask
+MOVE_MASKS = {
+    (0, -1): MASK_UP,
+    (1, 0): MASK_RIGHT,
+    (0, 1): MASK_DOWN,
+    (-1, 0): MASK_LEFT,
+}
+
+# Mask koneksi untuk seluruh grid (butuh numpy). passable = array bool [y][x]
+# sel yang bisa dilewati; tetangga di luar grid dianggap tidak terhubung.
+def connection_masks(passable):
+    # bool dibaca sebagai 0/1 lalu digeser ke posisi bit arahnya
+    bits = passable.view(np.uint8)
+    masks = np.zeros(passable.shape, dtype=np.uint8)
+    # Geser array satu sel ke tiap arah
+    masks[1:, :] |= bits[:-1, :]                # MASK_UP
+    masks[:, :-1] |= bits[:, 1:] << 1           # MASK_RIGHT
+    masks[:-1, :] |= bits[1:, :] << 2           # MASK_DOWN
+    masks[:, 1:] |= bits[:, :-1] << 3           # MASK_LEFT
+    return masks
+
+class CompactGrid:
+    # masks = mask koneksi yang sudah dihitung sebelumnya (misal dari peta terkompilasi)
+    def __init__(self, width, height, cells, masks=None):
+        self.width = width
+        self.height = height
+        self.cells = cells      # bytearray width * height
+        self.masks = bytearray(width * height)
+        # Baris read-only: perubahan sel harus lewat set_cell agar mask tetap benar
+        view = memoryview(cells).toreadonly()
+        self.rows = [view[y * width:(y + 1) * width] for y in range(height)]
+        self._road_cells = None
+        # Label komponen jalan per sel (-1 = blok) dan sel tiap komponen, dibangun saat
+        # pertama dipakai lalu diperbarui oleh set_cell. Label komponen yang sudah
+        # digabung tetap ada dengan daftar sel kosong
+        self._components = None
+        self._component_cells = None
+        self._component_count = 0
+
+        # Offset indeks tetangga per mask, urutannya sama dengan a_star (bawah, kanan, atas, kiri)
+        self.neighbor_offsets = []
+        for mask in range(16):
+            offsets = []
+            if mask & MASK_DOWN:
+                offsets.append(width)
+            if mask & MASK_RIGHT:
+                offsets.append(1)
+            if mask & MASK_UP:
+                offsets.append(-width)
+            if mask & MASK_LEFT:
+                offsets.append(-1)
+            self.neighbor_offsets.append(tuple(offsets))
+
+        if masks is not None:
+            self.masks[:] = masks
+        elif np is not None:
+            self._build_masks_array()
+        else:
+            self._build_masks_loop()
+
+    @classmethod
+    def from_rows(cls, grid):
+        width = len(grid[0])
+        height = len(grid)
+        cells = bytearray(width * height)
+        for y, row in enumerate(grid):
+            cells[y * width:(y + 1) * width] = bytes(row)
+        return cls(width, height, cells)
+
+    def to_rows(self):
+        return [list(row) for row in self.rows]
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        return self.rows[y]
+
+    def index(self, x, y):
+        return y * self.width + x
+
+    def position(self, index):
+        y, x = divmod(index, self.width)
+        return x, y
+
+    def passable(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height and self.cells[y * self.width + x] != 1
+
+    def _build_masks_loop(self):
+        for index in range(self.width * self.height):
+            self._update_mask(index)
+
+    def _build_masks_array(self):
+        self.masks[:] = connection_masks(self.array() != 1).tobytes()
+
+    # Salinan sel sebagai array numpy [y][x]
+    def array(self):
+        return np.frombuffer(bytes(self.cells), dtype=np.uint8).reshape(self.height, self.width)
+
+    def _update_mask(self, index):
+        width = self.width
+        cells = self.cells
+        y, x = divmod(index, width)
+        mask = 0
+        if y > 0 and cells[index - width] != 1:
+            mask |= MASK_UP
+        if x < width - 1 and cells[index + 1] != 1:
+            mask |= MASK_RIGHT
+        if y < self.height - 1 and cells[index + width] != 1:
+            mask |= MASK_DOWN
+        if x > 0 and cells[index - 1] != 1:
+            mask |= MASK_LEFT
+        self.masks[index] = mask
+
+    # Ubah satu sel (0 = jalan, 1 = blok) dan perbarui mask tetangganya. Daftar
+    # sel jalan dan label komponen (jika sudah dibangun) ikut diperbarui di tempat
+    def set_cell(self, x, y, value):
+        index = y * self.width + x
+        was_road = self.cells[index] != 1
+        self.cells[index] = value
+        if was_road == (value != 1):
+            return
+        if y > 0:
+            self._update_mask(index - self.width)
+        if x < self.width - 1:
+            self._update_mask(index + 1)
+        if y < self.height - 1:
+            self._update_mask(index + self.width)
+        if x > 0:
+            self._update_mask(index - 1)
+
+        road_cells = self._road_cells
+        if road_cells is not None:
+            if was_road:
+                del road_cells[bisect_left(road_cells, index)]
+            else:
+                insort(road_cells, index)
+        if self._components is not None:
+            if was_road:
+                self._close_component(index)
+            else:
+                self._open_component(index)
+
+    # Indeks semua sel jalan (urut baris seperti pemindaian grid), dibangun sekali
+    def road_cells(self):
+        if self._road_cells is None:
+            cells = self.cells
+            self._road_cells = array("i", [index for index in range(len(cells)) if cells[index] != 1])
+        return self._road_cells
+
+    # Label komponen terhubung setiap sel: sel jalan yang saling terjangkau punya
+    # label sama (0, 1, ... urut sel pertama per baris; setelah set_cell urutan ini
+    # tidak dijaga lagi), blok = -1. BFS sekali per peta
+    def components(self):
+        if self._components is None:
+            self._label_components()
+        return self._components
+
+    def _label_components(self):
+        masks = self.masks
+        neighbor_offsets = self.neighbor_offsets
+        labels = array("i", [-1]) * (self.width * self.height)
+        component_cells = []
+        for cell in self.road_cells():
+            if labels[cell] >= 0:
+                continue
+            label = len(component_cells)
+            labels[cell] = label
+            members = [cell]
+            # members sekaligus antrean BFS
+            for current in members:
+                for offset in neighbor_offsets[masks[current]]:
+                    neighbor = current + offset
+                    if labels[neighbor] < 0:
+                        labels[neighbor] = label
+                        members.append(neighbor)
+            members.sort()
+            component_cells.append(array("i", members))
+        self._components = labels
+        self._component_cells = component_cells
+        self._component_count = len(component_cells)
+
+    # Sel dibuka: menjadi komponen baru, bergabung ke komponen tetangganya, atau
+    # menyatukan beberapa komponen (sel komponen yang lebih kecil dilabel ulang)
+    def _open_component(self, index):
+        labels = self._components
+        component_cells = self._component_cells
+        neighbors = {labels[index + offset] for offset in self.neighbor_offsets[self.masks[index]]}
+        if not neighbors:
+            labels[index] = len(component_cells)
+            component_cells.append(array("i", [index]))
+            self._component_count += 1
+            return
+        label = max(neighbors, key=lambda neighbor: len(component_cells[neighbor]))
+        neighbors.discard(label)
+        members = component_cells[label]
+        if neighbors:
+            merged = list(members)
+            for other in neighbors:
+                for cell in component_cells[other]:
+                    labels[cell] = label
+                merged.extend(component_cells[other])
+                component_cells[other] = array("i")
+            self._component_count -= len(neighbors)
+            merged.sort()
+            component_cells[label] = members = array("i", merged)
+        labels[index] = label
+        insort(members, index)
+
+    # Sel ditutup: komponennya bisa terpecah. BFS dijalankan bergiliran dari setiap
+    # tetangga sel itu; pencarian yang bertemu digabung. Selesai begitu semua sudah
+    # bertemu (komponen tetap utuh) atau tinggal satu yang belum habis: bagian yang
+    # habis lebih dulu adalah pecahan kecil dan mendapat label baru. Biayanya
+    # sebanding dengan pecahan terkecil, bukan seluruh komponen
+    def _close_component(self, index):
+        labels = self._components
+        component_cells = self._component_cells
+        label = labels[index]
+        labels[index] = -1
+        members = component_cells[label]
+        del members[bisect_left(members, index)]
+        if not members:
+            self._component_count -= 1
+            return
+        masks = self.masks
+        neighbor_offsets = self.neighbor_offsets
+        starts = [index + offset for offset in neighbor_offsets[masks[index]]]
+        if len(starts) < 2:
+            return
+
+        # parent = gabungan pencarian (union-find kecil, paling banyak 4 anggota)
+        parent = list(range(len(starts)))
+
+        def root(search):
+            while parent[search] != search:
+                search = parent[search]
+            return search
+
+        owner = {start: search for search, start in enumerate(starts)}
+        queues = [[start] for start in starts]
+        heads = [0] * len(starts)
+        while True:
+            for search, queue in enumerate(queues):
+                if heads[search] == len(queue):
+                    continue
+                current = queue[heads[search]]
+                heads[search] += 1
+                for offset in neighbor_offsets[masks[current]]:
+                    neighbor = current + offset
+                    other = owner.get(neighbor)
+                    if other is None:
+                        owner[neighbor] = search
+                        queue.append(neighbor)
+                    else:
+                        parent[root(other)] = root(search)
+            roots = {root(search) for search in range(len(starts))}
+            if len(roots) == 1:
+                return
+            running = {root(search) for search, queue in enumerate(queues) if heads[search] < len(queue)}
+            if len(running) <= 1:
+                break
+
+        # Pecahan yang habis diberi label baru; sisanya (yang masih berjalan, atau
+        # yang terbesar jika semua habis) tetap memakai label lama
+        pieces = {piece: [] for piece in roots}
+        for cell, search in owner.items():
+            pieces[root(search)].append(cell)
+        keep = next(iter(running)) if running else max(roots, key=lambda piece: len(pieces[piece]))
+        for piece, cells in pieces.items():
+            if piece == keep:
+                continue
+            new_label = len(component_cells)
+            for cell in cells:
+                labels[cell] = new_label
+                del members[bisect_left(members, cell)]
+            cells.sort()
+            component_cells.append(array("i", cells))
+            self._component_count += 1
+
+    def component(self, x, y):
+        return self.components()[y * self.width + x]
+
+    # Indeks sel jalan satu komponen (urut baris seperti road_cells)
+    def component_cells(self, label):
+        self.components()
+        return self._component_cells[label]
+
+    # Jumlah komponen yang masih punya sel
+    def component_count(self):
+        self.components()
+        return self._component_count
+
+    # False hanya jika goal pasti tidak terjangkau dari start (indeks sel): beda komponen
+    # atau goal bukan jalan. Start di luar jalan tetap dianggap mungkin (a_star boleh keluar dari situ)
+    def reachable(self, start, goal):
+        labels = self.components()
+        start_label = labels[start]
+        return start_label < 0 or start_label == labels[goal]
+
+# Cek O(1) sebelum pencarian jalur: True jika start dan goal (x, y) pasti tidak terhubung.
+# Hanya CompactGrid yang punya label komponen; list of list selalu False (tetap dicari)
+def disconnected(grid, start, goal):
+    if not isinstance(grid, CompactGrid):
+        return False
+    width = grid.width
+    return not grid.reachable(start[1] * width + start[0], goal[1] * width + goal[0])
+
+# Ubah sel grid, baik list of list maupun CompactGrid
+def set_cell(grid, x, y, value):
+    if isinstance(grid, CompactGrid):
+        grid.set_cell(x, y, value)
+    else:
+        grid[y][x] = value
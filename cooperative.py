@@ -0,0 +1,739 @@
+import heapq
+import time
+
+from courier_core import turn_ticks, EVENT_PICKUP, EVENT_DELIVERED, EVENT_NO_ROUTE
+from compact_grid import disconnected
+from dispatch import road_neighbors
+from fleet import Fleet, FLEET_DIRECTIONS
+
+# Routing kooperatif untuk armada: setiap rute yang direncanakan dicatat di
+# tabel reservasi ruang-waktu (sel, tick), lalu kurir berikutnya mencari jalur
+# dengan A* ruang-waktu yang menghindari reservasi tersebut, termasuk dengan
+# menunggu di tempat. Waktu tempuh dihitung sama persis dengan Fleet.step
+# (tick berbelok lalu satu tick bergerak), jadi tidak ada dua kurir di sel
+# yang sama pada tick yang sama dan tidak ada dua kurir yang bertukar sel.
+#
+# Kurir yang tiba di tujuan memegang selnya selama DWELL_TICKS, cukup untuk
+# pickup lalu berbalik arah di rute berikutnya (di armada padat kurir langsung
+# parkir di sana jika tidak ada rute lain yang akan lewat). Kurir tanpa rute
+# "parkir": selnya terisi sampai kurir itu direncanakan lagi. Parkir hanya boleh di sel
+# yang tidak dilewati rute kurir lain di masa depan; jika sel sekarang masih
+# akan dilewati, kurir lebih dulu menyingkir ke sel aman terdekat.
+#
+# Rencana yang gagal tidak melepas reservasi lama: kurir yang parkir, menyingkir,
+# atau menunggu tetap memegang selnya, jadi kurir lain tidak pernah menabraknya.
+# Kurir yang terkurung meminta paling banyak MAX_CLAIMED kurir yang akan melewati
+# selnya untuk merencanakan ulang setelah kurir ini keluar. Slot yang bentrok
+# memunculkan ValueError, bukan assert yang hilang pada python -O.
+
+# Lama kurir memegang sel tujuan: waktu berbalik 180 derajat sebelum bergerak lagi
+DWELL_TICKS = turn_ticks(180)
+# Bobot heuristik (weighted A*): jalur paling lama HEURISTIC_WEIGHT kali optimal,
+# tetapi state menunggu/memutar yang dijelajahi jauh lebih sedikit. Rute yang lebih
+# panjang menghabiskan slot kurir lain, jadi armada padat lebih lancar dengan 1.0
+HEURISTIC_WEIGHT = 1.0
+# Batas ekspansi A* ruang-waktu; lebih dari ini dianggap tidak ada rute
+MAX_EXPANSIONS = 5000
+# Jarak BFS heuristik dihitung sampai sejauh ini melewati jarak titik awal
+BFS_SLACK = 10
+# Biaya tambahan (dalam tick, hanya untuk prioritas A*) melewati sel kurir parkir
+# yang bisa diminta menyingkir: rute tetap memutar jika jalan lain tidak jauh lebih lama
+YIELD_COST = 8
+# Jika tidak ada sel yang bebas seterusnya, kurir boleh menunggu di sel yang bebas
+# selama PARK_WINDOW tick lalu dicarikan tempat parkir lagi
+PARK_WINDOW = 10
+# Paling banyak sekian kurir yang dialihkan agar kurir terkurung bisa keluar
+MAX_CLAIMED = 3
+# Armada padat (jumlah kurir minimal sebagian ini dari sel jalan): rute berikutnya
+# dari tujuan sering gagal, jadi sel tujuan dipegang sebagai tempat parkir. Di peta
+# longgar kurir hampir selalu langsung pergi dan sel itu lebih berguna untuk lewat
+GOAL_PARK_DENSITY = 0.1
+
+class ReservationTable:
+    def __init__(self):
+        self.cells = {}     # sel -> {tick: kunci kurir}
+        self.parked = {}    # sel -> (tick mulai, kunci kurir)
+        self.owned = {}     # kunci kurir -> ([(sel, tick)], sel parkir atau None)
+        # Tick reservasi terbesar yang pernah dicatat: setelah tick ini hanya kurir parkir yang tersisa
+        self.horizon = 0
+
+    # Sel terisi kurir lain pada tick tersebut. yielding = sel kurir parkir yang
+    # akan diminta menyingkir (dianggap kosong)
+    def occupied(self, cell, tick, yielding=()):
+        parked = self.parked.get(cell)
+        if parked is not None and tick >= parked[0] and cell not in yielding:
+            return True
+        ticks = self.cells.get(cell)
+        return ticks is not None and tick in ticks
+
+    # Pemilik reservasi sel pada tick (None jika kosong), untuk cek tukar posisi
+    def owner(self, cell, tick):
+        ticks = self.cells.get(cell)
+        if ticks is None:
+            return None
+        return ticks.get(tick)
+
+    # Sel bebas dari tick ini seterusnya (boleh dipakai parkir)
+    def free_after(self, cell, tick):
+        if cell in self.parked:
+            return False
+        ticks = self.cells.get(cell)
+        return not ticks or max(ticks) < tick
+
+    # Kurir lain yang masih akan melewati atau parkir di sel setelah tick ini
+    def users_after(self, cell, tick):
+        ticks = self.cells.get(cell, {})
+        keys = {key for reserved_tick, key in ticks.items() if reserved_tick > tick}
+        parked = self.parked.get(cell)
+        if parked is not None:
+            keys.add(parked[1])
+        return keys
+
+    # timeline = [(sel, tick)] yang ditempati kurir. park=True: kurir parkir di
+    # sel terakhir sejak tick terakhir sampai direncanakan lagi
+    def reserve(self, key, timeline, park=False):
+        cells = self.cells
+        for cell, tick in timeline:
+            ticks = cells.get(cell)
+            if ticks is None:
+                cells[cell] = ticks = {}
+            # Satu slot (sel, tick) hanya untuk satu kurir: slot ganda = tabrakan
+            owner = ticks.get(tick)
+            parked = self.parked.get(cell)
+            if owner is not None and owner != key or \
+                    parked is not None and parked[1] != key and tick >= parked[0]:
+                raise ValueError(f"Slot {(cell, tick)} sudah dipakai kurir lain")
+            ticks[tick] = key
+        last_cell, last_tick = timeline[-1]
+        if last_tick > self.horizon:
+            self.horizon = last_tick
+        park_cell = None
+        if park:
+            park_cell = last_cell
+            parked = self.parked.get(park_cell)
+            if parked is not None and parked[1] != key or \
+                    any(tick > last_tick and owner != key for tick, owner in cells[park_cell].items()):
+                raise ValueError(f"Sel {park_cell} masih akan dipakai kurir lain setelah tick {last_tick}")
+            self.parked[park_cell] = (last_tick, key)
+        self.owned[key] = (timeline, park_cell)
+
+    def park(self, key, cell, tick):
+        self.reserve(key, [(cell, tick)], park=True)
+
+    # Hapus semua reservasi kurir (sebelum merencanakan rute barunya)
+    def release(self, key):
+        owned = self.owned.pop(key, None)
+        if owned is None:
+            return
+        timeline, park_cell = owned
+        cells = self.cells
+        for cell, tick in timeline:
+            ticks = cells.get(cell)
+            if ticks is not None and ticks.get(tick) == key:
+                del ticks[tick]
+                if not ticks:
+                    del cells[cell]
+        if park_cell is not None and self.parked.get(park_cell, (None, None))[1] == key:
+            del self.parked[park_cell]
+
+# BFS dari sel tujuan; sel kurir yang sudah parkir pada tick (selain yielding) tidak dilewati. Berhenti BFS_SLACK
+# langkah setelah sel awal terjangkau: sel yang belum terjangkau pasti lebih jauh
+# dari jarak terakhir. Mengembalikan (jarak per sel atau -1, jarak terakhir)
+def _distances_to(goal_cell, start_cell, neighbors, table, tick, yielding=()):
+    distances = [-1] * len(neighbors)
+    walls = {cell for cell, (since, _) in table.parked.items() if since <= tick and cell not in yielding}
+    distances[goal_cell] = 0
+    frontier = [goal_cell]
+    distance = 0
+    limit = -1
+    while frontier and distance != limit:
+        distance += 1
+        next_frontier = []
+        append = next_frontier.append
+        for cell in frontier:
+            for neighbor in neighbors[cell]:
+                if distances[neighbor] < 0 and neighbor not in walls:
+                    distances[neighbor] = distance
+                    append(neighbor)
+        frontier = next_frontier
+        if limit < 0 and distances[start_cell] >= 0:
+            limit = distance + BFS_SLACK
+    return distances, distance
+
+def _turn_costs(rotation_speed):
+    return [[turn_ticks(min(abs(a - b), 4 - abs(a - b)) * 90, rotation_speed) for b in range(4)]
+            for a in range(4)]
+
+# A* ruang-waktu dengan state (tick, sel, arah hadap): aksi bergerak (berbelok
+# dulu jika perlu) atau menunggu satu tick di tempat. Kurir parkir dianggap
+# dinding, kecuali sel di yielding yang boleh dilewati dengan biaya YIELD_COST.
+# heuristic(x, y, arah) -> perkiraan tick tersisa, is_goal(sel, tick).
+# Setelah table.horizon semua reservasi tinggal kurir parkir yang tidak berubah
+# lagi, jadi tick pada state dipotong ke horizon + 1: pencarian berubah menjadi
+# pencarian ruang biasa dan tetap berhenti jika tujuan memang tidak terjangkau.
+def _search(start, grid, table, start_tick, heading, heuristic, is_goal, max_expansions, turn_cost, neighbors,
+            yielding=frozenset()):
+    grid_width = len(grid[0])
+    # Tabel reservasi dibaca langsung (bukan lewat occupied/owner): ini loop terpanas
+    reserved = table.cells
+    parked = table.parked
+    walls = parked.keys() - yielding if yielding else parked
+    # Selisih indeks sel tetangga -> arah hadap (urutan FLEET_DIRECTIONS)
+    offset_direction = {-grid_width: 0, -1: 1, grid_width: 2, 1: 3}
+    static_tick = max(table.horizon, start_tick) + 1
+
+    def occupied(cell, tick):
+        parked_since = parked.get(cell)
+        if parked_since is not None and tick >= parked_since[0] and cell in walls:
+            return True
+        ticks = reserved.get(cell)
+        return ticks is not None and tick in ticks
+
+    # State = (tick dipotong ke static_tick, sel, arah); g_score = tick sebenarnya,
+    # penalties = total YIELD_COST sepanjang jalur (hanya menggeser prioritas)
+    h0 = FLEET_DIRECTIONS.index(heading)
+    start_state = (min(start_tick, static_tick), start[1] * grid_width + start[0], h0)
+    start_h = heuristic(start[0], start[1], h0)
+    open_heap = [(start_h, start_h, 0, start_state)]
+    counter = 1
+    g_score = {start_state: start_tick}
+    penalties = {start_state: 0}
+    came_from = {}
+    closed_set = set()
+
+    while open_heap:
+        _, _, _, current = heapq.heappop(open_heap)
+        if current in closed_set:
+            continue
+        tick = g_score[current]
+        _, cell, h = current
+        if is_goal(cell, tick):
+            return _reconstruct(came_from, g_score, current, grid_width)
+
+        closed_set.add(current)
+        if len(closed_set) > max_expansions:
+            break
+        y, x = divmod(cell, grid_width)
+        cell_ticks = reserved.get(cell)
+        penalty = penalties[current]
+
+        # Tunggu satu tick di tempat; tidak berguna lagi setelah semua reservasi lewat
+        if tick < static_tick and not occupied(cell, tick + 1):
+            neighbor = (tick + 1, cell, h)
+            if neighbor not in g_score:
+                g_score[neighbor] = tick + 1
+                penalties[neighbor] = penalty
+                came_from[neighbor] = current
+                state_h = heuristic(x, y, h)
+                heapq.heappush(open_heap, (tick + 1 + penalty - start_tick + state_h, state_h, counter, neighbor))
+                counter += 1
+
+        costs = turn_cost[h]
+        for next_cell in neighbors[cell]:
+            direction = offset_direction[next_cell - cell]
+            # Selama berbelok kurir tetap di sel ini, lalu masuk ke sel tetangga
+            arrive = tick + costs[direction] + 1
+            # Kurir yang baru akan parkir di sel itu: sel masih boleh dilewati sebelumnya
+            parked_since = parked.get(next_cell)
+            if parked_since is not None and arrive >= parked_since[0] and next_cell in walls:
+                continue
+            next_ticks = reserved.get(next_cell)
+            if next_ticks is not None:
+                if arrive in next_ticks:
+                    continue
+                # Tukar posisi: kurir di sel tetangga pindah ke sel ini pada tick yang sama
+                other = next_ticks.get(arrive - 1)
+                if other is not None and cell_ticks is not None and cell_ticks.get(arrive) == other:
+                    continue
+            if cell_ticks is not None and arrive - tick > 1:
+                blocked = False
+                for turn_tick in range(tick + 1, arrive):
+                    if turn_tick in cell_ticks:
+                        blocked = True
+                        break
+                if blocked:
+                    continue
+            neighbor = (min(arrive, static_tick), next_cell, direction)
+            if neighbor in closed_set:
+                continue
+            next_penalty = penalty + YIELD_COST if next_cell in yielding else penalty
+            if neighbor not in g_score or arrive + next_penalty < g_score[neighbor] + penalties[neighbor]:
+                g_score[neighbor] = arrive
+                penalties[neighbor] = next_penalty
+                came_from[neighbor] = current
+                ny, nx = divmod(next_cell, grid_width)
+                state_h = heuristic(nx, ny, direction)
+                heapq.heappush(open_heap, (arrive + next_penalty - start_tick + state_h, state_h, counter, neighbor))
+                counter += 1
+    return [], []
+
+def _reconstruct(came_from, g_score, current, grid_width):
+    states = [current]
+    while current in came_from:
+        current = came_from[current]
+        states.append(current)
+    states.reverse()
+
+    path = []
+    previous_tick = g_score[states[0]]
+    previous_cell = states[0][1]
+    timeline = [(previous_cell, previous_tick)]
+    for state in states[1:]:
+        tick = g_score[state]
+        cell = state[1]
+        # Tick berbelok: kurir masih di sel sebelumnya
+        for turn_tick in range(previous_tick + 1, tick):
+            timeline.append((previous_cell, turn_tick))
+        timeline.append((cell, tick))
+        y, x = divmod(cell, grid_width)
+        path.append((x, y))
+        previous_tick, previous_cell = tick, cell
+    return path, timeline
+
+# Jalur ruang-waktu dari start (pada start_tick) ke goal yang menghindari reservasi.
+# yielding = sel kurir parkir yang boleh dilewati (pemanggil wajib memindahkannya)
+# di table; sel tujuan harus bebas selama DWELL_TICKS setelah tiba.
+# Mengembalikan (jalur, timeline): jalur seperti a_star tetapi sel yang sama
+# berulang berarti menunggu satu tick; timeline = [(indeks sel, tick)] untuk reserve
+# (dari posisi awal pada start_tick, termasuk tick berbelok dan DWELL_TICKS di tujuan).
+def a_star_reserved(start, goal, grid, table, start_tick, heading="RIGHT", rotation_speed=75,
+                    neighbors=None, weight=HEURISTIC_WEIGHT, max_expansions=MAX_EXPANSIONS,
+                    yielding=frozenset()):
+    if neighbors is None:
+        neighbors = road_neighbors(grid)
+    grid_width = len(grid[0])
+    goal_x, goal_y = goal
+    start_cell = start[1] * grid_width + start[0]
+    goal_cell = goal_y * grid_width + goal_x
+    if grid[goal_y][goal_x] == 1 or goal_cell in table.parked and goal_cell not in yielding \
+            or disconnected(grid, start, goal):
+        return [], []
+
+    # Jarak jalan ke tujuan lewat BFS mundur dengan kurir parkir sebagai dinding.
+    # Tidak terjangkau = gagal langsung tanpa menjelajahi ruang-waktu
+    distances, reached = _distances_to(goal_cell, start_cell, neighbors, table, start_tick, yielding)
+    if distances[start_cell] < 0:
+        return [], []
+
+    turn_cost = _turn_costs(rotation_speed)
+    min_turn = turn_cost[0][1]
+
+    # Heuristik: jarak jalan + belok minimum seperti a_star_turns
+    def heuristic(x, y, h):
+        dx = goal_x - x
+        dy = goal_y - y
+        turns = 0
+        if dx:
+            turns += 1
+            if h == (3 if dx > 0 else 1):
+                turns -= 1
+        if dy:
+            turns += 1
+            if h == (2 if dy > 0 else 0):
+                turns -= 1
+        distance = distances[y * grid_width + x]
+        if distance < 0:
+            distance = max(reached + 1, abs(dx) + abs(dy))
+        return (distance + turns * min_turn) * weight
+
+    occupied = table.occupied
+
+    def is_goal(cell, tick):
+        if cell != goal_cell:
+            return False
+        for dwell_tick in range(tick + 1, tick + DWELL_TICKS + 1):
+            if occupied(cell, dwell_tick, yielding):
+                return False
+        return True
+
+    path, timeline = _search(start, grid, table, start_tick, heading, heuristic, is_goal,
+                             max_expansions, turn_cost, neighbors, yielding)
+    if path:
+        last_tick = timeline[-1][1]
+        timeline.extend((goal_cell, tick) for tick in range(last_tick + 1, last_tick + DWELL_TICKS + 1))
+    return path, timeline
+
+# Jalur ke sel terdekat (dalam tick) yang tidak akan dilewati rute lain, untuk
+# parkir, atau yang bebas selama window tick setelah tiba. Jalur kosong dengan
+# timeline [(sel awal, start_tick)] = cukup menunggu di tempat
+def park_path(start, grid, table, start_tick, heading="RIGHT", rotation_speed=75,
+              neighbors=None, max_expansions=MAX_EXPANSIONS, window=PARK_WINDOW):
+    if neighbors is None:
+        neighbors = road_neighbors(grid)
+    occupied = table.occupied
+    free_after = table.free_after
+
+    def is_goal(cell, tick):
+        if free_after(cell, tick):
+            return True
+        for wait_tick in range(tick + 1, tick + window + 1):
+            if occupied(cell, wait_tick):
+                return False
+        return True
+
+    return _search(start, grid, table, start_tick, heading, lambda x, y, h: 0, is_goal,
+                   max_expansions, _turn_costs(rotation_speed), neighbors)
+
+# Armada yang merencanakan rute lewat tabel reservasi bersama
+class CooperativeFleet(Fleet):
+    def __init__(self, grid, rotation_speed=75, max_expansions=MAX_EXPANSIONS):
+        super().__init__(grid, rotation_speed)
+        self.reservations = ReservationTable()
+        self.neighbors = road_neighbors(grid)
+        self.road_cell_count = sum(1 for cell in self.neighbors if cell is not None)
+        self.max_expansions = max_expansions
+        self.tick = 0       # Jumlah Fleet.step yang sudah dijalankan
+        self.plans = 0      # Jumlah perencanaan rute dan total waktunya (detik)
+        self.plan_time = 0.0
+        self.parking = []   # Kurir tanpa rute yang diparkir di awal langkah berikutnya
+        self.failed = []    # (indeks, EVENT_NO_ROUTE) dari rute yang dialihkan, dilaporkan di step
+        self.escaping = set()   # Kurir yang sedang menyingkir ke sel parkir
+        self.idle_until = {}    # Kurir yang menunggu PARK_WINDOW: indeks -> tick parkir ulang
+        # Di dalam Fleet.step kurir yang diminta menyingkir baru mulai bergerak
+        # setelah step selesai: kurir lain belum tentu sudah bergerak tick ini
+        self.stepping = False
+        self.deferred = []
+
+    # Posisi awal kurir harus berbeda-beda; kurir langsung parkir di selnya
+    # (atau menyingkir jika sel itu masih akan dilewati rute lain)
+    def add_courier(self, x, y):
+        if self.reservations.occupied(y * len(self.grid[0]) + x, self.tick):
+            raise ValueError(f"Sel {(x, y)} sudah ditempati kurir lain")
+        index = super().add_courier(x, y)
+        self.park(index)
+        return index
+
+    # Kurir yang sudah di lokasi pickup/deliver pada langkah berikutnya, jadi
+    # selnya tetap dipegang sampai tick itu (kurir lain yang akan lewat dialihkan)
+    def assign_job(self, index, source, dest):
+        target = dest if self.has_package[index] else source
+        if (self.x[index], self.y[index]) == target:
+            reservations = self.reservations
+            cell = self.y[index] * len(self.grid[0]) + self.x[index]
+            other = reservations.owner(cell, self.tick + 1)
+            if other == index:
+                other = None
+            if other is not None:
+                reservations.release(other)
+            reservations.release(index)
+            reservations.reserve(index, [(cell, self.tick), (cell, self.tick + 1)])
+            self.escaping.discard(index)
+            self.idle_until.pop(index, None)
+            if other is not None:
+                self.reroute(other)
+        # Kurir yang sedang menyingkir dan tidak mendapat rute tetap menyingkir
+        escape = None
+        if index in self.escaping:
+            escape = (self.paths[index], self.path_index[index], self.moving[index])
+        if super().assign_job(index, source, dest):
+            return True
+        if escape is not None and index in self.escaping:
+            self.source_x[index] = self.source_y[index] = -1
+            self.dest_x[index] = self.dest_y[index] = -1
+            self.paths[index], self.path_index[index], self.moving[index] = escape
+        return False
+
+    def plan_route(self, index, start, goal):
+        start_time = time.perf_counter()
+        reservations = self.reservations
+        owned = reservations.owned.get(index)
+        reservations.release(index)
+        yielding = self._yielding_cells()
+        heading = FLEET_DIRECTIONS[self.direction[index]]
+        path, timeline = a_star_reserved(start, goal, self.grid, reservations, self.tick, heading,
+                                         self.rotation_speed, self.neighbors,
+                                         max_expansions=self.max_expansions, yielding=yielding)
+        if path and not self._make_way(index, timeline, yielding):
+            path, timeline = a_star_reserved(start, goal, self.grid, reservations, self.tick, heading,
+                                             self.rotation_speed, self.neighbors,
+                                             max_expansions=self.max_expansions)
+            if path:
+                self._reserve_route(index, timeline)
+        if not path and not self.stepping:
+            path = self._claim(index, start, goal)
+        if path:
+            # Putaran yang belum selesai (misal saat menyingkir) dibatalkan agar
+            # waktu tempuh rute baru sama dengan perhitungan pencarian
+            self._cancel_rotation(index)
+            self.escaping.discard(index)
+            self.idle_until.pop(index, None)
+        elif owned is not None and (owned[1] is not None or owned[0][-1][1] > self.tick):
+            # Reservasi lama (parkir, menyingkir, atau menunggu) masih konsisten dengan
+            # tabel, jadi dipasang lagi: kurir tidak kehilangan selnya karena rute gagal
+            timeline, park_cell = owned
+            reservations.reserve(index, timeline, park=park_cell is not None)
+            if park_cell is None and index not in self.escaping and index not in self.idle_until:
+                self.parking.append(index)
+        else:
+            self.escaping.discard(index)
+            self.idle_until.pop(index, None)
+            # Tahan sel sampai kurir diparkir di awal langkah berikutnya (Fleet masih
+            # akan menghentikan kurir ini setelah plan_route kembali). Sel yang bebas
+            # seterusnya langsung dipakai parkir; selain itu sel ditahan selama masih
+            # kosong agar rute lain yang direncanakan tick ini tidak mengepung kurir
+            cell = start[1] * len(self.grid[0]) + start[0]
+            if reservations.free_after(cell, self.tick):
+                reservations.park(index, cell, self.tick)
+            else:
+                hold = [(cell, self.tick)]
+                for tick in range(self.tick + 1, self.tick + PARK_WINDOW + 1):
+                    if reservations.occupied(cell, tick):
+                        break
+                    hold.append((cell, tick))
+                reservations.reserve(index, hold)
+            self.parking.append(index)
+        self.plans += 1
+        self.plan_time += time.perf_counter() - start_time
+        return path
+
+    def _cancel_rotation(self, index):
+        if self.is_rotating[index]:
+            self.is_rotating[index] = 0
+            self.rotation_angle[index] = self.direction[index] * 90
+
+    # Rute kurir index gagal karena sel awalnya akan dilewati kurir lain yang sedang
+    # mengantar (kurir terkurung). Rute kurir-kurir itu dilepas, kurir index
+    # direncanakan lebih dulu, lalu kurir-kurir itu direncanakan ulang dari posisinya.
+    # Jika ada yang gagal semua reservasi lama dikembalikan. Mengembalikan jalur kurir index
+    def _claim(self, index, start, goal):
+        reservations = self.reservations
+        grid_width = len(self.grid[0])
+        tick = self.tick
+        others = reservations.users_after(start[1] * grid_width + start[0], tick)
+        others.discard(index)
+        if not others or len(others) > MAX_CLAIMED:
+            return []
+        for other in others:
+            if not self.moving[other] or self.source_x[other] < 0 or other in self.escaping \
+                    or other not in reservations.owned:
+                return []
+        saved = {other: reservations.owned[other] for other in others}
+        # Selama kurir index direncanakan, kurir lain tetap memegang langkah berikutnya
+        for other in others:
+            reservations.release(other)
+            reservations.reserve(other, [slot for slot in saved[other][0] if tick <= slot[1] <= tick + 1])
+        planned = [index]
+        routes = []
+        path, timeline = a_star_reserved(start, goal, self.grid, reservations, tick,
+                                         FLEET_DIRECTIONS[self.direction[index]], self.rotation_speed,
+                                         self.neighbors, max_expansions=self.max_expansions)
+        if path:
+            self._reserve_route(index, timeline)
+            for other in others:
+                reservations.release(other)
+                target = (self.dest_x[other], self.dest_y[other]) if self.has_package[other] else \
+                    (self.source_x[other], self.source_y[other])
+                other_path, other_timeline = a_star_reserved(
+                    (self.x[other], self.y[other]), target, self.grid, reservations, tick,
+                    FLEET_DIRECTIONS[self.direction[other]], self.rotation_speed, self.neighbors,
+                    max_expansions=self.max_expansions)
+                planned.append(other)
+                if not other_path:
+                    path = []
+                    break
+                self._reserve_route(other, other_timeline)
+                routes.append((other, other_path))
+        if not path:
+            for key in planned:
+                reservations.release(key)
+            for other in others:
+                reservations.release(other)
+                timeline, park_cell = saved[other]
+                reservations.reserve(other, timeline, park=park_cell is not None)
+            return []
+        for other, other_path in routes:
+            self._cancel_rotation(other)
+            self.set_path(other, other_path)
+        return path
+
+    # Sel kurir yang parkir diam (tidak sedang menyingkir) sejak tick ini
+    def _yielding_cells(self):
+        tick = self.tick
+        moving = self.moving
+        return frozenset(cell for cell, (since, key) in self.reservations.parked.items()
+                         if since <= tick and not moving[key])
+
+    # Reservasi timeline kurir index setelah kurir parkir di sel yielding yang
+    # dilewatinya menyingkir. Setiap kurir parkir memegang selnya sampai rute
+    # tiba di sel itu, lalu dicarikan jalur menyingkir satu per satu. Jika ada
+    # yang tidak bisa menyingkir semua dikembalikan dan hasilnya False
+    def _make_way(self, index, timeline, yielding):
+        reservations = self.reservations
+        arrivals = {}
+        for cell, tick in timeline:
+            if cell in yielding and cell not in arrivals:
+                arrivals[cell] = tick
+        movers = []
+        for cell, arrival in arrivals.items():
+            key = reservations.parked[cell][1]
+            reservations.release(key)
+            reservations.reserve(key, [(cell, tick) for tick in range(self.tick, arrival)])
+            movers.append(key)
+        self._reserve_route(index, timeline)
+
+        escapes = []
+        for key in movers:
+            reservations.release(key)
+            path, escape = park_path((self.x[key], self.y[key]), self.grid, reservations, self.tick,
+                                     FLEET_DIRECTIONS[self.direction[key]], self.rotation_speed,
+                                     self.neighbors, self.max_expansions)
+            if not escape:
+                reservations.release(index)
+                for other in movers:
+                    reservations.release(other)
+                    self.idle_until.pop(other, None)
+                for other in movers:
+                    reservations.park(other, self.y[other] * len(self.grid[0]) + self.x[other], self.tick)
+                return False
+            self._reserve_parking(key, escape)
+            escapes.append((key, path))
+
+        for key, path in escapes:
+            self._start_escape(key, path)
+        return True
+
+    # Reservasi rute sampai tujuan. Di armada padat, jika sel tujuan tidak akan
+    # dilewati rute lain, kurir langsung parkir di sana: rute yang direncanakan
+    # kemudian tidak boleh melewati sel itu setelah kurir tiba, karena kurir
+    # belum tentu segera pergi
+    def _reserve_route(self, index, timeline):
+        reservations = self.reservations
+        park = len(self) >= GOAL_PARK_DENSITY * self.road_cell_count and reservations.free_after(*timeline[-1])
+        reservations.reserve(index, timeline, park=park)
+
+    # Reservasi hasil park_path: sel akhir yang bebas seterusnya dipakai parkir,
+    # selain itu kurir menunggu PARK_WINDOW tick di sana lalu diparkir ulang
+    def _reserve_parking(self, index, timeline):
+        reservations = self.reservations
+        cell, tick = timeline[-1]
+        if reservations.free_after(cell, tick):
+            reservations.reserve(index, timeline, park=True)
+            return
+        timeline.extend((cell, wait_tick) for wait_tick in range(tick + 1, tick + PARK_WINDOW + 1))
+        reservations.reserve(index, timeline)
+        self.idle_until[index] = tick + PARK_WINDOW
+
+    # Kurir (tanpa paket) mulai berjalan ke sel parkirnya. Di dalam Fleet.step
+    # kurir baru bergerak setelah step selesai
+    def _start_escape(self, index, path):
+        self.source_x[index] = self.source_y[index] = -1
+        self.dest_x[index] = self.dest_y[index] = -1
+        if not path:
+            return
+        if self.is_rotating[index]:
+            self.is_rotating[index] = 0
+            self.rotation_angle[index] = self.direction[index] * 90
+        self.set_path(index, path)
+        if self.stepping:
+            self.deferred.append(index)
+        else:
+            self.moving[index] = 1
+        self.escaping.add(index)
+
+    # Parkirkan kurir yang tidak sedang bergerak. Jika selnya masih akan dilewati
+    # rute lain, kurir menyingkir dulu ke sel aman terdekat (tanpa paket). Jika
+    # itu pun tidak bisa, kurir tetap di tempat dan kurir yang akan lewat dialihkan.
+    def park(self, index):
+        self._settle([(index, True)])
+
+    # Rencanakan ulang rute kurir yang sedang berjalan dari posisinya sekarang.
+    # Gagal = kurir berhenti, parkir, dan melaporkan EVENT_NO_ROUTE di langkah berikutnya
+    def reroute(self, index):
+        self._settle([(index, False)])
+
+    # Antrean kurir yang harus ditempatkan ulang, diproses iteratif: parkir di
+    # tempat bisa menggeser kurir lain yang lalu masuk antrean (bukan rekursi).
+    # Setiap kurir yang sedang mengantar direncanakan ulang paling banyak sekali;
+    # tergeser lagi atau gagal = parkir dan EVENT_NO_ROUTE.
+    def _settle(self, pending):
+        replanned = set()
+        while pending:
+            index, parking = pending.pop()
+            if not parking and self.moving[index] and self.source_x[index] >= 0:
+                if index not in replanned:
+                    replanned.add(index)
+                    target = (self.dest_x[index], self.dest_y[index]) if self.has_package[index] else \
+                        (self.source_x[index], self.source_y[index])
+                    path = self.plan_route(index, (self.x[index], self.y[index]), target)
+                    self.set_path(index, path)
+                    if path:
+                        continue
+                self.failed.append((index, EVENT_NO_ROUTE))
+            pending.extend((other, False) for other in self._park_one(index))
+
+    # Kurir berhenti lalu parkir di selnya atau menyingkir. Mengembalikan kurir
+    # lain yang harus dialihkan karena kurir ini terpaksa parkir di tempat
+    def _park_one(self, index):
+        # Jalur menyingkir sebelumnya (jika ada) tidak berlaku lagi
+        super().stop(index)
+        self.escaping.discard(index)
+        self.idle_until.pop(index, None)
+        reservations = self.reservations
+        reservations.release(index)
+        x, y = self.x[index], self.y[index]
+        cell = y * len(self.grid[0]) + x
+        if reservations.free_after(cell, self.tick):
+            reservations.park(index, cell, self.tick)
+            return ()
+        path, timeline = park_path((x, y), self.grid, reservations, self.tick,
+                                   FLEET_DIRECTIONS[self.direction[index]], self.rotation_speed,
+                                   self.neighbors, self.max_expansions)
+        if timeline:
+            self._reserve_parking(index, timeline)
+            self._start_escape(index, path)
+            return ()
+        # Kurir yang tergeser melepas rute lamanya sekarang dan hanya memegang
+        # posisinya sampai direncanakan ulang, jadi tabel tetap tanpa slot basi
+        grid_width = len(self.grid[0])
+        others = reservations.users_after(cell, self.tick)
+        others.discard(index)
+        for other in others:
+            reservations.release(other)
+            reservations.reserve(other, [(self.y[other] * grid_width + self.x[other], self.tick)])
+        reservations.park(index, cell, self.tick)
+        return others
+
+    # Rute dibatalkan: kurir parkir di posisinya sekarang
+    def stop(self, index):
+        super().stop(index)
+        self.park(index)
+
+    # Kurir yang tidak mendapat rute atau sudah mengantar dan belum diberi paket
+    # baru diparkir sebelum langkah berikutnya (sel tujuan masih dipegang DWELL_TICKS)
+    def step(self):
+        parking, self.parking = self.parking, []
+        parking.extend(index for index, until in self.idle_until.items() if until <= self.tick)
+        for index in set(parking):
+            if not self.moving[index]:
+                self.park(index)
+        self.tick += 1
+        self.stepping = True
+        events = self.failed + super().step()
+        self.stepping = False
+        self.failed = []
+        for index in self.deferred:
+            self.moving[index] = 1
+        self.deferred = []
+        # Kurir yang sudah tiba di sel parkirnya diam lagi (boleh diminta menyingkir)
+        for index in [i for i in self.escaping if self.path_index[i] >= len(self.paths[i])]:
+            self.moving[index] = 0
+            self.escaping.discard(index)
+        # Rute dari lokasi pickup yang gagal di dalam Fleet.step dicoba lagi setelah
+        # semua kurir bergerak, kali ini kurir lain boleh dialihkan (_claim)
+        for position, (index, event) in enumerate(events):
+            if event == EVENT_NO_ROUTE and self.has_package[index] and not self.moving[index] \
+                    and (self.x[index], self.y[index]) == (self.source_x[index], self.source_y[index]):
+                path = self.plan_route(index, (self.x[index], self.y[index]), (self.dest_x[index], self.dest_y[index]))
+                if path:
+                    self.set_path(index, path)
+                    self.moving[index] = 1
+                    events[position] = (index, EVENT_PICKUP)
+        for index, event in events:
+            if event == EVENT_DELIVERED:
+                self.parking.append(index)
+        return events
+
+# Jumlah kurir yang berbagi sel dengan kurir lain (0 = tidak ada tabrakan)
+def collisions(fleet):
+    positions = list(zip(fleet.x, fleet.y))
+    return len(positions) - len(set(positions))
@@ -0,0 +1,665 @@
+import heapq
+import random
+
+from compact_grid import CompactGrid, MOVE_MASKS, connection_masks, disconnected
+
+# Klasifikasi jalan seluruh grid sekaligus jika numpy tersedia
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Inti simulasi kurir tanpa pygame/tkinter, sehingga bisa dipakai
+# tanpa layar (batch run, CI) maupun oleh Smart_courier_fix.py
+
+# Arah hadap
+DIRECTIONS = {
+    "UP": (0, -1),
+    "RIGHT": (1, 0),
+    "DOWN": (0, 1),
+    "LEFT": (-1, 0)
+}
+
+# Sudut rotation_angle untuk tiap arah hadap
+DIRECTION_ANGLES = {
+    "UP": 0,
+    "LEFT": 90,
+    "DOWN": 180,
+    "RIGHT": 270
+}
+
+# Tipe tile jalan
+ROAD_TYPES = {
+    "STRAIGHT": 0,       # Jalan lurus (vertikal atau horizontal)
+    "TURN": 1,           # Tikungan (rotasi untuk 4 orientasi)
+    "T_JUNCTION": 2,     # Simpang tiga (rotasi untuk 4 orientasi)
+    "INTERSECTION": 3    # Simpang empat
+}
+
+# Orientasi untuk tipe jalan
+ORIENTATIONS = {
+    "VERTICAL": 0,       # 0 derajat
+    "HORIZONTAL": 90,    # 90 derajat
+    "UP": 0,             # T menghadap atas
+    "RIGHT": 90,         # T menghadap kanan
+    "DOWN": 180,         # T menghadap bawah
+    "LEFT": 270,         # T menghadap kiri
+    "TURN_TL": 0,        # Tikungan kiri atas
+    "TURN_TR": 90,       # Tikungan kanan atas
+    "TURN_BR": 180,      # Tikungan kanan bawah
+    "TURN_BL": 270       # Tikungan kiri bawah
+}
+
+# Event hasil satu langkah simulasi kurir
+EVENT_PICKUP = "pickup"
+EVENT_DELIVERED = "delivered"
+EVENT_NO_ROUTE = "no_route"
+
+# Kelas Kurir
+class Courier:
+    def __init__(self, x, y, grid):
+        self.x = x
+        self.y = y
+        self.grid = grid
+        self.direction = "RIGHT"
+        self.target_direction = "RIGHT"
+        self.rotation_angle = 270  # 0=up, 90=left, 180=down, 270=right
+        self.has_package = False
+        self.moving = False
+        self.path = []
+        self.is_rotating = False
+        self.rotation_speed = 75  # Kecepatan rotasi lebih cepat
+        self.on_move = None  # Dipanggil dengan kurir ini setiap x/y berubah (misal indeks spasial)
+
+    def move(self, dx, dy):
+        # Hanya bergerak jika sudah menghadap arah yang benar
+        if not self.is_rotating:
+            new_x = self.x + dx
+            new_y = self.y + dy
+            grid = self.grid
+            if isinstance(grid, CompactGrid):
+                # Langkah satu sel cukup dicek dari mask koneksi sel saat ini
+                mask = MOVE_MASKS.get((dx, dy))
+                if mask is not None:
+                    passable = grid.masks[self.y * grid.width + self.x] & mask
+                else:
+                    passable = grid.passable(new_x, new_y)
+            else:
+                passable = 0 <= new_x < len(grid[0]) and 0 <= new_y < len(grid) and grid[new_y][new_x] != 1
+            if passable:
+                self.x = new_x
+                self.y = new_y
+                if self.on_move is not None:
+                    self.on_move(self)
+
+    def turn(self, new_direction):
+        if self.direction != new_direction:
+            self.target_direction = new_direction
+            self.is_rotating = True
+
+    def update_rotation(self):
+        if not self.is_rotating:
+            return
+            
+        target_angle = DIRECTION_ANGLES.get(self.target_direction, 0)
+
+        # Hitung perbedaan sudut terpendek
+        angle_diff = (target_angle - self.rotation_angle + 180) % 360 - 180
+        
+        if abs(angle_diff) <= self.rotation_speed:
+            self.rotation_angle = target_angle
+            self.direction = self.target_direction
+            self.is_rotating = False
+        else:
+            # Rotasi dengan arah yang paling pendek
+            self.rotation_angle += self.rotation_speed if angle_diff > 0 else -self.rotation_speed
+        
+        # Normalisasi sudut
+        self.rotation_angle %= 360
+
+    def try_pickup(self, source_x, source_y):
+        if self.x == source_x and self.y == source_y and not self.has_package:
+            self.has_package = True
+            return True
+        return False
+
+    def try_deliver(self, dest_x, dest_y):
+        if self.x == dest_x and self.y == dest_y and self.has_package:
+            self.has_package = False
+            return True
+        return False
+
+    def follow_path(self):
+        if self.path and self.moving:
+            # Jika sedang berputar, selesaikan putaran dulu
+            if self.is_rotating:
+                self.update_rotation()
+                return
+                
+            next_pos = self.path[0]
+            dx, dy = next_pos[0] - self.x, next_pos[1] - self.y
+            
+            # Tentukan arah yang diperlukan
+            required_direction = None
+            if dx > 0:
+                required_direction = "RIGHT"
+            elif dx < 0:
+                required_direction = "LEFT"
+            elif dy > 0:
+                required_direction = "DOWN"
+            elif dy < 0:
+                required_direction = "UP"
+            
+            # Jika perlu berubah arah, putar dulu
+            if required_direction and self.direction != required_direction:
+                self.turn(required_direction)
+            else:
+                # Jika sudah menghadap arah yang benar, bergerak
+                self.move(dx, dy)
+                if (self.x, self.y) == next_pos:
+                    self.path.pop(0)
+
+# Isi dict stats dengan statistik satu pencarian (untuk instrumentasi)
+def _record_search(stats, closed_set, open_peak, path):
+    stats["expanded"] = len(closed_set)
+    stats["open_peak"] = open_peak
+    stats["path_length"] = len(path)
+
+# Pathfinding (A* algorithm). Jika stats (dict) diberikan, diisi jumlah node
+# yang diekspansi, ukuran open set terbesar, dan panjang jalur
+def a_star(start, goal, grid, stats=None):
+    if isinstance(grid, CompactGrid):
+        return _a_star_compact(start, goal, grid, stats)
+
+    def heuristic(a, b):
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    grid_width = len(grid[0])
+    grid_height = len(grid)
+
+    # Open set berupa binary heap: (f, h, urutan, posisi)
+    # Seri pada f dipecah dengan h terkecil, lalu urutan masuk agar deterministik
+    start_h = heuristic(start, goal)
+    open_heap = [(start_h, start_h, 0, start)]
+    counter = 1
+    came_from = {}
+    g_score = {start: 0}
+    closed_set = set()
+    open_peak = 0
+
+    while open_heap:
+        if stats is not None and len(open_heap) > open_peak:
+            open_peak = len(open_heap)
+        _, _, _, current = heapq.heappop(open_heap)
+        # Lazy deletion: lewati entri lama yang sudah pernah diekspansi
+        if current in closed_set:
+            continue
+        if current == goal:
+            path = []
+            while current in came_from:
+                path.append(current)
+                current = came_from[current]
+            path.reverse()
+            if stats is not None:
+                _record_search(stats, closed_set, open_peak, path)
+            return path
+
+        closed_set.add(current)
+        current_g = g_score[current]
+        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+            neighbor = (current[0] + dx, current[1] + dy)
+            if neighbor in closed_set:
+                continue
+            if 0 <= neighbor[0] < grid_width and 0 <= neighbor[1] < grid_height and grid[neighbor[1]][neighbor[0]] != 1:
+                tentative_g_score = current_g + 1
+                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    h = heuristic(neighbor, goal)
+                    heapq.heappush(open_heap, (tentative_g_score + h, h, counter, neighbor))
+                    counter += 1
+    if stats is not None:
+        _record_search(stats, closed_set, open_peak, [])
+    return []
+
+# Versi CompactGrid: state berupa indeks datar, tetangga diambil dari mask koneksi
+# sehingga tidak ada cek batas. Urutan tetangga dan tie-breaking sama dengan a_star.
+def _a_star_compact(start, goal, grid, stats=None):
+    width = grid.width
+    masks = grid.masks
+    neighbor_offsets = grid.neighbor_offsets
+    goal_x, goal_y = goal
+    start_index = start[1] * width + start[0]
+    goal_index = goal_y * width + goal_x
+    # Beda komponen jalan: tidak ada jalur, langsung gagal tanpa ekspansi
+    if not grid.reachable(start_index, goal_index):
+        if stats is not None:
+            _record_search(stats, (), 0, [])
+        return []
+
+    start_h = abs(start[0] - goal_x) + abs(start[1] - goal_y)
+    open_heap = [(start_h, start_h, 0, start_index)]
+    counter = 1
+    came_from = {}
+    g_score = {start_index: 0}
+    closed_set = set()
+    open_peak = 0
+
+    while open_heap:
+        if stats is not None and len(open_heap) > open_peak:
+            open_peak = len(open_heap)
+        _, _, _, current = heapq.heappop(open_heap)
+        if current in closed_set:
+            continue
+        if current == goal_index:
+            path = []
+            while current in came_from:
+                y, x = divmod(current, width)
+                path.append((x, y))
+                current = came_from[current]
+            path.reverse()
+            if stats is not None:
+                _record_search(stats, closed_set, open_peak, path)
+            return path
+
+        closed_set.add(current)
+        tentative_g_score = g_score[current] + 1
+        for offset in neighbor_offsets[masks[current]]:
+            neighbor = current + offset
+            if neighbor in closed_set:
+                continue
+            if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                y, x = divmod(neighbor, width)
+                h = abs(x - goal_x) + abs(y - goal_y)
+                heapq.heappush(open_heap, (tentative_g_score + h, h, counter, neighbor))
+                counter += 1
+    if stats is not None:
+        _record_search(stats, closed_set, open_peak, [])
+    return []
+
+# Jumlah tick untuk berbelok sejauh angle derajat, sesuai Courier.follow_path:
+# satu tick memanggil turn(), lalu update_rotation sampai sudut tercapai
+def turn_ticks(angle, rotation_speed=75):
+    if angle == 0:
+        return 0
+    return 1 + -(-angle // rotation_speed)
+
+# Jumlah tick untuk menempuh jalur dari start dengan arah hadap awal heading
+def path_ticks(start, path, heading="RIGHT", rotation_speed=75):
+    ticks = 0
+    x, y = start
+    for next_x, next_y in path:
+        dx, dy = next_x - x, next_y - y
+        if dx > 0:
+            direction = "RIGHT"
+        elif dx < 0:
+            direction = "LEFT"
+        elif dy > 0:
+            direction = "DOWN"
+        else:
+            direction = "UP"
+        if direction != heading:
+            angle = abs(DIRECTION_ANGLES[direction] - DIRECTION_ANGLES[heading])
+            ticks += turn_ticks(min(angle, 360 - angle), rotation_speed)
+            heading = direction
+        ticks += 1
+        x, y = next_x, next_y
+    return ticks
+
+# Urutan arah pada state pencarian; indeks * 90 = rotation_angle
+TURN_DIRECTIONS = ("UP", "LEFT", "DOWN", "RIGHT")
+
+# A* dengan state (x, y, arah hadap): biaya langkah = 1 tick bergerak ditambah
+# tick berbelok dari rotation_speed, sehingga hasilnya jalur dengan tick paling
+# sedikit, bukan sel paling sedikit. heading=None berarti arah awal bebas.
+def a_star_turns(start, goal, grid, heading=None, rotation_speed=75):
+    if disconnected(grid, start, goal):
+        return []
+    grid_width = len(grid[0])
+    grid_height = len(grid)
+    goal_x, goal_y = goal
+
+    # Biaya belok antar arah [dari][ke]
+    turn_cost = [[turn_ticks(min(abs(a - b), 4 - abs(a - b)) * 90, rotation_speed) for b in range(4)]
+                 for a in range(4)]
+    min_turn = turn_cost[0][1]
+    moves = [(0, -1), (-1, 0), (0, 1), (1, 0)]
+
+    # Heuristik: jarak Manhattan + belok minimum yang pasti masih dibutuhkan
+    def heuristic(x, y, h):
+        dx = goal_x - x
+        dy = goal_y - y
+        turns = 0
+        if dx:
+            turns += 1
+            if h == (3 if dx > 0 else 1):
+                turns -= 1
+        if dy:
+            turns += 1
+            if h == (2 if dy > 0 else 0):
+                turns -= 1
+        return abs(dx) + abs(dy) + turns * min_turn
+
+    # State = indeks sel * 4 + arah
+    open_heap = []
+    counter = 0
+    g_score = {}
+    starts = range(4) if heading is None else (TURN_DIRECTIONS.index(heading),)
+    for h in starts:
+        state = (start[1] * grid_width + start[0]) * 4 + h
+        g_score[state] = 0
+        start_h = heuristic(start[0], start[1], h)
+        heapq.heappush(open_heap, (start_h, start_h, counter, state))
+        counter += 1
+    came_from = {}
+    closed_set = set()
+    goal_cell = goal_y * grid_width + goal_x
+
+    while open_heap:
+        _, _, _, current = heapq.heappop(open_heap)
+        if current in closed_set:
+            continue
+        cell = current >> 2
+        if cell == goal_cell:
+            path = []
+            while current in came_from:
+                cell = current >> 2
+                path.append((cell % grid_width, cell // grid_width))
+                current = came_from[current]
+            path.reverse()
+            return path
+
+        closed_set.add(current)
+        current_g = g_score[current]
+        x = cell % grid_width
+        y = cell // grid_width
+        costs = turn_cost[current & 3]
+        for direction in range(4):
+            dx, dy = moves[direction]
+            nx = x + dx
+            ny = y + dy
+            if 0 <= nx < grid_width and 0 <= ny < grid_height and grid[ny][nx] != 1:
+                neighbor = (ny * grid_width + nx) * 4 + direction
+                if neighbor in closed_set:
+                    continue
+                tentative_g_score = current_g + costs[direction] + 1
+                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    h = heuristic(nx, ny, direction)
+                    heapq.heappush(open_heap, (tentative_g_score + h, h, counter, neighbor))
+                    counter += 1
+    return []
+
+# Fungsi untuk menentukan jenis jalan dan orientasinya berdasarkan koneksi
+def determine_road_type_and_orientation(x, y, grid):
+    # Periksa arah mana yang terhubung dengan jalan
+    if isinstance(grid, CompactGrid):
+        # Mask sudah berisi bit UP=1, RIGHT=2, DOWN=4, LEFT=8
+        mask = grid.masks[y * grid.width + x]
+        connections = [mask & 1, (mask >> 1) & 1, (mask >> 2) & 1, (mask >> 3) & 1]  # UP, RIGHT, DOWN, LEFT
+    else:
+        grid_width = len(grid[0])
+        grid_height = len(grid)
+        connections = [0, 0, 0, 0]  # UP, RIGHT, DOWN, LEFT
+        
+        # Cek atas
+        if y > 0 and grid[y-1][x] != 1:
+            connections[0] = 1
+        
+        # Cek kanan
+        if x < grid_width-1 and grid[y][x+1] != 1:
+            connections[1] = 1
+        
+        # Cek bawah
+        if y < grid_height-1 and grid[y+1][x] != 1:
+            connections[2] = 1
+        
+        # Cek kiri
+        if x > 0 and grid[y][x-1] != 1:
+            connections[3] = 1
+    
+    return _road_type_from_connections(connections)
+
+# Tipe jalan dan orientasi dari koneksi [UP, RIGHT, DOWN, LEFT]
+def _road_type_from_connections(connections):
+    # Tentukan tipe jalan dan orientasi berdasarkan koneksi
+    connection_sum = sum(connections)
+    
+    if connection_sum == 4:
+        return ROAD_TYPES["INTERSECTION"], 0  # Simpang empat, tidak perlu rotasi
+    
+    elif connection_sum == 3:
+        # Simpang tiga (T-junction)
+        if connections[0] == 0:  # T menghadap bawah (tidak terhubung atas)
+            return ROAD_TYPES["T_JUNCTION"], ORIENTATIONS["DOWN"]
+        elif connections[1] == 0:  # T menghadap kiri (tidak terhubung kanan)
+            return ROAD_TYPES["T_JUNCTION"], ORIENTATIONS["LEFT"]
+        elif connections[2] == 0:  # T menghadap atas (tidak terhubung bawah)
+            return ROAD_TYPES["T_JUNCTION"], ORIENTATIONS["UP"]
+        else:  # connections[3] == 0, T menghadap kanan (tidak terhubung kiri)
+            return ROAD_TYPES["T_JUNCTION"], ORIENTATIONS["RIGHT"]
+    
+    elif connection_sum == 2:
+        # Cek apakah jalan lurus
+        if connections[0] == 1 and connections[2] == 1:
+            return ROAD_TYPES["STRAIGHT"], ORIENTATIONS["VERTICAL"]  # Jalan lurus vertikal
+        elif connections[1] == 1 and connections[3] == 1:
+            return ROAD_TYPES["STRAIGHT"], ORIENTATIONS["HORIZONTAL"]  # Jalan lurus horizontal
+        
+        # Tikungan
+        elif connections[0] == 1 and connections[1] == 1:
+            return ROAD_TYPES["TURN"], ORIENTATIONS["TURN_TR"]  # Tikungan kanan atas
+        elif connections[0] == 1 and connections[3] == 1:
+            return ROAD_TYPES["TURN"], ORIENTATIONS["TURN_TL"]  # Tikungan kiri atas
+        elif connections[2] == 1 and connections[1] == 1:
+            return ROAD_TYPES["TURN"], ORIENTATIONS["TURN_BR"]  # Tikungan kanan bawah
+        elif connections[2] == 1 and connections[3] == 1:
+            return ROAD_TYPES["TURN"], ORIENTATIONS["TURN_BL"]  # Tikungan kiri bawah
+    
+    elif connection_sum == 1:
+        # Jalan buntu, gunakan tipe lurus dengan orientasi yang sesuai
+        if connections[0] == 1:
+            return ROAD_TYPES["STRAIGHT"], ORIENTATIONS["VERTICAL"]
+        elif connections[1] == 1:
+            return ROAD_TYPES["STRAIGHT"], ORIENTATIONS["HORIZONTAL"]
+        elif connections[2] == 1:
+            return ROAD_TYPES["STRAIGHT"], ORIENTATIONS["VERTICAL"]
+        else:  # connections[3] == 1
+            return ROAD_TYPES["STRAIGHT"], ORIENTATIONS["HORIZONTAL"]
+    
+    # Default jika tidak ada koneksi (tidak seharusnya terjadi)
+    return ROAD_TYPES["INTERSECTION"], 0
+
+# Tabel 16 entri: mask koneksi (UP=1, RIGHT=2, DOWN=4, LEFT=8) -> (tipe jalan, orientasi)
+ROAD_LOOKUP = tuple(
+    _road_type_from_connections([mask & 1, (mask >> 1) & 1, (mask >> 2) & 1, (mask >> 3) & 1])
+    for mask in range(16)
+)
+
+# Tentukan tipe jalan dan orientasi untuk setiap tile jalan di grid.
+# Hasilnya sama dengan memanggil determine_road_type_and_orientation per sel jalan
+# (non-jalan: tipe 1, orientasi 0), tetapi mask koneksi dihitung sekaligus
+# lalu dipetakan lewat ROAD_LOOKUP.
+def classify_roads(grid):
+    if np is not None:
+        return _classify_roads_array(grid)
+    return _classify_roads_lookup(grid)
+
+# Versi numpy: mask dari array yang digeser, lalu indeks ke tabel
+def _classify_roads_array(grid):
+    if isinstance(grid, CompactGrid):
+        cells = grid.array()
+        masks = np.frombuffer(bytes(grid.masks), dtype=np.uint8).reshape(grid.height, grid.width)
+    else:
+        # Sel grid bernilai 0/1, jadi setiap baris bisa langsung dijadikan bytes
+        cells = np.frombuffer(b"".join(bytes(row) for row in grid), dtype=np.uint8).reshape(len(grid), len(grid[0]))
+        masks = connection_masks(cells != 1)
+    is_road = cells == 0
+    type_table = np.array([road_type for road_type, _ in ROAD_LOOKUP])
+    orientation_table = np.array([orientation for _, orientation in ROAD_LOOKUP])
+    road_types = np.where(is_road, type_table[masks], 1)
+    road_orientations = np.where(is_road, orientation_table[masks], 0)
+    return road_types.tolist(), road_orientations.tolist()
+
+# Versi tanpa numpy: mask dihitung per sel dari baris atas/bawah, tanpa pemanggilan fungsi
+def _classify_roads_lookup(grid):
+    grid_width = len(grid[0])
+    grid_height = len(grid)
+    road_types = [[1] * grid_width for _ in range(grid_height)]
+    road_orientations = [[0] * grid_width for _ in range(grid_height)]
+
+    for y in range(grid_height):
+        row = grid[y]
+        above = grid[y - 1] if y > 0 else None
+        below = grid[y + 1] if y < grid_height - 1 else None
+        type_row = road_types[y]
+        orientation_row = road_orientations[y]
+        for x in range(grid_width):
+            if row[x] != 0:
+                continue
+            mask = 0
+            if above is not None and above[x] != 1:
+                mask |= 1
+            if x < grid_width - 1 and row[x + 1] != 1:
+                mask |= 2
+            if below is not None and below[x] != 1:
+                mask |= 4
+            if x > 0 and row[x - 1] != 1:
+                mask |= 8
+            type_row[x], orientation_row[x] = ROAD_LOOKUP[mask]
+
+    return road_types, road_orientations
+
+# Generate tilemap peta jalan kota dengan simpang dan tikungan
+# road_spacing = jarak antar jalan; None = acak 5-8 untuk tiap sumbu.
+# rng = random.Random(seed) agar peta bisa diulang; None = modul random global
+def generate_map(grid_width, grid_height, road_spacing=None, rng=None):
+    if rng is None:
+        rng = random
+    # Inisialisasi grid (1 = blok perumahan/non-jalan)
+    grid = [[1 for _ in range(grid_width)] for _ in range(grid_height)]
+    
+    # Buat grid jalan kota (horizontal dan vertikal)
+    if road_spacing is None:
+        road_spacing_x = rng.randint(5, 8)
+        road_spacing_y = rng.randint(5, 8)
+    else:
+        road_spacing_x = road_spacing_y = road_spacing
+
+    # Buat jalan horizontal utama
+    for y in range(road_spacing_y, grid_height, road_spacing_y):
+        if y < grid_height:  # Pastikan masih dalam grid
+            for x in range(grid_width):
+                grid[y][x] = 0  # 0 = jalan
+
+    # Buat jalan vertikal utama
+    for x in range(road_spacing_x, grid_width, road_spacing_x):
+        if x < grid_width:  # Pastikan masih dalam grid
+            for y in range(grid_height):
+                grid[y][x] = 0  # 0 = jalan
+
+    road_types, road_orientations = classify_roads(grid)
+    return grid, road_types, road_orientations
+
+# Posisi acak di jalan (rng seperti generate_map). component = label komponen
+# CompactGrid: posisi hanya dipilih dari sel jalan komponen tersebut
+def random_position(grid, rng=None, component=None):
+    if rng is None:
+        rng = random
+    if isinstance(grid, CompactGrid):
+        # Indeks sel jalan sudah tersimpan; rng.choice memilih dengan cara yang sama
+        if component is not None:
+            road_cells = grid.component_cells(component)
+        else:
+            road_cells = grid.road_cells()
+        if not road_cells:
+            return (0, 0)
+        return grid.position(rng.choice(road_cells))
+
+    positions = []
+    for y in range(len(grid)):
+        for x in range(len(grid[0])):
+            if grid[y][x] != 1 :  # Bukan rumah (adalah jalan)
+                positions.append((x, y))
+    
+    if not positions:
+        # Fallback jika tidak ada posisi jalan yang valid
+        return (0, 0)
+    
+    return rng.choice(positions)
+
+# Komponen acak (berbobot jumlah sel, seperti memilih sel jalan acak) yang punya
+# minimal dua sel untuk sumber dan tujuan; None jika tidak ada
+def _job_component(grid, rng):
+    road_cells = grid.road_cells()
+    if grid.component_count() == len(road_cells):
+        return None
+    labels = grid.components()
+    while True:
+        component = labels[rng.choice(road_cells)]
+        if len(grid.component_cells(component)) >= 2:
+            return component
+
+# Pilih sumber dan tujuan paket acak yang berbeda. Di CompactGrid keduanya dari
+# komponen jalan yang sama, yaitu komponen near (posisi kurir) jika diberikan,
+# jadi paket tidak pernah menunggu rute yang pasti gagal
+def random_job(grid, rng=None, near=None):
+    if rng is None:
+        rng = random
+    component = None
+    if isinstance(grid, CompactGrid) and grid.road_cells():
+        if near is not None:
+            component = grid.component(*near)
+        if component is None or component < 0 or len(grid.component_cells(component)) < 2:
+            component = _job_component(grid, rng)
+    source = random_position(grid, rng, component)
+    dest = random_position(grid, rng, component)
+    while dest == source:
+        dest = random_position(grid, rng, component)
+    return source, dest
+
+# Cari jalur dengan planner (fungsi (start, goal, heading) -> jalur), default a_star di grid kurir.
+# heading = arah hadap kurir, hanya dipakai planner yang memperhitungkan waktu belok
+def plan_path(courier, goal, planner=None):
+    if planner is None:
+        return a_star((courier.x, courier.y), goal, courier.grid)
+    return planner((courier.x, courier.y), goal, courier.direction)
+
+# Mulai rute kurir ke sumber paket atau ke tujuan (sama seperti tombol Start)
+def start_route(courier, source, dest, planner=None):
+    target = dest if courier.has_package else source
+    if (courier.x, courier.y) == target:
+        # Sudah di lokasi, langkah berikutnya langsung pickup/deliver
+        courier.path = []
+        courier.moving = True
+        return True
+    courier.path = plan_path(courier, target, planner)
+    if not courier.path:
+        return False
+    courier.moving = True
+    return True
+
+# Satu langkah simulasi kurir: ikuti jalur, lalu pickup/deliver jika sudah tiba
+def advance_courier(courier, source, dest, planner=None):
+    if not courier.moving:
+        return None
+    courier.follow_path()
+    # Periksa jika path kosong dan kurir sudah tiba di tujuan
+    if courier.path:
+        return None
+    if not courier.has_package and (courier.x, courier.y) == source:
+        if courier.try_pickup(source[0], source[1]):
+            # Setelah mengambil paket, tentukan rute ke tujuan
+            courier.path = plan_path(courier, dest, planner)
+            if not courier.path:
+                courier.moving = False
+                return EVENT_NO_ROUTE
+            return EVENT_PICKUP
+    elif courier.has_package and (courier.x, courier.y) == dest:
+        if courier.try_deliver(dest[0], dest[1]):
+            courier.moving = False
+            return EVENT_DELIVERED
+    return None
@@ -0,0 +1,358 @@
+import argparse
+import random
+import time
+
+from courier_core import generate_map, random_position, random_job
+
+# Vektorisasi distance field dan metode Hungarian jika numpy tersedia
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Dispatcher batch: pasangkan banyak paket ke banyak kurir dengan total
+# jarak ke titik pengambilan minimum. Jarak diambil dari distance field
+# BFS per sumber paket, bukan A* terpisah untuk setiap pasangan.
+
+# Biaya untuk pasangan yang tidak terhubung jalan
+UNREACHABLE = 10 ** 9
+
+# Daftar tetangga (indeks datar y * lebar + x) untuk setiap sel jalan
+def road_neighbors(grid):
+    grid_width = len(grid[0])
+    grid_height = len(grid)
+    neighbors = [None] * (grid_width * grid_height)
+    for y in range(grid_height):
+        row = grid[y]
+        for x in range(grid_width):
+            if row[x] == 1:
+                continue
+            cell = []
+            if y > 0 and grid[y-1][x] != 1:
+                cell.append((y-1) * grid_width + x)
+            if x < grid_width-1 and row[x+1] != 1:
+                cell.append(y * grid_width + x + 1)
+            if y < grid_height-1 and grid[y+1][x] != 1:
+                cell.append((y+1) * grid_width + x)
+            if x > 0 and row[x-1] != 1:
+                cell.append(y * grid_width + x - 1)
+            neighbors[y * grid_width + x] = cell
+    return neighbors
+
+# Jarak grid dari satu sel ke semua sel jalan (BFS per level), -1 = tidak terjangkau.
+# Jika targets (set indeks datar) diberikan, BFS berhenti begitu semuanya terjangkau.
+def distance_field(neighbors, grid_width, source, targets=None):
+    distances = [-1] * len(neighbors)
+    start = source[1] * grid_width + source[0]
+    if neighbors[start] is None:
+        return distances
+    distances[start] = 0
+    frontier = [start]
+    distance = 0
+    if targets is None:
+        while frontier:
+            distance += 1
+            next_frontier = []
+            append = next_frontier.append
+            for cell in frontier:
+                for neighbor in neighbors[cell]:
+                    if distances[neighbor] < 0:
+                        distances[neighbor] = distance
+                        append(neighbor)
+            frontier = next_frontier
+        return distances
+
+    remaining = len(targets) - (start in targets)
+    while frontier and remaining > 0:
+        distance += 1
+        next_frontier = []
+        append = next_frontier.append
+        for cell in frontier:
+            for neighbor in neighbors[cell]:
+                if distances[neighbor] < 0:
+                    distances[neighbor] = distance
+                    append(neighbor)
+                    if neighbor in targets:
+                        remaining -= 1
+        frontier = next_frontier
+    return distances
+
+# Matriks biaya [paket][kurir] = jarak kurir ke sumber paket.
+# Grid tidak berarah, jadi BFS dari sumber paket sekaligus memberi jarak
+# ke semua kurir; sumber yang sama hanya di-BFS sekali.
+def job_cost_matrix(grid, jobs, courier_positions, neighbors=None):
+    if np is not None:
+        fields = _cost_rows_array(grid, list(dict.fromkeys(source for source, _ in jobs)), courier_positions)
+        return [fields[source] for source, _ in jobs]
+    grid_width = len(grid[0])
+    if neighbors is None:
+        neighbors = road_neighbors(grid)
+    courier_cells = [y * grid_width + x for x, y in courier_positions]
+
+    fields = {}
+    cost = []
+    for source, _ in jobs:
+        row = fields.get(source)
+        if row is None:
+            distances = distance_field(neighbors, grid_width, source)
+            row = [distances[cell] if distances[cell] >= 0 else UNREACHABLE for cell in courier_cells]
+            fields[source] = row
+        cost.append(row)
+    return cost
+
+# Versi numpy: BFS dari semua sumber sekaligus. Tiap sel jalan menyimpan bitset
+# sumber yang sudah menjangkaunya (64 sumber per uint64), satu level BFS = OR bitset
+# keempat tetangga. Jarak dihitung dengan counter bit-sliced per kurir: setiap level,
+# bit sumber yang belum menjangkau kurir ditambah satu. Mengembalikan {sumber: baris}
+def _cost_rows_array(grid, sources, courier_positions):
+    grid_width = len(grid[0])
+    grid_height = len(grid)
+    cells = np.frombuffer(b"".join(bytes(row) for row in grid), dtype=np.uint8)
+    road = np.flatnonzero(cells != 1)
+    count = len(road)
+    # Indeks sel jalan per sel grid; count = baris sentinel (blok/luar grid) yang selalu kosong
+    road_index = np.full(grid_width * grid_height, count, dtype=np.int64)
+    road_index[road] = np.arange(count)
+    ys, xs = np.divmod(road, grid_width)
+    neighbors = []
+    for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)):
+        nx = xs + dx
+        ny = ys + dy
+        inside = (nx >= 0) & (nx < grid_width) & (ny >= 0) & (ny < grid_height)
+        neighbor = np.full(count, count, dtype=np.int64)
+        neighbor[inside] = road_index[ny[inside] * grid_width + nx[inside]]
+        neighbors.append(neighbor)
+
+    words = (len(sources) + 63) // 64
+    frontier = np.zeros((count + 1, words), dtype=np.uint64)
+    source_cells = road_index[[y * grid_width + x for x, y in sources]]
+    bits = np.arange(len(sources))
+    on_road = source_cells < count
+    frontier[source_cells[on_road], bits[on_road] // 64] |= np.left_shift(
+        np.uint64(1), (bits[on_road] % 64).astype(np.uint64))
+    # Baris sentinel selalu "belum terjangkau", jadi kurir di luar jalan tetap UNREACHABLE
+    unvisited = np.full((count + 1, words), ~np.uint64(0))
+    unvisited[:count] &= ~frontier[:count]
+
+    courier_cells = road_index[[y * grid_width + x for x, y in courier_positions]]
+    planes = [np.zeros((len(courier_cells), words), dtype=np.uint64) for _ in range(count.bit_length())]
+    next_frontier = np.empty((count, words), dtype=np.uint64)
+    neighbor_bits = np.empty_like(next_frontier)
+    while True:
+        carry = unvisited[courier_cells]
+        if not carry.any():
+            break
+        for plane in planes:
+            plane ^= carry
+            carry &= ~plane
+        np.take(frontier, neighbors[0], axis=0, out=next_frontier)
+        for neighbor in neighbors[1:]:
+            np.take(frontier, neighbor, axis=0, out=neighbor_bits)
+            next_frontier |= neighbor_bits
+        next_frontier &= unvisited[:count]
+        if not next_frontier.any():
+            break
+        unvisited[:count] ^= next_frontier
+        frontier[:count] = next_frontier
+
+    distances = np.zeros((len(courier_cells), words * 64), dtype=np.int64)
+    for bit, plane in enumerate(planes):
+        distances += np.unpackbits(plane.view(np.uint8), axis=1, bitorder="little").astype(np.int64) << bit
+    reached = np.unpackbits((~unvisited[courier_cells]).view(np.uint8), axis=1, bitorder="little")
+    distances[reached == 0] = UNREACHABLE
+    rows = distances[:, :len(sources)].T.tolist()
+    return dict(zip(sources, rows))
+
+# Solver cepat: ambil pasangan termurah yang kedua pihaknya masih bebas
+def assign_greedy(cost):
+    pairs = []
+    for job, row in enumerate(cost):
+        for courier, value in enumerate(row):
+            if value < UNREACHABLE:
+                pairs.append((value, job, courier))
+    pairs.sort()
+
+    used_jobs = set()
+    used_couriers = set()
+    assignment = []
+    limit = min(len(cost), len(cost[0]) if cost else 0)
+    for value, job, courier in pairs:
+        if job in used_jobs or courier in used_couriers:
+            continue
+        used_jobs.add(job)
+        used_couriers.add(courier)
+        assignment.append((job, courier))
+        if len(assignment) == limit:
+            break
+    return sorted(assignment)
+
+# Solver optimal: metode Hungarian (shortest augmenting path, O(n^2 m))
+def assign_hungarian(cost):
+    if not cost or not cost[0]:
+        return []
+    rows = len(cost)
+    cols = len(cost[0])
+
+    # Algoritma butuh baris <= kolom; transpose jika paket lebih banyak dari kurir
+    transposed = rows > cols
+    if transposed:
+        cost = [list(column) for column in zip(*cost)]
+        rows, cols = cols, rows
+
+    if np is not None:
+        match = _hungarian_array(cost, rows, cols)
+    else:
+        match = _hungarian_lists(cost, rows, cols)
+
+    assignment = []
+    for row, col in enumerate(match):
+        if cost[row][col] >= UNREACHABLE:
+            continue
+        assignment.append((col, row) if transposed else (row, col))
+    return sorted(assignment)
+
+# Kembalikan kolom untuk tiap baris. Indeks 0 pada u/v/p/way adalah sentinel.
+def _hungarian_lists(cost, rows, cols):
+    inf = float("inf")
+    u = [0] * (rows + 1)
+    v = [0] * (cols + 1)
+    p = [0] * (cols + 1)
+    way = [0] * (cols + 1)
+    for i in range(1, rows + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (cols + 1)
+        used = [False] * (cols + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = cost[i0 - 1]
+            u_i0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, cols + 1):
+                if not used[j]:
+                    current = row[j - 1] - u_i0 - v[j]
+                    if current < minv[j]:
+                        minv[j] = current
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(cols + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    match = [0] * rows
+    for j in range(1, cols + 1):
+        if p[j]:
+            match[p[j] - 1] = j - 1
+    return match
+
+# Versi numpy (shortest augmenting path seperti scipy linear_sum_assignment): per baris,
+# Dijkstra di kolom dengan biaya tereduksi sampai kolom bebas; potensial u/v baru
+# diperbarui sekali di akhir baris, hanya untuk baris/kolom yang dikunjungi
+def _hungarian_array(cost, rows, cols):
+    a = np.asarray(cost, dtype=np.float64)
+    u = np.zeros(rows)
+    v = np.zeros(cols)
+    col_for_row = np.full(rows, -1, dtype=np.int64)
+    row_for_col = np.full(cols, -1, dtype=np.int64)
+    path = np.zeros(cols, dtype=np.int64)
+    improved = np.zeros(cols, dtype=bool)
+    for row in range(rows):
+        shortest = np.full(cols, np.inf)
+        final = np.zeros(cols)
+        free = np.ones(cols, dtype=bool)
+        visited_rows = [row]
+        visited_cols = []
+        i = row
+        min_value = 0.0
+        while True:
+            current = a[i] - v
+            current += min_value - u[i]
+            np.less(current, shortest, out=improved)
+            improved &= free
+            np.copyto(shortest, current, where=improved)
+            np.copyto(path, i, where=improved)
+            j = int(shortest.argmin())
+            min_value = shortest[j]
+            final[j] = min_value
+            shortest[j] = np.inf
+            free[j] = False
+            visited_cols.append(j)
+            if row_for_col[j] < 0:
+                break
+            i = row_for_col[j]
+            visited_rows.append(i)
+
+        u[row] += min_value
+        for i in visited_rows[1:]:
+            u[i] += min_value - final[col_for_row[i]]
+        visited_cols = np.array(visited_cols)
+        v[visited_cols] -= min_value - final[visited_cols]
+        # Balik pasangan sepanjang jalur augmentasi
+        while True:
+            i = path[j]
+            row_for_col[j] = i
+            col_for_row[i], j = j, col_for_row[i]
+            if i == row:
+                break
+    return col_for_row.tolist()
+
+SOLVERS = {
+    "greedy": assign_greedy,
+    "hungarian": assign_hungarian,
+}
+
+# Pasangkan paket [(source, dest)] ke posisi kurir [(x, y)].
+# Mengembalikan [(indeks paket, indeks kurir)]; pasangan tak terjangkau dilewati.
+def dispatch_jobs(grid, jobs, courier_positions, method="hungarian", neighbors=None):
+    if not jobs or not courier_positions:
+        return []
+    cost = job_cost_matrix(grid, jobs, courier_positions, neighbors)
+    return SOLVERS[method](cost)
+
+def total_cost(grid, jobs, courier_positions, assignment, neighbors=None):
+    cost = job_cost_matrix(grid, jobs, courier_positions, neighbors)
+    return sum(cost[job][courier] for job, courier in assignment)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uji dispatcher paket ke kurir")
+    parser.add_argument("--jobs", type=int, default=500, help="jumlah paket")
+    parser.add_argument("--couriers", type=int, default=500, help="jumlah kurir")
+    parser.add_argument("--width", type=int, default=150, help="lebar grid")
+    parser.add_argument("--height", type=int, default=100, help="tinggi grid")
+    parser.add_argument("--seed", type=int, default=None, help="seed random")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    grid, _, _ = generate_map(args.width, args.height, rng=rng)
+    jobs = [random_job(grid, rng) for _ in range(args.jobs)]
+    couriers = [random_position(grid, rng) for _ in range(args.couriers)]
+
+    start_time = time.perf_counter()
+    cost = job_cost_matrix(grid, jobs, couriers)
+    print(f"Distance field: {time.perf_counter() - start_time:.3f} s")
+
+    for method, solver in SOLVERS.items():
+        start_time = time.perf_counter()
+        assignment = solver(cost)
+        elapsed = time.perf_counter() - start_time
+        travel = sum(cost[job][courier] for job, courier in assignment)
+        print(f"{method}: {len(assignment)} pasangan, total jarak {travel}, {elapsed:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
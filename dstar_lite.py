@@ -0,0 +1,421 @@
+import argparse
+import heapq
+import random
+import time
+
+from courier_core import a_star, generate_map, random_position, random_job
+from compact_grid import CompactGrid, set_cell
+from fleet import Fleet
+from spatial_index import CourierIndex
+
+# Perencanaan ulang inkremental (D* Lite) untuk penutupan jalan.
+# Pencarian berjalan mundur dari tujuan ke posisi kurir, sehingga saat
+# kurir bergerak atau ada sel yang berubah, hanya bagian yang terdampak
+# yang dihitung ulang.
+
+INF = float("inf")
+
+# State pencarian disimpan per indeks sel datar (y * lebar + x) di atas CompactGrid:
+# g dan rhs berupa dict yang hanya berisi sel yang pernah disentuh pencarian (sel
+# lain bernilai tak hingga), tetangga dibaca dari mask koneksi.
+# start dan goal tetap (x, y) seperti a_star.
+#
+# Kunci open list (k1, k2). Seri pada k1 untuk sel overconsistent (g > rhs) dipecah
+# ke min(g, rhs) terbesar (paling dekat ke kurir), sama seperti a_star yang memecah
+# seri ke h terkecil: dengan min(g, rhs) terkecil seluruh sel ber-k1 sama di sekitar
+# tujuan ikut diekspansi. Sel underconsistent (g < rhs, jalannya tertutup) diurutkan
+# lebih dulu dengan g terkecil, jadi kenaikan biaya yang mengenai start tetap selesai
+# sebelum pencarian berhenti. Sel overconsistent ber-k1 sama dengan start yang belum
+# diekspansi tidak bisa memperpendek jalur start, jadi boleh ditinggal.
+class DStarLite:
+    def __init__(self, grid, start, goal):
+        if not isinstance(grid, CompactGrid):
+            grid = CompactGrid.from_rows(grid)
+        self.grid = grid
+        self.grid_width = grid.width
+        self.grid_height = grid.height
+        self.start = start
+        self.goal = goal
+        self.last_start = start
+        self.km = 0
+        self.start_cell = start[1] * grid.width + start[0]
+        self.goal_cell = goal[1] * grid.width + goal[0]
+
+        self.g = {}
+        self.rhs = {self.goal_cell: 0}
+        # k2 sel underconsistent = g - under: selalu lebih kecil dari -g sel mana pun
+        self.under = 2 * grid.width * grid.height
+        self.open_heap = []
+        self.open_keys = {}     # Kunci terbaru tiap sel di open list (lazy deletion)
+
+        # Jumlah sel yang diekspansi sejak dibuat
+        self.expanded = 0
+
+        self._update_vertex(self.goal_cell)
+        self.compute_shortest_path()
+
+    def _heuristic(self, a, b):
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def _key(self, cell):
+        g = self.g.get(cell, INF)
+        rhs = self.rhs.get(cell, INF)
+        y, x = divmod(cell, self.grid_width)
+        if g < rhs:
+            return (g + abs(self.start[0] - x) + abs(self.start[1] - y) + self.km, g - self.under)
+        return (rhs + abs(self.start[0] - x) + abs(self.start[1] - y) + self.km, -rhs)
+
+    def _top_key(self):
+        # Buang entri lama sampai puncak heap sesuai kunci terbaru
+        open_heap = self.open_heap
+        open_keys = self.open_keys
+        while open_heap:
+            k1, k2, cell = open_heap[0]
+            if open_keys.get(cell) == (k1, k2):
+                return (k1, k2)
+            heapq.heappop(open_heap)
+        return (INF, -INF)
+
+    # Hitung ulang rhs dari semua tetangga (dipakai saat biaya naik)
+    def _recompute_rhs(self, cell):
+        if cell == self.goal_cell:
+            return
+        best = INF
+        grid = self.grid
+        if grid.cells[cell] != 1:
+            g = self.g
+            for offset in grid.neighbor_offsets[grid.masks[cell]]:
+                cost = g.get(cell + offset, INF)
+                if cost < best:
+                    best = cost
+            best += 1
+        self.rhs[cell] = best
+
+    # Masukkan/keluarkan sel dari open list sesuai konsistensinya
+    def _update_vertex(self, cell):
+        rhs = self.rhs.get(cell, INF)
+        g = self.g.get(cell, INF)
+        if g != rhs:
+            key = self._key(cell)
+            self.open_keys[cell] = key
+            heapq.heappush(self.open_heap, (key[0], key[1], cell))
+        else:
+            self.open_keys.pop(cell, None)
+
+    # Versi D* Lite teroptimasi: saat g turun, rhs tetangga cukup
+    # dibandingkan dengan g baru, tanpa memindai semua tetangganya
+    def compute_shortest_path(self):
+        g = self.g
+        rhs = self.rhs
+        goal_cell = self.goal_cell
+        start_cell = self.start_cell
+        grid_width = self.grid_width
+        start_x, start_y = self.start
+        km = self.km
+        masks = self.grid.masks
+        neighbor_offsets = self.grid.neighbor_offsets
+        open_heap = self.open_heap
+        open_keys = self.open_keys
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        update_vertex = self._update_vertex
+        recompute_rhs = self._recompute_rhs
+        under = self.under
+        while open_heap:
+            # Puncak heap yang masih berlaku (entri lama dibuang)
+            k1, k2, cell = open_heap[0]
+            if open_keys.get(cell) != (k1, k2):
+                heappop(open_heap)
+                continue
+            start_g = g.get(start_cell, INF)
+            start_rhs = rhs.get(start_cell, INF)
+            if not ((k1, k2) < (start_rhs + km, -start_rhs) or start_rhs != start_g):
+                break
+            heappop(open_heap)
+            del open_keys[cell]
+            self.expanded += 1
+
+            cell_g = g.get(cell, INF)
+            cell_rhs = rhs.get(cell, INF)
+            y, x = divmod(cell, grid_width)
+            if cell_g < cell_rhs:
+                new_key = (cell_g + abs(start_x - x) + abs(start_y - y) + km, cell_g - under)
+            else:
+                new_key = (cell_rhs + abs(start_x - x) + abs(start_y - y) + km, -cell_rhs)
+            if (k1, k2) < new_key:
+                open_keys[cell] = new_key
+                heappush(open_heap, (new_key[0], new_key[1], cell))
+            elif cell_g > cell_rhs:
+                g[cell] = cell_rhs
+                cost = cell_rhs + 1
+                for offset in neighbor_offsets[masks[cell]]:
+                    neighbor = cell + offset
+                    if neighbor != goal_cell and cost < rhs.get(neighbor, INF):
+                        rhs[neighbor] = cost
+                        neighbor_g = g.get(neighbor, INF)
+                        if neighbor_g > cost:
+                            ny, nx = divmod(neighbor, grid_width)
+                            key = (cost + abs(start_x - nx) + abs(start_y - ny) + km, -cost)
+                            open_keys[neighbor] = key
+                            heappush(open_heap, (key[0], key[1], neighbor))
+                        elif neighbor_g == cost:
+                            open_keys.pop(neighbor, None)
+                        else:
+                            update_vertex(neighbor)
+            else:
+                g[cell] = INF
+                old_cost = cell_g + 1
+                recompute_rhs(cell)
+                update_vertex(cell)
+                for offset in neighbor_offsets[masks[cell]]:
+                    neighbor = cell + offset
+                    if rhs.get(neighbor, INF) == old_cost:
+                        recompute_rhs(neighbor)
+                        update_vertex(neighbor)
+
+    # Kurir sudah berpindah; simpan pergeseran heuristik di km
+    def update_start(self, start):
+        if start != self.start:
+            self.km += self._heuristic(self.last_start, start)
+            self.last_start = start
+            self.start = start
+            self.start_cell = start[1] * self.grid_width + start[0]
+
+    # Sel (x, y) yang berubah status (ditutup/dibuka): perbarui sel itu dan tetangganya
+    # Sel yang belum pernah dijangkau pencarian (g tak hingga) tidak menjadi dasar
+    # rhs tetangganya, jadi cukup sel itu sendiri yang dihitung ulang
+    def update_cells(self, cells):
+        grid = self.grid
+        grid_width = self.grid_width
+        g = self.g
+        rhs = self.rhs
+        neighbor_offsets = grid.neighbor_offsets
+        masks = grid.masks
+        recompute_rhs = self._recompute_rhs
+        update_vertex = self._update_vertex
+        for x, y in cells:
+            cell = y * grid_width + x
+            recompute_rhs(cell)
+            update_vertex(cell)
+            cost = g.get(cell, INF) + 1
+            if cost == INF:
+                continue
+            for offset in neighbor_offsets[masks[cell]]:
+                neighbor = cell + offset
+                # Ditutup: hanya tetangga yang rhs-nya lewat sel ini; dibuka: tetangga
+                # yang bisa lebih murah lewat sel ini
+                if rhs.get(neighbor, INF) >= cost:
+                    recompute_rhs(neighbor)
+                    update_vertex(neighbor)
+
+    # Jalur dari start ke goal (tanpa start), format sama seperti a_star.
+    # Jika previous_path diberikan, ekstraksi berhenti begitu bertemu sel di
+    # jalur lama yang sisanya masih terbuka dan masih terpendek, lalu menyambungnya.
+    def path(self, previous_path=None):
+        g = self.g
+        if g.get(self.start_cell, INF) == INF:
+            return []
+        grid = self.grid
+        grid_width = self.grid_width
+
+        suffix_index = {}
+        if previous_path:
+            # Sel jalur lama setelah sel tertutup terakhir masih bisa dipakai
+            first_open = 0
+            for i, (x, y) in enumerate(previous_path):
+                if grid[y][x] == 1:
+                    first_open = i + 1
+            length = len(previous_path)
+            for i in range(first_open, length):
+                x, y = previous_path[i]
+                suffix_index[y * grid_width + x] = i
+
+        masks = grid.masks
+        neighbor_offsets = grid.neighbor_offsets
+        path = []
+        current = self.start_cell
+        goal_cell = self.goal_cell
+        limit = grid_width * self.grid_height
+        while current != goal_cell:
+            i = suffix_index.get(current)
+            if i is not None and g.get(current) == len(previous_path) - 1 - i:
+                path.extend(previous_path[i + 1:])
+                return path
+            best = None
+            best_cost = INF
+            for offset in neighbor_offsets[masks[current]]:
+                cost = g.get(current + offset, INF)
+                if cost < best_cost:
+                    best = current + offset
+                    best_cost = cost
+            if best is None or len(path) >= limit:
+                return []
+            y, x = divmod(best, grid_width)
+            path.append((x, y))
+            current = best
+        return path
+
+# Armada yang rutenya diperbaiki saat jalan ditutup/dibuka: hanya kurir yang sisa
+# rutenya melewati sel tertutup yang direncanakan ulang dari posisinya sekarang.
+# incremental=True: rute direncanakan dengan D* Lite dan pencariannya disimpan per
+# kurir. Default a_star ulang (planner armada): perbaikan D* Lite hanya lebih cepat
+# di peta gambar dengan jalan memutar panjang (maps2.png, ~25%); di peta generate
+# dan maps.png perbaikannya 2-3x lebih lambat dan rencana awalnya 2-3x lebih lambat
+# dari a_star ulang.
+class ClosureAwareFleet(Fleet):
+    def __init__(self, grid, rotation_speed=75, planner=None, incremental=False):
+        super().__init__(grid, rotation_speed, planner)
+        self.incremental = incremental
+        self.route_searches = {}    # indeks kurir -> DStarLite (mode incremental)
+        self.synced_changes = {}    # indeks kurir -> jumlah perubahan yang sudah diterapkan
+        self.changes = []           # Log sel yang berubah status
+        # Posisi kurir per bucket agar cek sel terisi saat menutup jalan tidak memindai armada
+        if self.spatial_index is None:
+            self.spatial_index = CourierIndex(grid.width, grid.height)
+
+        # Statistik
+        self.plans = 0
+        self.plan_time = 0.0
+        self.repairs = 0
+        self.repair_time = 0.0
+
+    def plan_route(self, index, start, goal):
+        start_time = time.perf_counter()
+        if self.incremental:
+            search = DStarLite(self.grid, start, goal)
+            self.route_searches[index] = search
+            self.synced_changes[index] = len(self.changes)
+            path = search.path()
+        else:
+            path = super().plan_route(index, start, goal)
+        self.plans += 1
+        self.plan_time += time.perf_counter() - start_time
+        return path
+
+    # Tujuan rute kurir saat ini: sumber paket, atau tujuan paket jika sudah diambil
+    def route_goal(self, index):
+        if self.has_package[index]:
+            return self.dest_x[index], self.dest_y[index]
+        return self.source_x[index], self.source_y[index]
+
+    # Tutup sel jalan; kurir yang rutenya melewati sel itu langsung diperbaiki.
+    # Mengembalikan indeks kurir yang diperbaiki (moving = 0 jika tidak ada rute lagi),
+    # atau None jika sel tidak bisa ditutup (bukan jalan atau sedang ditempati kurir).
+    def close_road(self, x, y):
+        if self.grid[y][x] == 1 or self.spatial_index.occupied(x, y):
+            return None
+        set_cell(self.grid, x, y, 1)
+        self.changes.append((x, y))
+
+        affected = []
+        for i in range(len(self.x)):
+            if not self.moving[i]:
+                continue
+            path = self.paths[i]
+            if (x, y) in path[self.path_index[i]:]:
+                self.repair_route(i)
+                affected.append(i)
+        return affected
+
+    # Buka kembali sel; rute yang ada tetap valid, perubahan diterapkan saat perbaikan berikutnya
+    def reopen_road(self, x, y):
+        if self.grid[y][x] != 1:
+            return False
+        set_cell(self.grid, x, y, 0)
+        self.changes.append((x, y))
+        return True
+
+    def repair_route(self, index):
+        start_time = time.perf_counter()
+        start = (self.x[index], self.y[index])
+        goal = self.route_goal(index)
+        search = self.route_searches.get(index)
+        if not self.grid.reachable(start[1] * self.grid.width + start[0], goal[1] * self.grid.width + goal[0]):
+            # Penutupan memutus kurir dari tujuannya
+            path = []
+        elif not self.incremental:
+            path = Fleet.plan_route(self, index, start, goal)
+        else:
+            search.update_start(start)
+            search.update_cells(self.changes[self.synced_changes[index]:])
+            self.synced_changes[index] = len(self.changes)
+            search.compute_shortest_path()
+            path = search.path(self.remaining_path(index))
+        self.set_path(index, path)
+        if not path:
+            self.moving[index] = 0
+        self.repairs += 1
+        self.repair_time += time.perf_counter() - start_time
+        return bool(path)
+
+
+# Jalankan skenario penutupan jalan pada salinan grid. Mengembalikan armada
+# (statistik rencana/perbaikan) dan waktu a_star penuh untuk rute terdampak yang sama.
+def run_closures(grid, couriers, closures, incremental, rng):
+    grid = CompactGrid(grid.width, grid.height, bytearray(grid.cells), grid.masks)
+    fleet = ClosureAwareFleet(grid, incremental=incremental)
+    for _ in range(couriers):
+        index = fleet.add_courier(*random_position(grid, rng))
+        fleet.assign_job(index, *random_job(grid, rng))
+
+    full_replan_time = 0.0
+    closed_cells = []
+    while len(closed_cells) < closures:
+        fleet.step()
+        # Tutup satu sel di tengah rute kurir acak
+        index = rng.randrange(len(fleet))
+        remaining = fleet.remaining_path(index)
+        if len(remaining) < 3:
+            fleet.assign_job(index, *random_job(grid, rng))
+            continue
+        x, y = remaining[len(remaining) // 2]
+        affected = fleet.close_road(x, y)
+        if affected is None:
+            continue
+        closed_cells.append((x, y))
+
+        # Pembanding: a_star penuh dari posisi tiap kurir yang terdampak
+        for i in affected:
+            start_time = time.perf_counter()
+            a_star((fleet.x[i], fleet.y[i]), fleet.route_goal(i), grid)
+            full_replan_time += time.perf_counter() - start_time
+            if not fleet.moving[i]:
+                fleet.assign_job(i, *random_job(grid, rng))
+
+        # Buka kembali penutupan lama agar peta tidak tertutup seluruhnya
+        if len(closed_cells) > 20:
+            fleet.reopen_road(*closed_cells[-21])
+    return fleet, full_replan_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uji perbaikan rute D* Lite saat jalan ditutup")
+    parser.add_argument("--couriers", type=int, default=50, help="jumlah kurir")
+    parser.add_argument("--closures", type=int, default=200, help="jumlah penutupan jalan")
+    parser.add_argument("--map", default=None, help="gambar peta (default: peta generate)")
+    parser.add_argument("--width", type=int, default=150, help="lebar grid")
+    parser.add_argument("--height", type=int, default=100, help="tinggi grid")
+    parser.add_argument("--seed", type=int, default=None, help="seed random")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.map:
+        # map_loader butuh pygame, jadi hanya diimpor jika peta gambar dipakai
+        from map_loader import load_grid_from_image
+        grid, _, _ = load_grid_from_image(args.map)
+    else:
+        grid, _, _ = generate_map(args.width, args.height, rng=rng)
+    grid = CompactGrid.from_rows(grid)
+    # Skenario yang sama (seed kurir, paket, dan penutupan) untuk kedua mode
+    scenario_seed = rng.randrange(2 ** 32)
+
+    for name, incremental in (("D* Lite", True), ("a_star", False)):
+        fleet, full_replan_time = run_closures(grid, args.couriers, args.closures, incremental,
+                                               random.Random(scenario_seed))
+        print(f"{name}: rencana {fleet.plans} kali {fleet.plan_time:.3f} s, "
+              f"perbaikan {fleet.repairs} kali {fleet.repair_time:.3f} s "
+              f"(a_star penuh untuk rute yang sama: {full_replan_time:.3f} s)")
+
+
+if __name__ == "__main__":
+    main()
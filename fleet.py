@@ -0,0 +1,245 @@
+from array import array
+
+from courier_core import a_star, EVENT_PICKUP, EVENT_DELIVERED, EVENT_NO_ROUTE
+
+# Armada kurir dengan state struct-of-arrays: satu array per atribut,
+# satu indeks per kurir. Semua kurir dimajukan dalam satu langkah batch
+# dengan aturan yang sama seperti Courier.follow_path dan advance_courier.
+
+# Indeks arah; indeks * 90 = rotation_angle (0=up, 90=left, 180=down, 270=right)
+FLEET_DIRECTIONS = ("UP", "LEFT", "DOWN", "RIGHT")
+DIR_UP = 0
+DIR_LEFT = 1
+DIR_DOWN = 2
+DIR_RIGHT = 3
+
+# Tampilan satu kurir di armada dengan atribut seperti Courier (untuk renderer)
+class FleetCourierView:
+    __slots__ = ("fleet", "index")
+
+    def __init__(self, fleet, index):
+        self.fleet = fleet
+        self.index = index
+
+    @property
+    def x(self):
+        return self.fleet.x[self.index]
+
+    @property
+    def y(self):
+        return self.fleet.y[self.index]
+
+    @property
+    def rotation_angle(self):
+        return self.fleet.rotation_angle[self.index]
+
+    @property
+    def direction(self):
+        return FLEET_DIRECTIONS[self.fleet.direction[self.index]]
+
+    @property
+    def has_package(self):
+        return bool(self.fleet.has_package[self.index])
+
+    @property
+    def moving(self):
+        return bool(self.fleet.moving[self.index])
+
+    @property
+    def path(self):
+        return self.fleet.remaining_path(self.index)
+
+class Fleet:
+    def __init__(self, grid, rotation_speed=75, planner=None):
+        self.grid = grid
+        self.rotation_speed = rotation_speed
+        # Fungsi (start, goal, heading=None) -> jalur; default a_star di grid armada
+        if planner is None:
+            planner = lambda start, goal, heading=None: a_star(start, goal, grid)
+        self.planner = planner
+
+        # Posisi dan arah
+        self.x = array("i")
+        self.y = array("i")
+        self.direction = array("b")
+        self.target_direction = array("b")
+        self.rotation_angle = array("h")
+
+        # Flag status (0/1)
+        self.is_rotating = bytearray()
+        self.has_package = bytearray()
+        self.moving = bytearray()
+
+        # Jalur dikonsumsi lewat kursor, bukan pop(0)
+        self.paths = []
+        self.path_index = array("i")
+
+        # Paket yang sedang dikerjakan tiap kurir
+        self.source_x = array("i")
+        self.source_y = array("i")
+        self.dest_x = array("i")
+        self.dest_y = array("i")
+
+        # spatial_index.CourierIndex opsional (kunci = indeks kurir), diperbarui setiap kurir pindah sel
+        self.spatial_index = None
+
+    def __len__(self):
+        return len(self.x)
+
+    def add_courier(self, x, y):
+        self.x.append(x)
+        self.y.append(y)
+        self.direction.append(DIR_RIGHT)
+        self.target_direction.append(DIR_RIGHT)
+        self.rotation_angle.append(270)
+        self.is_rotating.append(0)
+        self.has_package.append(0)
+        self.moving.append(0)
+        self.paths.append([])
+        self.path_index.append(0)
+        self.source_x.append(-1)
+        self.source_y.append(-1)
+        self.dest_x.append(-1)
+        self.dest_y.append(-1)
+        index = len(self.x) - 1
+        if self.spatial_index is not None:
+            self.spatial_index.insert(index, x, y)
+        return index
+
+    def courier(self, index):
+        return FleetCourierView(self, index)
+
+    def couriers(self):
+        return [FleetCourierView(self, i) for i in range(len(self.x))]
+
+    def remaining_path(self, index):
+        return self.paths[index][self.path_index[index]:]
+
+    # Rencanakan rute satu kurir; subclass bisa mengganti strategi per kurir
+    def plan_route(self, index, start, goal):
+        return self.planner(start, goal, FLEET_DIRECTIONS[self.direction[index]])
+
+    def set_path(self, index, path):
+        self.paths[index] = path
+        self.path_index[index] = 0
+
+    # Beri paket baru dan mulai rute (sama seperti start_route)
+    def assign_job(self, index, source, dest):
+        self.source_x[index], self.source_y[index] = source
+        self.dest_x[index], self.dest_y[index] = dest
+        target = dest if self.has_package[index] else source
+        position = (self.x[index], self.y[index])
+        if position == target:
+            # Sudah di lokasi, langkah berikutnya langsung pickup/deliver
+            self.set_path(index, [])
+            self.moving[index] = 1
+            return True
+        path = self.plan_route(index, position, target)
+        self.set_path(index, path)
+        if not path:
+            self.moving[index] = 0
+            return False
+        self.moving[index] = 1
+        return True
+
+    def stop(self, index):
+        self.moving[index] = 0
+        self.set_path(index, [])
+
+    # Majukan seluruh armada satu tick. Mengembalikan [(indeks, event)]
+    def step(self):
+        events = []
+        grid = self.grid
+        grid_width = len(grid[0])
+        grid_height = len(grid)
+        speed = self.rotation_speed
+
+        xs = self.x
+        ys = self.y
+        direction = self.direction
+        target_direction = self.target_direction
+        rotation_angle = self.rotation_angle
+        is_rotating = self.is_rotating
+        has_package = self.has_package
+        moving = self.moving
+        paths = self.paths
+        path_index = self.path_index
+        spatial_index = self.spatial_index
+
+        for i in range(len(xs)):
+            if not moving[i]:
+                continue
+
+            path = paths[i]
+            k = path_index[i]
+            if k < len(path):
+                # Jika sedang berputar, selesaikan putaran dulu
+                if is_rotating[i]:
+                    target_angle = target_direction[i] * 90
+                    angle = rotation_angle[i]
+                    angle_diff = (target_angle - angle + 180) % 360 - 180
+                    if abs(angle_diff) <= speed:
+                        rotation_angle[i] = target_angle
+                        direction[i] = target_direction[i]
+                        is_rotating[i] = 0
+                    else:
+                        rotation_angle[i] = (angle + (speed if angle_diff > 0 else -speed)) % 360
+                    continue
+
+                x = xs[i]
+                y = ys[i]
+                next_x, next_y = path[k]
+                dx = next_x - x
+                dy = next_y - y
+
+                # Tentukan arah yang diperlukan
+                if dx > 0:
+                    required_direction = DIR_RIGHT
+                elif dx < 0:
+                    required_direction = DIR_LEFT
+                elif dy > 0:
+                    required_direction = DIR_DOWN
+                elif dy < 0:
+                    required_direction = DIR_UP
+                else:
+                    required_direction = -1
+
+                # Jika perlu berubah arah, putar dulu
+                if required_direction >= 0 and direction[i] != required_direction:
+                    target_direction[i] = required_direction
+                    is_rotating[i] = 1
+                    continue
+
+                # Jika sudah menghadap arah yang benar, bergerak
+                new_x = x + dx
+                new_y = y + dy
+                if 0 <= new_x < grid_width and 0 <= new_y < grid_height and grid[new_y][new_x] != 1:
+                    xs[i] = x = new_x
+                    ys[i] = y = new_y
+                    if spatial_index is not None:
+                        spatial_index.move(i, x, y)
+                if x == next_x and y == next_y:
+                    k += 1
+                    path_index[i] = k
+                if k < len(path):
+                    continue
+
+            # Jalur habis: pickup atau deliver jika sudah tiba
+            x = xs[i]
+            y = ys[i]
+            if not has_package[i]:
+                if x == self.source_x[i] and y == self.source_y[i]:
+                    has_package[i] = 1
+                    path = self.plan_route(i, (x, y), (self.dest_x[i], self.dest_y[i]))
+                    self.set_path(i, path)
+                    if not path:
+                        moving[i] = 0
+                        events.append((i, EVENT_NO_ROUTE))
+                    else:
+                        events.append((i, EVENT_PICKUP))
+            elif x == self.dest_x[i] and y == self.dest_y[i]:
+                has_package[i] = 0
+                moving[i] = 0
+                events.append((i, EVENT_DELIVERED))
+
+        return events
@@ -0,0 +1,306 @@
+import heapq
+from array import array
+
+from compact_grid import CompactGrid
+from courier_core import a_star
+
+# Pencarian jalur hierarkis (HPA*): grid dibagi menjadi cluster persegi,
+# sel jalan yang berhadapan di perbatasan dua cluster dijadikan node pintu
+# (entrance), lalu jarak antar pintu di dalam satu cluster dihitung sekali
+# per peta. Query berjalan di graf abstrak pintu ini; hanya cluster awal dan
+# tujuan yang dicari per sel untuk menyambungkan titik awal/tujuan ke pintu.
+# Ruas di dalam cluster lain diurai ke sel saat dibutuhkan (lalu disimpan),
+# jadi hasilnya tetap jalur per sel untuk Courier.follow_path.
+#
+# Berbeda dengan RoadGraph, graf ini tidak bergantung pada bentuk jalan, jadi
+# tetap kecil di peta gambar yang jalannya lebar (hampir semua sel simpang).
+
+DEFAULT_CLUSTER_SIZE = 10
+# Query yang awal dan tujuannya berdekatan (jarak Manhattan dalam kelipatan ukuran
+# cluster ini) langsung memakai a_star: jalurnya pendek, dan lewat pintu bisa memutar jauh
+LOCAL_CLUSTERS = 2
+# Pintu yang lebih lebar dari ini diwakili dua node di kedua ujungnya, selain itu satu node di tengah
+ENTRANCE_SPLIT = 6
+
+# Node virtual untuk titik awal dan tujuan saat pencarian
+START_NODE = -1
+GOAL_NODE = -2
+
+class HierarchicalGraph:
+    def __init__(self, grid, cluster_size=DEFAULT_CLUSTER_SIZE):
+        if not isinstance(grid, CompactGrid):
+            grid = CompactGrid.from_rows(grid)
+        self.grid = grid
+        self.grid_width = grid.width
+        self.grid_height = grid.height
+        self.cluster_size = cluster_size
+        self.cluster_width = -(-grid.width // cluster_size)
+        self.cluster_height = -(-grid.height // cluster_size)
+
+        self.node_index = {}    # indeks sel -> id node
+        self.nodes = []         # id node -> indeks sel
+        self.adjacency = []     # id node -> [(node tetangga, bobot)]
+        self.cluster_nodes = [[] for _ in range(self.cluster_width * self.cluster_height)]
+        self.segments = {}      # (sel a, sel b) -> sel setelah a sampai b di dalam satu cluster
+
+        # Jumlah node yang diekspansi dan ukuran open set terbesar pada pencarian terakhir
+        self.expanded = 0
+        self.open_peak = 0
+
+        self._build_cluster_map()
+        self._build_entrances()
+        for nodes in self.cluster_nodes:
+            self._connect_cluster(nodes)
+
+    # Id cluster setiap sel
+    def _build_cluster_map(self):
+        cluster_size = self.cluster_size
+        width = self.grid_width
+        row_clusters = array("i", (x // cluster_size for x in range(width)))
+        self.cluster_of = array("i")
+        for y in range(self.grid_height):
+            offset = (y // cluster_size) * self.cluster_width
+            self.cluster_of.extend(cluster + offset for cluster in row_clusters)
+
+    def _add_node(self, cell):
+        node = self.node_index.get(cell)
+        if node is None:
+            node = len(self.nodes)
+            self.node_index[cell] = node
+            self.nodes.append(cell)
+            self.adjacency.append([])
+            self.cluster_nodes[self.cluster_of[cell]].append(node)
+        return node
+
+    def _add_transition(self, a, b):
+        node_a = self._add_node(a)
+        node_b = self._add_node(b)
+        self.adjacency[node_a].append((node_b, 1))
+        self.adjacency[node_b].append((node_a, 1))
+
+    # Pintu di satu perbatasan: pairs = [(sel sisi a, sel sisi b)] berurutan sepanjang perbatasan
+    def _scan_border(self, pairs):
+        cells = self.grid.cells
+        run = []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and cells[a] != 1 and cells[b] != 1:
+                run.append((a, b))
+                continue
+            if run:
+                if len(run) < ENTRANCE_SPLIT:
+                    self._add_transition(*run[len(run) // 2])
+                else:
+                    self._add_transition(*run[0])
+                    self._add_transition(*run[-1])
+                run = []
+
+    def _build_entrances(self):
+        cluster_size = self.cluster_size
+        width = self.grid_width
+        height = self.grid_height
+        for cluster_y in range(self.cluster_height):
+            y0 = cluster_y * cluster_size
+            y1 = min(y0 + cluster_size, height)
+            for cluster_x in range(self.cluster_width):
+                x0 = cluster_x * cluster_size
+                x1 = min(x0 + cluster_size, width)
+                # Perbatasan kanan dan bawah; kiri dan atas milik cluster tetangga
+                if x1 < width:
+                    self._scan_border([(y * width + x1 - 1, y * width + x1) for y in range(y0, y1)])
+                if y1 < height:
+                    self._scan_border([((y1 - 1) * width + x, y1 * width + x) for x in range(x0, x1)])
+
+    # BFS yang tidak keluar dari cluster: {sel: sel sebelumnya}, {sel: jarak}.
+    # Jika targets (set sel) diberikan, berhenti begitu semuanya terjangkau.
+    def _cluster_search(self, start, targets=None):
+        grid = self.grid
+        masks = grid.masks
+        neighbor_offsets = grid.neighbor_offsets
+        cluster_of = self.cluster_of
+        cluster = cluster_of[start]
+        parents = {start: None}
+        distances = {start: 0}
+        remaining = len(targets) - (start in targets) if targets is not None else -1
+        frontier = [start]
+        distance = 0
+        while frontier and remaining != 0:
+            distance += 1
+            next_frontier = []
+            for cell in frontier:
+                for offset in neighbor_offsets[masks[cell]]:
+                    neighbor = cell + offset
+                    if neighbor in parents or cluster_of[neighbor] != cluster:
+                        continue
+                    parents[neighbor] = cell
+                    distances[neighbor] = distance
+                    next_frontier.append(neighbor)
+                    if targets is not None and neighbor in targets:
+                        remaining -= 1
+            frontier = next_frontier
+        return parents, distances
+
+    # Jarak antar pintu di dalam satu cluster (edge abstrak)
+    def _connect_cluster(self, nodes):
+        if len(nodes) < 2:
+            return
+        cells = {self.nodes[node] for node in nodes}
+        for node in nodes:
+            _, distances = self._cluster_search(self.nodes[node], cells)
+            for other in nodes:
+                if other != node and self.nodes[other] in distances:
+                    self.adjacency[node].append((other, distances[self.nodes[other]]))
+
+    # Sel dari sel di pohon BFS kembali ke akar (tanpa akar): [cell, ..., anak akar]
+    @staticmethod
+    def _trace(parents, cell):
+        cells = []
+        while parents[cell] is not None:
+            cells.append(cell)
+            cell = parents[cell]
+        return cells
+
+    # Sel setelah a sampai b di dalam satu cluster, diurai sekali lalu disimpan
+    def _segment(self, a, b):
+        key = (a, b)
+        cells = self.segments.get(key)
+        if cells is None:
+            parents, _ = self._cluster_search(a, {b})
+            cells = self._trace(parents, b)
+            cells.reverse()
+            self.segments[key] = cells
+        return cells
+
+    # a_star biasa, statistik pencariannya tetap dicatat
+    def _flat_path(self, start, goal):
+        stats = {}
+        path = a_star(start, goal, self.grid, stats)
+        self.expanded = stats["expanded"]
+        self.open_peak = stats["open_peak"]
+        return path
+
+    # A* di graf pintu; hasilnya jalur sel seperti a_star.
+    # heading diterima agar sesuai antarmuka planner, bobot edge tetap jumlah sel
+    def find_path(self, start, goal, heading=None):
+        self.expanded = 0
+        self.open_peak = 0
+        if start == goal:
+            return []
+        grid = self.grid
+        if grid[goal[1]][goal[0]] == 1:
+            return []
+        if grid[start[1]][start[0]] == 1:
+            # Titik awal di luar jalan tidak ada di graf
+            return self._flat_path(start, goal)
+
+        goal_x, goal_y = goal
+        width = self.grid_width
+        start_cell = start[1] * width + start[0]
+        goal_cell = goal_y * width + goal_x
+        # Beda komponen jalan: tidak ada jalur, tanpa BFS cluster maupun graf pintu
+        if not grid.reachable(start_cell, goal_cell):
+            return []
+        if abs(start[0] - goal_x) + abs(start[1] - goal_y) <= LOCAL_CLUSTERS * self.cluster_size:
+            return self._flat_path(start, goal)
+
+        nodes = self.nodes
+
+        def heuristic(node):
+            y, x = divmod(nodes[node], width)
+            return abs(x - goal_x) + abs(y - goal_y)
+
+        # Hanya cluster awal dan tujuan yang dicari per sel
+        start_parents, start_distances = self._cluster_search(start_cell)
+        goal_parents, goal_distances = self._cluster_search(goal_cell)
+        goal_links = {node: goal_distances[nodes[node]]
+                      for node in self.cluster_nodes[self.cluster_of[goal_cell]]
+                      if nodes[node] in goal_distances}
+
+        g_score = {}
+        came_from = {}
+        open_heap = []
+        counter = 0
+        for node in self.cluster_nodes[self.cluster_of[start_cell]]:
+            cost = start_distances.get(nodes[node])
+            if cost is not None:
+                g_score[node] = cost
+                came_from[node] = START_NODE
+                h = heuristic(node)
+                heapq.heappush(open_heap, (cost + h, h, counter, node))
+                counter += 1
+
+        # Awal dan tujuan di cluster yang sama dan terhubung di dalamnya
+        if goal_cell in start_distances:
+            g_score[GOAL_NODE] = start_distances[goal_cell]
+            came_from[GOAL_NODE] = START_NODE
+            heapq.heappush(open_heap, (g_score[GOAL_NODE], 0, counter, GOAL_NODE))
+            counter += 1
+
+        closed_set = set()
+        while open_heap:
+            if len(open_heap) > self.open_peak:
+                self.open_peak = len(open_heap)
+            _, _, _, current = heapq.heappop(open_heap)
+            if current in closed_set:
+                continue
+            if current == GOAL_NODE:
+                return self._reconstruct(came_from, start_parents, goal_parents, goal_cell)
+            closed_set.add(current)
+            self.expanded += 1
+            current_g = g_score[current]
+
+            if current in goal_links:
+                tentative_g_score = current_g + goal_links[current]
+                if GOAL_NODE not in g_score or tentative_g_score < g_score[GOAL_NODE]:
+                    g_score[GOAL_NODE] = tentative_g_score
+                    came_from[GOAL_NODE] = current
+                    heapq.heappush(open_heap, (tentative_g_score, 0, counter, GOAL_NODE))
+                    counter += 1
+
+            for neighbor, weight in self.adjacency[current]:
+                if neighbor in closed_set:
+                    continue
+                tentative_g_score = current_g + weight
+                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                    g_score[neighbor] = tentative_g_score
+                    came_from[neighbor] = current
+                    h = heuristic(neighbor)
+                    heapq.heappush(open_heap, (tentative_g_score + h, h, counter, neighbor))
+                    counter += 1
+        return []
+
+    def _reconstruct(self, came_from, start_parents, goal_parents, goal_cell):
+        nodes = self.nodes
+        cluster_of = self.cluster_of
+        previous = came_from[GOAL_NODE]
+        if previous == START_NODE:
+            cells = self._trace(start_parents, goal_cell)
+            cells.reverse()
+        else:
+            # Node abstrak dari awal ke tujuan
+            chain = []
+            node = previous
+            while node != START_NODE:
+                chain.append(nodes[node])
+                node = came_from[node]
+            chain.reverse()
+
+            cells = self._trace(start_parents, chain[0])
+            cells.reverse()
+            for a, b in zip(chain, chain[1:]):
+                if cluster_of[a] == cluster_of[b]:
+                    cells.extend(self._segment(a, b))
+                else:
+                    # Pintu di dua cluster yang bersebelahan langsung
+                    cells.append(b)
+            # Pohon BFS tujuan berakar di tujuan: telusuri dari pintu terakhir ke sana
+            last = chain[-1]
+            while last != goal_cell:
+                last = goal_parents[last]
+                cells.append(last)
+
+        width = self.grid_width
+        path = []
+        for cell in cells:
+            y, x = divmod(cell, width)
+            path.append((x, y))
+        return path
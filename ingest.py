@@ -0,0 +1,370 @@
+import argparse
+import json
+import os
+import queue
+import random
+import socketserver
+import threading
+import time
+from collections import deque, namedtuple
+
+from courier_core import generate_map, random_position, random_job, EVENT_DELIVERED, EVENT_NO_ROUTE
+from compact_grid import CompactGrid
+from fleet import Fleet
+from scenarios import summarize
+from simulation import ROUTERS, make_planner
+from spatial_index import CourierIndex, suggest_bucket_size
+
+# Pipeline pesanan streaming: reader (tail file JSONL atau socket lokal) mem-parse
+# setiap baris menjadi Order lalu memasukkannya ke antrean terbatas. Dispatcher di
+# loop simulasi hanya mengambil pesanan selama ada kurir menganggur, jadi saat
+# armada penuh antrean ikut penuh dan reader tertahan (backpressure) alih-alih
+# menumpuk pesanan di memori.
+#
+# Format baris: {"id": 1, "source": [x, y], "dest": [x, y]}
+
+DEFAULT_QUEUE_SIZE = 10000
+DISPATCH_BATCH = 1000           # Maksimum pesanan yang di-dispatch per tick
+LATENCY_HISTORY = 100000        # Jumlah sampel latensi terakhir untuk persentil
+PUT_TIMEOUT = 0.1               # Interval cek stop selama reader tertahan antrean penuh
+TAIL_POLL_INTERVAL = 0.05
+# Rute armada lewat graf jalan terkompresi: di peta generate (jalan selebar satu sel)
+# graf simpang jauh lebih kecil dari grid, sekitar 2x lebih cepat dari a_star per rute
+DEFAULT_ROUTER = "graph"
+
+# received = waktu perf_counter saat pesanan dibaca (untuk latensi dispatch)
+Order = namedtuple("Order", ["order_id", "source", "dest", "received"])
+
+def parse_order(line, received=None):
+    data = json.loads(line)
+    source = tuple(data["source"])
+    dest = tuple(data["dest"])
+    if len(source) != 2 or len(dest) != 2:
+        raise ValueError(f"Koordinat pesanan tidak valid: {line!r}")
+    if received is None:
+        received = time.perf_counter()
+    return Order(data.get("id"), (int(source[0]), int(source[1])), (int(dest[0]), int(dest[1])), received)
+
+def format_order(order_id, source, dest):
+    return json.dumps({"id": order_id, "source": list(source), "dest": list(dest)})
+
+# Masukkan pesanan ke antrean, tertahan selama antrean penuh; False jika reader dihentikan
+def offer(order_queue, order, stop_event):
+    while not stop_event.is_set():
+        try:
+            order_queue.put(order, timeout=PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+# Dasar reader: parse baris lalu masukkan ke antrean (tertahan jika penuh)
+class OrderReader(threading.Thread):
+    def __init__(self, name, order_queue):
+        super().__init__(name=name, daemon=True)
+        self.order_queue = order_queue
+        self.stop_event = threading.Event()
+        self.received = 0
+        self.invalid = 0
+
+    # False jika reader dihentikan selama menunggu antrean
+    def handle_line(self, line):
+        if not line.strip():
+            return True
+        try:
+            order = parse_order(line)
+        except (ValueError, KeyError, TypeError):
+            self.invalid += 1
+            return True
+        self.received += 1
+        return offer(self.order_queue, order, self.stop_event)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+# Reader yang mengikuti file JSONL seperti tail -f
+class JsonlTailReader(OrderReader):
+    def __init__(self, path, order_queue, from_start=True, poll_interval=TAIL_POLL_INTERVAL):
+        super().__init__("order-tail", order_queue)
+        self.path = path
+        self.from_start = from_start
+        self.poll_interval = poll_interval
+
+    def run(self):
+        with open(self.path) as order_file:
+            if not self.from_start:
+                order_file.seek(0, os.SEEK_END)
+            partial = ""
+            while not self.stop_event.is_set():
+                line = order_file.readline()
+                if not line:
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                if not line.endswith("\n"):
+                    # Baris belum selesai ditulis: gabungkan dengan bacaan berikutnya
+                    partial += line
+                    continue
+                line = partial + line
+                partial = ""
+                if not self.handle_line(line):
+                    break
+
+
+# Reader socket TCP lokal: setiap koneksi mengirim baris JSON. Selama antrean
+# penuh handler berhenti membaca, sehingga pengirim tertahan oleh flow control TCP
+class SocketReader(OrderReader):
+    def __init__(self, host, port, order_queue):
+        super().__init__("order-socket", order_queue)
+        reader = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw_line in self.rfile:
+                    if not reader.handle_line(raw_line.decode()):
+                        break
+
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+
+    def run(self):
+        self.server.serve_forever(poll_interval=PUT_TIMEOUT)
+
+    def stop(self):
+        self.stop_event.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# Dispatcher: pesanan dari antrean -> kurir menganggur terdekat (Manhattan) ke titik
+# pengambilan, lalu rute lewat planner armada. Jarak jalan tidak dihitung terpisah;
+# di CompactGrid hanya kurir di komponen jalan yang sama yang dipilih. Pesanan yang
+# belum punya kurir menganggur terhubung (atau gagal dirutekan) kembali ke pending
+class Dispatcher:
+    def __init__(self, fleet, order_queue, batch=DISPATCH_BATCH):
+        self.fleet = fleet
+        self.order_queue = order_queue
+        self.batch = batch
+        grid = fleet.grid
+        grid_width = len(grid[0])
+        grid_height = len(grid)
+        # Hanya kurir menganggur yang diindeks; posisinya tidak berubah selama menganggur
+        self.idle = CourierIndex(grid_width, grid_height, suggest_bucket_size(grid_width, grid_height, len(fleet)))
+        for i in range(len(fleet)):
+            if not fleet.moving[i]:
+                self.idle.insert(i, fleet.x[i], fleet.y[i])
+        # Label komponen jalan (None = grid list of list, semua dianggap terhubung) dan
+        # komponen yang punya kurir: kurir tidak pernah pindah komponen
+        self.labels = grid.components() if isinstance(grid, CompactGrid) else None
+        if self.labels is not None:
+            self.courier_components = {self.labels[fleet.y[i] * grid_width + fleet.x[i]] for i in range(len(fleet))}
+        self.pending = deque()      # Pesanan yang sudah diambil dari antrean saat menunggu
+        self.orders = {}            # indeks kurir -> Order yang sedang dikerjakan
+
+        # Statistik
+        self.ticks = 0
+        self.dispatched = 0
+        self.deliveries = 0
+        self.failed = 0
+        self.invalid = 0
+        self.peak_depth = 0
+        self.latencies = deque(maxlen=LATENCY_HISTORY)
+        self.start_time = time.perf_counter()
+
+    def _is_road(self, position):
+        x, y = position
+        grid = self.fleet.grid
+        return 0 <= x < len(grid[0]) and 0 <= y < len(grid) and grid[y][x] != 1
+
+    # Label komponen titik (x, y), atau None jika grid tidak punya label
+    def _component(self, position):
+        if self.labels is None:
+            return None
+        x, y = position
+        return self.labels[y * len(self.fleet.grid[0]) + x]
+
+    # Ambil paling banyak batch pesanan selama ada kurir menganggur; kembalikan jumlah yang di-dispatch
+    def dispatch(self):
+        depth = self.order_queue.qsize()
+        if depth > self.peak_depth:
+            self.peak_depth = depth
+        fleet = self.fleet
+        idle = self.idle
+        pending = self.pending
+        labels = self.labels
+        grid_width = len(fleet.grid[0])
+        deferred = []
+        dispatched = 0
+        for _ in range(self.batch):
+            if not idle:
+                break
+            if pending:
+                order = pending.popleft()
+            else:
+                try:
+                    order = self.order_queue.get_nowait()
+                except queue.Empty:
+                    break
+            if not (self._is_road(order.source) and self._is_road(order.dest)):
+                self.invalid += 1
+                continue
+            accept = None
+            label = self._component(order.source)
+            if label is not None:
+                # Tujuan di komponen lain atau tidak ada kurir di komponen ini: tidak akan pernah terantar
+                if label != self._component(order.dest) or label not in self.courier_components:
+                    self.invalid += 1
+                    continue
+                # Semua kurir di satu komponen (peta generate): tidak perlu cek per kandidat
+                if len(self.courier_components) > 1:
+                    accept = lambda key: labels[fleet.y[key] * grid_width + fleet.x[key]] == label
+            found = idle.nearest(*order.source, accept=accept)
+            if not found:
+                deferred.append(order)
+                continue
+            _, index = found[0]
+            idle.remove(index)
+            fleet.has_package[index] = 0
+            if not fleet.assign_job(index, order.source, order.dest):
+                self.failed += 1
+                idle.insert(index, fleet.x[index], fleet.y[index])
+                deferred.append(order)
+                continue
+            self.orders[index] = order
+            self.latencies.append(time.perf_counter() - order.received)
+            dispatched += 1
+        # Pesanan yang ditunda dicoba lagi tick berikutnya, di belakang pending yang lain
+        pending.extend(deferred)
+        self.dispatched += dispatched
+        return dispatched
+
+    def step(self):
+        self.ticks += 1
+        self.dispatch()
+        events = self.fleet.step()
+        for index, event in events:
+            if event == EVENT_DELIVERED:
+                self.deliveries += 1
+                del self.orders[index]
+                self.idle.insert(index, self.fleet.x[index], self.fleet.y[index])
+            elif event == EVENT_NO_ROUTE:
+                self.failed += 1
+                self.fleet.has_package[index] = 0
+                del self.orders[index]
+                self.idle.insert(index, self.fleet.x[index], self.fleet.y[index])
+        return events
+
+    # Semua kurir menganggur dan tidak ada pesanan: tunggu pesanan berikutnya tanpa memutar CPU
+    def wait_for_orders(self, timeout):
+        if self.pending or len(self.idle) < len(self.fleet):
+            return
+        try:
+            self.pending.append(self.order_queue.get(timeout=timeout))
+        except queue.Empty:
+            pass
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.start_time
+        return {
+            "ticks": self.ticks,
+            "queue_depth": self.order_queue.qsize() + len(self.pending),
+            "peak_queue_depth": self.peak_depth,
+            "in_progress": len(self.orders),
+            "dispatched": self.dispatched,
+            "deliveries": self.deliveries,
+            "failed": self.failed,
+            "invalid": self.invalid,
+            "elapsed": elapsed,
+            "dispatched_per_second": self.dispatched / elapsed if elapsed else 0.0,
+            "deliveries_per_second": self.deliveries / elapsed if elapsed else 0.0,
+            "dispatch_latency_ms": summarize([latency * 1000 for latency in self.latencies]),
+        }
+
+
+# Tulis count pesanan acak (valid untuk grid) ke file JSONL
+def write_orders(path, grid, count, rng=None):
+    with open(path, "w") as order_file:
+        for order_id in range(count):
+            source, dest = random_job(grid, rng)
+            order_file.write(format_order(order_id, source, dest) + "\n")
+
+def _print_stats(stats):
+    latency = stats["dispatch_latency_ms"]
+    print(f"t={stats['elapsed']:.1f}s antrean {stats['queue_depth']} (puncak {stats['peak_queue_depth']}), "
+          f"dispatch {stats['dispatched']} ({stats['dispatched_per_second']:.0f}/s), "
+          f"diantar {stats['deliveries']} ({stats['deliveries_per_second']:.0f}/s), "
+          f"latensi p50 {latency.get('p50', 0):.2f} ms p99 {latency.get('p99', 0):.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest pesanan streaming (file JSONL atau socket) ke armada kurir")
+    parser.add_argument("--file", default=None, help="file JSONL yang diikuti (tail)")
+    parser.add_argument("--port", type=int, default=None, help="port socket TCP lokal")
+    parser.add_argument("--host", default="127.0.0.1", help="host socket")
+    parser.add_argument("--write-orders", type=int, default=None,
+                        help="tulis sejumlah pesanan acak ke --file lalu keluar")
+    parser.add_argument("--couriers", type=int, default=1000, help="jumlah kurir")
+    parser.add_argument("--width", type=int, default=150, help="lebar grid")
+    parser.add_argument("--height", type=int, default=100, help="tinggi grid")
+    parser.add_argument("--seed", type=int, default=0, help="seed peta (pesanan dan ingest harus sama)")
+    parser.add_argument("--router", choices=ROUTERS, default=DEFAULT_ROUTER, help="algoritma pencarian jalur armada")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="kapasitas antrean")
+    parser.add_argument("--duration", type=float, default=None, help="berhenti setelah sekian detik")
+    parser.add_argument("--deliveries", type=int, default=None, help="berhenti setelah sekian pengiriman")
+    parser.add_argument("--report-interval", type=float, default=1.0, help="interval laporan (detik)")
+    args = parser.parse_args()
+
+    if (args.file is None) == (args.port is None):
+        parser.error("pilih salah satu: --file atau --port")
+
+    rng = random.Random(args.seed)
+    grid, road_types, _ = generate_map(args.width, args.height, rng=rng)
+    grid = CompactGrid.from_rows(grid)
+
+    if args.write_orders is not None:
+        if args.file is None:
+            parser.error("--write-orders butuh --file")
+        write_orders(args.file, grid, args.write_orders, rng)
+        return
+
+    fleet = Fleet(grid, planner=make_planner(args.router, grid, road_types))
+    for _ in range(args.couriers):
+        fleet.add_courier(*random_position(grid, rng))
+
+    order_queue = queue.Queue(maxsize=args.queue_size)
+    if args.file is not None:
+        reader = JsonlTailReader(args.file, order_queue)
+    else:
+        reader = SocketReader(args.host, args.port, order_queue)
+        print(f"Menunggu pesanan di {reader.address[0]}:{reader.address[1]}")
+    reader.start()
+
+    dispatcher = Dispatcher(fleet, order_queue)
+    next_report = time.perf_counter() + args.report_interval
+    try:
+        while True:
+            dispatcher.step()
+            dispatcher.wait_for_orders(TAIL_POLL_INTERVAL)
+            now = time.perf_counter()
+            if now >= next_report:
+                _print_stats(dispatcher.stats())
+                next_report = now + args.report_interval
+            if args.duration is not None and now - dispatcher.start_time >= args.duration:
+                break
+            if args.deliveries is not None and dispatcher.deliveries >= args.deliveries:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.stop()
+
+    stats = dispatcher.stats()
+    _print_stats(stats)
+    print(f"Pesanan dibaca: {reader.received} (tidak valid: {reader.invalid + stats['invalid']}), "
+          f"gagal rute: {stats['failed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import json
+import time
+from collections import deque
+
+# Instrumentasi jalur panas loop utama: waktu frame, langkah simulasi,
+# render, dan statistik setiap pencarian jalur. Saat tidak aktif setiap
+# pemanggilan langsung kembali, sehingga overhead-nya hanya satu pemanggilan method.
+
+# Jumlah frame terakhir untuk rata-rata di HUD
+HUD_HISTORY = 30
+
+class Instrumentation:
+    def __init__(self, export_path=None, history=HUD_HISTORY):
+        self.enabled = False
+        self.export_path = export_path      # File JSON lines; None = tidak diekspor
+        self.export_file = None
+        self.frames = deque(maxlen=history)
+        self.last_search = None
+        self.frame_count = 0
+
+        self.frame = None
+        self.frame_start = None
+        self.lap_start = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        if self.enabled:
+            self.frames.clear()
+            self.frame = None
+            self.frame_start = None
+            if self.export_path is not None and self.export_file is None:
+                self.export_file = open(self.export_path, "a")
+        elif self.export_file is not None:
+            self.export_file.close()
+            self.export_file = None
+        return self.enabled
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        # Waktu frame = jarak antar awal frame (termasuk menunggu clock.tick)
+        if self.frame is not None:
+            self.frame["frame_ms"] = (now - self.frame_start) * 1000
+            self._finish_frame()
+        self.frame_count += 1
+        self.frame = {"frame": self.frame_count, "time": time.time(), "searches": []}
+        self.frame_start = now
+        self.lap_start = now
+
+    # Catat waktu sejak lap sebelumnya sebagai bagian frame (misal "sim", "render")
+    def lap(self, section):
+        if not self.enabled or self.frame is None:
+            return
+        now = time.perf_counter()
+        self.frame[f"{section}_ms"] = (now - self.lap_start) * 1000
+        self.lap_start = now
+
+    def record_search(self, elapsed, expanded, open_peak, path_length):
+        if not self.enabled:
+            return
+        search = {
+            "ms": elapsed * 1000,
+            "expanded": expanded,
+            "open_peak": open_peak,
+            "path_length": path_length,
+        }
+        self.last_search = search
+        if self.frame is not None:
+            self.frame["searches"].append(search)
+
+    def _finish_frame(self):
+        self.frames.append(self.frame)
+        if self.export_file is not None:
+            self.export_file.write(json.dumps(self.frame) + "\n")
+
+    def close(self):
+        if self.export_file is not None:
+            self.export_file.close()
+            self.export_file = None
+
+    # Planner (start, goal, heading) yang mencatat statistik pencarian RoadGraph
+    def graph_planner(self, get_graph):
+        def find_path(start, goal, heading=None):
+            road_graph = get_graph()
+            if not self.enabled:
+                return road_graph.find_path(start, goal, heading)
+            start_time = time.perf_counter()
+            path = road_graph.find_path(start, goal, heading)
+            self.record_search(time.perf_counter() - start_time, road_graph.expanded,
+                               road_graph.open_peak, len(path))
+            return path
+        return find_path
+
+    def _average(self, key):
+        values = [frame[key] for frame in self.frames if key in frame]
+        return sum(values) / len(values) if values else 0.0
+
+    # Baris teks HUD (kosong jika tidak aktif)
+    def hud_lines(self):
+        if not self.enabled:
+            return []
+        lines = [
+            f"Frame: {self._average('frame_ms'):.1f} ms (sim {self._average('sim_ms'):.2f}, "
+            f"render {self._average('render_ms'):.2f}, event {self._average('events_ms'):.2f})"
+        ]
+        search = self.last_search
+        if search is not None:
+            lines.append(f"Path: {search['ms']:.2f} ms, expanded {search['expanded']}, "
+                         f"open peak {search['open_peak']}, length {search['path_length']}")
+        return lines
@@ -0,0 +1,161 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+
+from compact_grid import CompactGrid
+from map_loader import (MAP_TILE_SIZE, ROAD_COLOR_MIN, ROAD_COLOR_MAX, ROAD_PIXEL_RATIO,
+                        load_grid_from_image)
+
+# Cache peta terkompilasi: hasil konversi gambar (grid, tipe jalan, orientasi)
+# disimpan sebagai file biner ringkas dengan nama dari hash isi gambar dan
+# ukuran tile. Peta yang pernah dimuat cukup dibaca lewat mmap tanpa
+# mendekode gambar dan tanpa klasifikasi ulang.
+#
+# Format file (little endian):
+#   header  : magic "SCMP", versi (H), flag (H), lebar grid (I), tinggi grid (I), ukuran tile (I)
+#   sel     : lebar * tinggi byte (0 = jalan, 1 = blok), urut baris
+#   tipe    : lebar * tinggi byte (ROAD_TYPES)
+#   orientasi: lebar * tinggi byte (derajat // 90)
+#   mask    : lebar * tinggi byte mask koneksi CompactGrid (jika FLAG_MASKS)
+
+CACHE_FOLDER = ".map_cache"
+CACHE_EXTENSION = ".scmap"
+CACHE_MAGIC = b"SCMP"
+CACHE_VERSION = 1           # Naikkan jika format atau konversi gambar berubah
+HEADER = struct.Struct("<4sHHIII")
+
+# Data routing tambahan yang ikut disimpan
+FLAG_MASKS = 1
+
+# Orientasi disimpan sebagai kelipatan 90 derajat agar muat dalam satu byte
+ORIENTATION_STEP = 90
+STEP_ORIENTATIONS = tuple(step * ORIENTATION_STEP for step in range(4))
+
+SUPPORTED_IMAGE_FORMATS = (".png", ".jpg", ".jpeg", ".bmp")
+
+# Hash isi gambar beserta parameter konversi, jadi perubahan batas warna juga membuat kunci baru
+def image_hash(image_path):
+    digest = hashlib.sha1(f"{ROAD_COLOR_MIN},{ROAD_COLOR_MAX},{ROAD_PIXEL_RATIO}".encode())
+    with open(image_path, "rb") as image_file:
+        for block in iter(lambda: image_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cache_path(image_path, tile_size=MAP_TILE_SIZE, cache_folder=CACHE_FOLDER):
+    return os.path.join(cache_folder, f"{image_hash(image_path)}_{tile_size}{CACHE_EXTENSION}")
+
+# Tulis peta terkompilasi; file sementara lalu os.replace agar pembaca tidak melihat file setengah jadi
+def write_compiled(path, grid, road_types, road_orientations, tile_size, masks=None):
+    grid_width = len(grid[0])
+    grid_height = len(grid)
+    flags = FLAG_MASKS if masks is not None else 0
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as cache_file:
+        cache_file.write(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, flags, grid_width, grid_height, tile_size))
+        cache_file.write(b"".join(bytes(row) for row in grid))
+        cache_file.write(b"".join(bytes(row) for row in road_types))
+        cache_file.write(b"".join(bytes(orientation // ORIENTATION_STEP for orientation in row)
+                                  for row in road_orientations))
+        if masks is not None:
+            cache_file.write(bytes(masks))
+    os.replace(temp_path, path)
+
+def _rows(plane, grid_width, grid_height):
+    return [list(plane[y * grid_width:(y + 1) * grid_width]) for y in range(grid_height)]
+
+def _orientation_rows(steps, grid_width, grid_height):
+    return [list(map(STEP_ORIENTATIONS.__getitem__, steps[y * grid_width:(y + 1) * grid_width]))
+            for y in range(grid_height)]
+
+# Baca peta terkompilasi lewat mmap sebagai bidang byte urut baris, tanpa diubah ke list:
+# (lebar, tinggi, sel, tipe jalan, orientasi // 90, masks atau None).
+# None jika file tidak ada, rusak, atau versinya berbeda.
+def read_compiled(path):
+    try:
+        cache_file = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with cache_file:
+        try:
+            data = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None     # File kosong
+        with data:
+            if len(data) < HEADER.size:
+                return None
+            magic, version, flags, grid_width, grid_height, _ = HEADER.unpack_from(data)
+            cell_count = grid_width * grid_height
+            planes = 4 if flags & FLAG_MASKS else 3
+            if magic != CACHE_MAGIC or version != CACHE_VERSION or len(data) != HEADER.size + planes * cell_count:
+                return None
+
+            offset = HEADER.size
+            cells = data[offset:offset + cell_count]
+            offset += cell_count
+            road_types = data[offset:offset + cell_count]
+            offset += cell_count
+            steps = data[offset:offset + cell_count]
+            offset += cell_count
+            masks = data[offset:offset + cell_count] if flags & FLAG_MASKS else None
+    return grid_width, grid_height, cells, road_types, steps, masks
+
+# Konversi gambar dan simpan hasilnya (beserta mask koneksi) ke cache; hasilnya
+# dalam bentuk yang sama dengan read_compiled
+def compile_map(image_path, tile_size=MAP_TILE_SIZE, cache_folder=CACHE_FOLDER, path=None):
+    grid, road_types, road_orientations = load_grid_from_image(image_path, tile_size)
+    compact = CompactGrid.from_rows(grid)
+    os.makedirs(cache_folder, exist_ok=True)
+    if path is None:
+        path = cache_path(image_path, tile_size, cache_folder)
+    write_compiled(path, grid, road_types, road_orientations, tile_size, compact.masks)
+    steps = b"".join(bytes(orientation // ORIENTATION_STEP for orientation in row) for row in road_orientations)
+    return (compact.width, compact.height, bytes(compact.cells), b"".join(bytes(row) for row in road_types),
+            steps, bytes(compact.masks))
+
+def _load(image_path, tile_size, cache_folder):
+    path = cache_path(image_path, tile_size, cache_folder)
+    compiled = read_compiled(path)
+    if compiled is None:
+        compiled = compile_map(image_path, tile_size, cache_folder, path)
+    return compiled
+
+# Pengganti load_grid_from_image: baca dari cache jika gambar yang sama pernah dikompilasi
+def load_map(image_path, tile_size=MAP_TILE_SIZE, cache_folder=CACHE_FOLDER):
+    grid_width, grid_height, cells, road_types, steps, _ = _load(image_path, tile_size, cache_folder)
+    return (_rows(cells, grid_width, grid_height), _rows(road_types, grid_width, grid_height),
+            _orientation_rows(steps, grid_width, grid_height))
+
+# Sama seperti load_map, tetapi grid langsung berupa CompactGrid dari bidang sel dan
+# mask di cache (tanpa list per baris dan tanpa menghitung ulang mask)
+def load_compact_map(image_path, tile_size=MAP_TILE_SIZE, cache_folder=CACHE_FOLDER):
+    grid_width, grid_height, cells, road_types, steps, masks = _load(image_path, tile_size, cache_folder)
+    grid = CompactGrid(grid_width, grid_height, bytearray(cells), masks)
+    return (grid, _rows(road_types, grid_width, grid_height),
+            _orientation_rows(steps, grid_width, grid_height))
+
+# Kompilasi semua gambar peta di folder yang belum ada di cache; kembalikan jumlah yang dikompilasi
+def precompile_maps(map_folder, tile_size=MAP_TILE_SIZE, cache_folder=CACHE_FOLDER):
+    if not os.path.isdir(map_folder):
+        return 0
+    compiled = 0
+    for file in sorted(os.listdir(map_folder)):
+        image_path = os.path.join(map_folder, file)
+        if not os.path.isfile(image_path) or os.path.splitext(file)[1].lower() not in SUPPORTED_IMAGE_FORMATS:
+            continue
+        try:
+            path = cache_path(image_path, tile_size, cache_folder)
+            if not os.path.exists(path):
+                compile_map(image_path, tile_size, cache_folder, path)
+                compiled += 1
+        except Exception as e:
+            print(f"Gagal mengompilasi peta {image_path}: {e}")
+    return compiled
+
+# Jalankan precompile_maps di thread latar (daemon) agar tidak menahan startup
+def start_precompile(map_folder, tile_size=MAP_TILE_SIZE, cache_folder=CACHE_FOLDER):
+    thread = threading.Thread(target=precompile_maps, args=(map_folder, tile_size, cache_folder),
+                              name="map-precompile", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,97 @@
+import pygame
+
+from courier_core import classify_roads
+
+# Konversi surface array sekaligus butuh numpy (pygame.surfarray bergantung padanya)
+try:
+    import numpy as np
+    import pygame.surfarray
+except ImportError:
+    np = None
+
+# Konfigurasi konversi gambar peta ke grid
+MAP_TILE_SIZE = 10          # Ukuran tile (pixel) untuk peta dari gambar
+ROAD_COLOR_MIN = 90         # Batas bawah warna abu-abu jalan
+ROAD_COLOR_MAX = 150        # Batas atas warna abu-abu jalan
+ROAD_PIXEL_RATIO = 0.25     # Tile dianggap jalan jika >25% pixel-nya jalan
+BAND_TILE_ROWS = 64         # Jumlah baris tile per pita saat konversi array
+
+# Ukuran peta minimum (pixel); tidak ada batas atas karena peta dilihat lewat kamera
+MIN_MAP_WIDTH = 1000
+MIN_MAP_HEIGHT = 700
+
+# Validasi ukuran peta (pixel)
+def is_valid_map_size(map_width, map_height):
+    return map_width >= MIN_MAP_WIDTH and map_height >= MIN_MAP_HEIGHT
+
+# Konversi gambar ke grid dengan memeriksa banyak pixel per tile
+def image_to_grid(map_image, tile_size):
+    if np is not None:
+        return _image_to_grid_array(map_image, tile_size)
+    return _image_to_grid_pixels(map_image, tile_size)
+
+# Versi array: pixel diproses per pita baris tile lewat pygame.surfarray,
+# sehingga memori sementara tidak bergantung pada tinggi gambar
+def _image_to_grid_array(map_image, tile_size):
+    grid_width = map_image.get_width() // tile_size
+    grid_height = map_image.get_height() // tile_size
+    grid = []
+
+    for band_y in range(0, grid_height, BAND_TILE_ROWS):
+        band_rows = min(BAND_TILE_ROWS, grid_height - band_y)
+        band = map_image.subsurface((0, band_y * tile_size, grid_width * tile_size, band_rows * tile_size))
+
+        # array3d berindeks [x][y][rgb]
+        rgb = pygame.surfarray.array3d(band)
+        is_road_pixel = ((rgb >= ROAD_COLOR_MIN) & (rgb <= ROAD_COLOR_MAX)).all(axis=2)
+
+        # Hitung pixel jalan per tile dengan reshape ke (tile_x, px, tile_y, py)
+        road_pixels = is_road_pixel.reshape(grid_width, tile_size, band_rows, tile_size).sum(axis=(1, 3))
+        is_road_tile = road_pixels > (tile_size ** 2 * ROAD_PIXEL_RATIO)
+
+        # Transpose ke [y][x]; 0 = jalan, 1 = bukan jalan
+        grid.extend(np.where(is_road_tile.T, 0, 1).tolist())
+    return grid
+
+# Versi per pixel (fallback jika numpy tidak tersedia)
+def _image_to_grid_pixels(map_image, tile_size):
+    map_width = map_image.get_width()
+    map_height = map_image.get_height()
+    grid_width = map_width // tile_size
+    grid_height = map_height // tile_size
+    grid = [[1 for _ in range(grid_width)] for _ in range(grid_height)]
+
+    for y in range(grid_height):
+        for x in range(grid_width):
+            road_pixels = 0
+            # Periksa semua pixel dalam tile saat ini
+            for py in range(tile_size):
+                for px in range(tile_size):
+                    pixel_x = x * tile_size + px
+                    pixel_y = y * tile_size + py
+                    if 0 <= pixel_x < map_width and 0 <= pixel_y < map_height:
+                        r, g, b, _ = map_image.get_at((pixel_x, pixel_y))
+                        # Jika warna abu-abu (90-150), anggap sebagai jalan
+                        if (ROAD_COLOR_MIN <= r <= ROAD_COLOR_MAX and ROAD_COLOR_MIN <= g <= ROAD_COLOR_MAX
+                                and ROAD_COLOR_MIN <= b <= ROAD_COLOR_MAX):
+                            road_pixels += 1
+
+            # Jika >25% pixel dalam tile adalah jalan, set sebagai jalan (0)
+            if road_pixels > (tile_size ** 2 * ROAD_PIXEL_RATIO):
+                grid[y][x] = 0
+            else:
+                grid[y][x] = 1
+
+    return grid
+
+# Muat peta dari gambar tanpa menyentuh layar (untuk simulasi tanpa layar)
+def load_grid_from_image(image_path, tile_size=MAP_TILE_SIZE):
+    map_image = pygame.image.load(image_path)
+    map_width = map_image.get_width()
+    map_height = map_image.get_height()
+    if not is_valid_map_size(map_width, map_height):
+        raise ValueError(f"Ukuran peta tidak valid: {map_width}x{map_height}. Minimal {MIN_MAP_WIDTH}x{MIN_MAP_HEIGHT}")
+
+    grid = image_to_grid(map_image, tile_size)
+    road_types, road_orientations = classify_roads(grid)
+    return grid, road_types, road_orientations
@@ -0,0 +1,118 @@
+import threading
+from collections import namedtuple
+
+from compact_grid import CompactGrid
+from courier_core import generate_map, random_job, random_position
+from hierarchy import HierarchicalGraph
+from road_graph import RoadGraph
+
+# Muat/buat peta di thread latar agar loop pygame tetap menggambar peta lama.
+# Semua yang mahal (konversi gambar, klasifikasi jalan, graf jalan, posisi
+# kurir dan paket) disiapkan di worker sebagai satu MapState, lalu loop utama
+# menggantinya sekaligus setelah selesai.
+
+# Semua keadaan yang berganti bersama peta baru
+MapState = namedtuple("MapState", [
+    "name", "grid", "road_types", "road_orientations", "tile_size",
+    "road_graph", "source", "dest", "courier_position",
+])
+
+def _report(report, stage, progress):
+    if report is not None:
+        report(stage, progress)
+
+# graph_class(grid, road_types) membangun router peta (punya find_path, expanded, open_peak);
+# graph_label tampil di indikator progres. rng = random.Random milik worker ini
+# (None = modul random global)
+def _build_state(name, grid, road_types, road_orientations, tile_size, report, graph_class=RoadGraph,
+                 rng=None, graph_label="graf jalan"):
+    # CompactGrid: label komponen jalan ikut disiapkan di sini, jadi kurir dan paket
+    # selalu di komponen yang sama dan rute antar komponen langsung ditolak
+    if not isinstance(grid, CompactGrid):
+        grid = CompactGrid.from_rows(grid)
+    _report(report, "Menghitung komponen jalan", 0.5)
+    grid.components()
+    _report(report, f"Membangun {graph_label}", 0.6)
+    road_graph = graph_class(grid, road_types)
+    _report(report, "Menyiapkan kurir", 0.9)
+    courier_position = random_position(grid, rng)
+    source, dest = random_job(grid, rng, courier_position)
+    return MapState(name, grid, road_types, road_orientations, tile_size,
+                    road_graph, source, dest, courier_position)
+
+# report(tahap, 0..1) dipanggil dari thread worker untuk indikator progres.
+# Peta generate berjalan selebar satu sel, jadi memakai RoadGraph
+def generate_map_state(grid_width, grid_height, tile_size, name="Generated Map", report=None, rng=None):
+    _report(report, "Membuat peta", 0.1)
+    grid, road_types, road_orientations = generate_map(grid_width, grid_height, rng=rng)
+    return _build_state(name, grid, road_types, road_orientations, tile_size, report, rng=rng)
+
+def load_map_state(image_path, tile_size, name, report=None, rng=None):
+    # map_cache butuh pygame, jadi hanya diimpor saat peta gambar dipakai
+    from map_cache import load_compact_map
+    _report(report, "Memuat gambar peta", 0.1)
+    grid, road_types, road_orientations = load_compact_map(image_path, tile_size)
+    # RoadGraph hanya untuk peta generate: jalan di peta gambar selebar 2+ sel sehingga
+    # hampir semua sel jadi node (kompresi 1.01-1.06x, lihat road_graph). Peta gambar
+    # selalu memakai HierarchicalGraph, yang ukurannya hanya bergantung pada jumlah cluster
+    return _build_state(name, grid, road_types, road_orientations, tile_size, report,
+                        lambda grid, road_types: HierarchicalGraph(grid), rng, "graf HPA* (jalan lebar)")
+
+class MapWorker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.label = None
+        self.stage = None
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+
+    def busy(self):
+        return self.thread is not None
+
+    # Jalankan build(report) di thread latar; False jika masih ada pekerjaan berjalan
+    def start(self, label, build):
+        if self.busy():
+            return False
+        self.label = label
+        self.stage = "Menunggu"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(target=self._run, args=(build,), name="map-worker", daemon=True)
+        self.thread.start()
+        return True
+
+    def _run(self, build):
+        try:
+            result = build(self._set_progress)
+            error = None
+        except Exception as e:
+            result = None
+            error = e
+        with self.lock:
+            self.result = result
+            self.error = error
+            self.stage = "Selesai"
+            self.progress = 1.0
+
+    def _set_progress(self, stage, progress):
+        with self.lock:
+            self.stage = stage
+            self.progress = progress
+
+    # (label, tahap, progres) selama pekerjaan berjalan, None jika tidak ada
+    def status(self):
+        if not self.busy():
+            return None
+        with self.lock:
+            return self.label, self.stage, self.progress
+
+    # Ambil hasil jika thread sudah selesai: (MapState atau None, error atau None); None jika belum
+    def poll(self):
+        if self.thread is None or self.thread.is_alive():
+            return None
+        self.thread.join()
+        self.thread = None
+        return self.result, self.error
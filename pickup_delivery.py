@@ -0,0 +1,270 @@
+import argparse
+import random
+import time
+
+from courier_core import generate_map, random_position, random_job
+from dispatch import UNREACHABLE, road_neighbors, distance_field, _cost_rows_array
+
+# Matriks jarak lewat BFS bitset numpy (sama dengan dispatch) jika tersedia
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Optimasi urutan kunjungan untuk kurir yang membawa banyak paket sekaligus
+# (pickup-and-delivery dengan kapasitas). Setiap paket punya dua titik:
+# pickup harus dikunjungi sebelum delivery-nya, dan jumlah paket yang
+# dibawa tidak boleh melebihi kapasitas.
+#
+# Node: 0 = posisi awal kurir, 2i+1 = pickup paket i, 2i+2 = delivery paket i
+
+DEFAULT_TIME_BUDGET = 0.02  # detik untuk perbaikan local search
+
+def _is_pickup(node):
+    return node % 2 == 1
+
+def _job_of(node):
+    return (node - 1) // 2
+
+# Matriks jarak antar semua titik (BFS per titik, berhenti jika semua titik sudah terjangkau).
+# Dengan numpy semua titik di-BFS sekaligus seperti job_cost_matrix
+def stop_distance_matrix(grid, points, neighbors=None):
+    if np is not None:
+        fields = _cost_rows_array(grid, list(dict.fromkeys(points)), points)
+        return [fields[point] for point in points]
+    grid_width = len(grid[0])
+    if neighbors is None:
+        neighbors = road_neighbors(grid)
+    cells = [y * grid_width + x for x, y in points]
+    targets = set(cells)
+
+    fields = {}
+    matrix = []
+    for point, cell in zip(points, cells):
+        row = fields.get(cell)
+        if row is None:
+            distances = distance_field(neighbors, grid_width, point, targets)
+            row = [distances[other] if distances[other] >= 0 else UNREACHABLE for other in cells]
+            fields[cell] = row
+        matrix.append(row)
+    return matrix
+
+# Urutan layak jika setiap pickup mendahului delivery-nya dan muatan <= kapasitas
+def is_feasible(sequence, capacity):
+    picked = set()
+    load = 0
+    for node in sequence:
+        job = _job_of(node)
+        if _is_pickup(node):
+            load += 1
+            if load > capacity:
+                return False
+            picked.add(job)
+        else:
+            if job not in picked:
+                return False
+            load -= 1
+    return True
+
+def route_cost(sequence, distances):
+    cost = 0
+    previous = 0
+    for node in sequence:
+        cost += distances[previous][node]
+        previous = node
+    return cost
+
+# Konstruksi awal: selalu kunjungi titik layak terdekat
+def nearest_feasible_sequence(num_jobs, capacity, distances):
+    sequence = []
+    picked = [False] * num_jobs
+    delivered = [False] * num_jobs
+    load = 0
+    current = 0
+    for _ in range(2 * num_jobs):
+        best = None
+        best_distance = None
+        row = distances[current]
+        for job in range(num_jobs):
+            if delivered[job]:
+                continue
+            if picked[job]:
+                node = 2 * job + 2
+            elif load < capacity:
+                node = 2 * job + 1
+            else:
+                continue
+            if best is None or row[node] < best_distance:
+                best = node
+                best_distance = row[node]
+        job = _job_of(best)
+        if _is_pickup(best):
+            picked[job] = True
+            load += 1
+        else:
+            delivered[job] = True
+            load -= 1
+        sequence.append(best)
+        current = best
+    return sequence
+
+# Or-opt: pindahkan satu titik ke posisi lain jika lebih murah dan tetap layak
+def _or_opt_pass(sequence, capacity, distances, deadline):
+    improved = False
+    n = len(sequence)
+    for i in range(n):
+        if time.perf_counter() > deadline:
+            break
+        node = sequence[i]
+        previous = sequence[i - 1] if i > 0 else 0
+        following = sequence[i + 1] if i + 1 < n else None
+        # Biaya yang dihemat dengan mengeluarkan titik dari posisi i
+        removal_gain = distances[previous][node]
+        if following is not None:
+            removal_gain += distances[node][following] - distances[previous][following]
+
+        rest = sequence[:i] + sequence[i + 1:]
+        best_delta = 0
+        best_position = None
+        for j in range(len(rest) + 1):
+            if j == i:
+                continue
+            before = rest[j - 1] if j > 0 else 0
+            after = rest[j] if j < len(rest) else None
+            insertion_cost = distances[before][node]
+            if after is not None:
+                insertion_cost += distances[node][after] - distances[before][after]
+            delta = insertion_cost - removal_gain
+            if delta < best_delta:
+                candidate = rest[:j] + [node] + rest[j:]
+                if is_feasible(candidate, capacity):
+                    best_delta = delta
+                    best_position = j
+        if best_position is not None:
+            sequence[:] = rest[:best_position] + [node] + rest[best_position:]
+            improved = True
+    return improved
+
+# Pindahkan pasangan pickup+delivery satu paket sekaligus ke posisi terbaik
+def _pair_relocate_pass(sequence, capacity, distances, deadline):
+    improved = False
+    num_jobs = len(sequence) // 2
+    for job in range(num_jobs):
+        if time.perf_counter() > deadline:
+            break
+        pickup = 2 * job + 1
+        delivery = 2 * job + 2
+        current_cost = route_cost(sequence, distances)
+        rest = [node for node in sequence if node != pickup and node != delivery]
+        rest_cost = route_cost(rest, distances)
+        length = len(rest)
+
+        # Biaya tambahan menyisipkan satu titik di antara rest[k-1] dan rest[k]
+        def insertion_cost(node, k):
+            before = rest[k - 1] if k > 0 else 0
+            cost = distances[before][node]
+            if k < length:
+                cost += distances[node][rest[k]] - distances[before][rest[k]]
+            return cost
+
+        pickup_costs = [insertion_cost(pickup, k) for k in range(length + 1)]
+        delivery_costs = [insertion_cost(delivery, k) for k in range(length + 1)]
+        best_cost = current_cost
+        best_position = None
+        for i in range(length + 1):
+            for j in range(i, length + 1):
+                if i == j:
+                    # Pickup langsung diikuti delivery di posisi yang sama
+                    before = rest[i - 1] if i > 0 else 0
+                    cost = rest_cost + distances[before][pickup] + distances[pickup][delivery]
+                    if i < length:
+                        cost += distances[delivery][rest[i]] - distances[before][rest[i]]
+                else:
+                    cost = rest_cost + pickup_costs[i] + delivery_costs[j]
+                if cost < best_cost:
+                    candidate = rest[:i] + [pickup] + rest[i:j] + [delivery] + rest[j:]
+                    if is_feasible(candidate, capacity):
+                        best_cost = cost
+                        best_position = (i, j)
+        if best_position is not None:
+            i, j = best_position
+            sequence[:] = rest[:i] + [pickup] + rest[i:j] + [delivery] + rest[j:]
+            improved = True
+    return improved
+
+# 2-opt: balik segmen i..j jika lebih murah dan tetap layak (jarak simetris)
+def _two_opt_pass(sequence, capacity, distances, deadline):
+    improved = False
+    n = len(sequence)
+    for i in range(n - 1):
+        if time.perf_counter() > deadline:
+            break
+        before = sequence[i - 1] if i > 0 else 0
+        for j in range(i + 1, n):
+            after = sequence[j + 1] if j + 1 < n else None
+            old_cost = distances[before][sequence[i]]
+            new_cost = distances[before][sequence[j]]
+            if after is not None:
+                old_cost += distances[sequence[j]][after]
+                new_cost += distances[sequence[i]][after]
+            if new_cost < old_cost:
+                candidate = sequence[:i] + sequence[i:j + 1][::-1] + sequence[j + 1:]
+                if is_feasible(candidate, capacity):
+                    sequence[:] = candidate
+                    improved = True
+    return improved
+
+# Rencanakan urutan kunjungan untuk paket [(source, dest)] dari posisi start.
+# Mengembalikan ([(indeks paket, True=pickup / False=delivery)], total jarak).
+def plan_stops(grid, start, jobs, capacity, time_budget=DEFAULT_TIME_BUDGET, neighbors=None):
+    if not jobs:
+        return [], 0
+    points = [start]
+    for source, dest in jobs:
+        points.append(source)
+        points.append(dest)
+    distances = stop_distance_matrix(grid, points, neighbors)
+    deadline = time.perf_counter() + time_budget
+
+    sequence = nearest_feasible_sequence(len(jobs), capacity, distances)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = _or_opt_pass(sequence, capacity, distances, deadline)
+        improved = _two_opt_pass(sequence, capacity, distances, deadline) or improved
+        improved = _pair_relocate_pass(sequence, capacity, distances, deadline) or improved
+
+    stops = [(_job_of(node), _is_pickup(node)) for node in sequence]
+    return stops, route_cost(sequence, distances)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uji optimasi urutan pickup/delivery")
+    parser.add_argument("--jobs", type=int, default=25, help="jumlah paket (titik = 2x paket)")
+    parser.add_argument("--capacity", type=int, default=5, help="kapasitas kurir")
+    parser.add_argument("--budget", type=float, default=DEFAULT_TIME_BUDGET, help="batas waktu local search (detik)")
+    parser.add_argument("--width", type=int, default=150, help="lebar grid")
+    parser.add_argument("--height", type=int, default=100, help="tinggi grid")
+    parser.add_argument("--seed", type=int, default=None, help="seed random")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    grid, _, _ = generate_map(args.width, args.height, rng=rng)
+    start = random_position(grid, rng)
+    jobs = [random_job(grid, rng) for _ in range(args.jobs)]
+
+    # Pembanding: satu paket per perjalanan (kapasitas 1, urutan asli)
+    points = [start]
+    for source, dest in jobs:
+        points.append(source)
+        points.append(dest)
+    distances = stop_distance_matrix(grid, points)
+    one_by_one = route_cost(list(range(1, 2 * len(jobs) + 1)), distances)
+
+    start_time = time.perf_counter()
+    stops, cost = plan_stops(grid, start, jobs, args.capacity, args.budget)
+    elapsed = time.perf_counter() - start_time
+    print(f"{len(stops)} titik, kapasitas {args.capacity}: jarak {cost} (satu per satu: {one_by_one}), {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+from collections import OrderedDict
+
+import pygame
+
+from camera import Camera
+from courier_core import ROAD_TYPES
+
+# Warna
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+YELLOW = (255, 255, 0)
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+GREEN = (0, 255, 0)
+TRANSPARENT = (0, 0, 0, 0)
+
+# Sudut rotasi tile jalan yang mungkin (lihat ORIENTATIONS)
+TILE_ROTATIONS = (0, 90, 180, 270)
+
+# Batas cache teks agar teks yang sering berubah tidak menumpuk
+TEXT_CACHE_LIMIT = 256
+
+# Peta dipanggang per chunk (sekitar CHUNK_PIXELS persegi di layar) saat pertama
+# kali terlihat; chunk yang lama tidak terlihat dibuang (LRU) agar memori terbatas
+CHUNK_PIXELS = 256
+CHUNK_CACHE_LIMIT = 128
+
+# Sudut mobil hasil interpolasi dibulatkan ke kelipatan ini agar cache rotasi tetap kecil
+CAR_ANGLE_STEP = 5
+
+# Renderer peta: hanya tile di dalam viewport kamera yang digambar. Background
+# viewport disusun dari chunk dan hanya disusun ulang jika kamera bergerak;
+# tiap frame hanya kurir, penanda, tombol dan teks yang digambar ulang
+class MapRenderer:
+    def __init__(self, road_images, sand, courier_car):
+        # road_images: {tipe jalan: surface}, dirotasi sekali untuk 4 orientasi
+        self.rotated_roads = {}
+        for road_type, road_image in road_images.items():
+            for angle in TILE_ROTATIONS:
+                self.rotated_roads[(road_type, angle)] = pygame.transform.rotate(road_image, angle)
+        self.default_road = road_images[ROAD_TYPES["INTERSECTION"]]
+        self.sand = sand
+        self.courier_car = courier_car
+        self.rotated_cars = {}
+        self.scaled_tiles = {}      # ukuran tile di layar -> (jalan terotasi, default, pasir)
+        self.font = pygame.font.Font(None, 24)
+        self.text_cache = {}
+
+        self.grid = None
+        self.road_types = None
+        self.road_orientations = None
+        self.chunks = OrderedDict()     # (cx, cy, ukuran tile) -> surface
+        self.camera = None
+        self.background = None
+        self.view_key = None
+        self.dirty_rects = []
+        self.full_redraw = True
+
+    # Siapkan peta baru; chunk tile dipanggang saat pertama kali terlihat.
+    # size = ukuran viewport untuk kamera default (tanpa geser/zoom)
+    def bake(self, grid, road_types, road_orientations, tile_size, size):
+        self.grid = grid
+        self.road_types = road_types
+        self.road_orientations = road_orientations
+        self.chunks.clear()
+        self.camera = Camera(size[0], size[1], tile_size, len(grid[0]), len(grid))
+        self.view_key = None
+        self.full_redraw = True
+
+    # Gambar tile jalan/pasir untuk ukuran tile di layar (diskalakan sekali per ukuran)
+    def _tiles(self, screen_tile):
+        tiles = self.scaled_tiles.get(screen_tile)
+        if tiles is None:
+            if self.sand.get_width() == screen_tile and self.sand.get_height() == screen_tile:
+                tiles = (self.rotated_roads, self.default_road, self.sand)
+            else:
+                size = (screen_tile, screen_tile)
+                roads = {key: pygame.transform.scale(image, size) for key, image in self.rotated_roads.items()}
+                tiles = (roads, pygame.transform.scale(self.default_road, size),
+                         pygame.transform.scale(self.sand, size))
+            self.scaled_tiles[screen_tile] = tiles
+        return tiles
+
+    def _chunk(self, cx, cy, chunk_tiles, screen_tile):
+        key = (cx, cy, screen_tile)
+        surface = self.chunks.get(key)
+        if surface is not None:
+            self.chunks.move_to_end(key)
+            return surface
+
+        grid = self.grid
+        road_types = self.road_types
+        road_orientations = self.road_orientations
+        rotated_roads, default_road, sand = self._tiles(screen_tile)
+        x0 = cx * chunk_tiles
+        y0 = cy * chunk_tiles
+        x1 = min(x0 + chunk_tiles, len(grid[0]))
+        y1 = min(y0 + chunk_tiles, len(grid))
+        surface = pygame.Surface(((x1 - x0) * screen_tile, (y1 - y0) * screen_tile))
+        surface.fill(WHITE)
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                if grid[y][x] != 1:  # Jalan
+                    road_image = rotated_roads.get((road_types[y][x], road_orientations[y][x]))
+                    if road_image is None:
+                        road_image = default_road  # Default fallback
+                    # Menyesuaikan posisi setelah rotasi agar tetap berada di tengah tile
+                    rect = road_image.get_rect(center=(((x - x0) * screen_tile) + screen_tile//2,
+                                                       ((y - y0) * screen_tile) + screen_tile//2))
+                    surface.blit(road_image, rect)
+                else:  # Blok perumahan
+                    surface.blit(sand, ((x - x0) * screen_tile, (y - y0) * screen_tile))
+
+        # Samakan format pixel dengan layar agar blit lebih cepat
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        self.chunks[key] = surface
+        if len(self.chunks) > CHUNK_CACHE_LIMIT:
+            self.chunks.popitem(last=False)
+        return surface
+
+    # Susun background viewport dari chunk yang terlihat
+    def _compose(self, camera):
+        screen_tile = camera.screen_tile
+        chunk_tiles = max(1, CHUNK_PIXELS // screen_tile)
+        background = pygame.Surface((camera.viewport_width, camera.viewport_height))
+        background.fill(WHITE)
+        x0, y0, x1, y1 = camera.visible_cells()
+        for cy in range(y0 // chunk_tiles, (y1 - 1) // chunk_tiles + 1):
+            for cx in range(x0 // chunk_tiles, (x1 - 1) // chunk_tiles + 1):
+                chunk = self._chunk(cx, cy, chunk_tiles, screen_tile)
+                background.blit(chunk, camera.cell_to_screen(cx * chunk_tiles, cy * chunk_tiles))
+        if pygame.display.get_surface() is not None:
+            background = background.convert()
+        self.background = background
+        self.view_key = camera.view_key
+
+    def render_text(self, text):
+        surface = self.text_cache.get(text)
+        if surface is None:
+            if len(self.text_cache) >= TEXT_CACHE_LIMIT:
+                self.text_cache.clear()
+            surface = self.font.render(text, True, BLACK)
+            self.text_cache[text] = surface
+        return surface
+
+    # Mobil selebar satu tile di layar (tile_size peta * zoom), berapa pun ukuran asetnya:
+    # peta gambar memakai tile lebih kecil dari aset mobil
+    def rotated_car(self, angle, screen_tile):
+        key = (angle, screen_tile)
+        surface = self.rotated_cars.get(key)
+        if surface is None:
+            car = self.courier_car
+            asset_size = max(car.get_width(), car.get_height())
+            if asset_size != screen_tile:
+                scale = screen_tile / asset_size
+                car = pygame.transform.scale(car, (max(1, round(car.get_width() * scale)),
+                                                   max(1, round(car.get_height() * scale))))
+            surface = pygame.transform.rotate(car, angle)
+            self.rotated_cars[key] = surface
+        return surface
+
+    # Gambar satu frame. camera = None memakai kamera default dari bake().
+    # Mengembalikan daftar dirty rect untuk pygame.display.update(), atau
+    # None jika seluruh layar perlu di-flip
+    def draw_frame(self, screen, couriers, markers, buttons, hud_lines, camera=None):
+        if camera is None:
+            camera = self.camera
+        if camera.view_key != self.view_key:
+            # Kamera bergeser/zoom atau peta baru: susun ulang background viewport
+            self._compose(camera)
+            self.full_redraw = True
+
+        if self.full_redraw:
+            screen.blit(self.background, (0, 0))
+        else:
+            # Hapus lapisan dinamis frame sebelumnya dengan background
+            for rect in self.dirty_rects:
+                screen.blit(self.background, rect, rect)
+
+        tile_size = camera.screen_tile
+        x0, y0, x1, y1 = camera.visible_cells()
+        marker_width = 3 if tile_size >= 8 else 1
+        rects = []
+
+        # Penanda lokasi: [(warna, (x, y))], hanya yang terlihat
+        for color, (x, y) in markers:
+            if x0 <= x < x1 and y0 <= y < y1:
+                screen_x, screen_y = camera.cell_to_screen(x, y)
+                rects.append(pygame.draw.rect(screen, color, (screen_x, screen_y, tile_size, tile_size), marker_width))
+
+        # Rotasi mobil kurir dengan animasi halus; posisi boleh pecahan (interpolasi antar langkah)
+        for courier in couriers:
+            if not (x0 <= courier.x < x1 and y0 <= courier.y < y1):
+                continue
+            angle = round(courier.rotation_angle / CAR_ANGLE_STEP) * CAR_ANGLE_STEP % 360
+            rotated_car = self.rotated_car(angle, tile_size)
+            screen_x, screen_y = camera.cell_to_screen(courier.x, courier.y)
+            car_rect = rotated_car.get_rect(center=(screen_x + tile_size//2, screen_y + tile_size//2))
+            rects.append(screen.blit(rotated_car, car_rect))
+
+        # Tombol: [(rect, label)]
+        for button, label in buttons:
+            rects.append(pygame.draw.rect(screen, GREEN, button))
+        for button, label in buttons:
+            rects.append(screen.blit(self.render_text(label), (button.x + 10, button.y + 5)))
+
+        # Teks status di pojok kiri atas
+        for i, line in enumerate(hud_lines):
+            rects.append(screen.blit(self.render_text(line), (10, 10 + 30 * i)))
+
+        if self.full_redraw:
+            dirty = None
+        else:
+            dirty = self.dirty_rects + rects
+        self.dirty_rects = rects
+        self.full_redraw = False
+        return dirty
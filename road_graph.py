@@ -0,0 +1,249 @@
+import heapq
+
+from courier_core import ROAD_TYPES, a_star
+from compact_grid import disconnected
+
+# Graf jalan terkompresi: simpang (T/empat) dan jalan buntu menjadi node,
+# ruas jalan lurus/tikungan di antaranya menjadi satu edge berbobot.
+# Pencarian berjalan di graf ini lalu hasilnya diurai kembali menjadi
+# jalur per sel untuk Courier.follow_path.
+#
+# Hanya untuk peta dengan jalan selebar satu sel (peta generate 150x100: sekitar 8.8
+# sel jalan per node). Di peta gambar jalan selebar 2+ sel, jadi hampir
+# setiap sel jalan bertetangga 3-4 sel jalan lain dan menjadi node (maps.png 1.05x,
+# maps2.png 1.06x, simple_t_map.png 1.01x): graf tidak lebih kecil dari grid. Peta
+# gambar memakai HierarchicalGraph (lihat map_worker.load_map_state); compression
+# menunjukkan rasio sel jalan per node untuk memeriksa peta lain.
+
+JUNCTION_TYPES = (ROAD_TYPES["T_JUNCTION"], ROAD_TYPES["INTERSECTION"])
+
+# Node virtual untuk titik awal dan tujuan saat pencarian
+START_NODE = -1
+GOAL_NODE = -2
+
+class RoadGraph:
+    def __init__(self, grid, road_types):
+        self.grid = grid
+        self.grid_width = len(grid[0])
+        self.grid_height = len(grid)
+
+        self.node_index = {}    # (x, y) -> id node
+        self.nodes = []         # id node -> (x, y)
+        self.adjacency = []     # id node -> [(node tetangga, bobot, id edge)]
+        self.edges = []         # id edge -> (node a, node b, [sel di antara a dan b, urut dari a])
+        self.cell_edge = {}     # sel ruas -> (id edge, jarak dari node a)
+
+        # Jumlah node yang diekspansi dan ukuran open set terbesar pada pencarian terakhir
+        self.expanded = 0
+        self.open_peak = 0
+
+        self._build(road_types)
+
+    def _road_neighbors(self, x, y):
+        grid = self.grid
+        neighbors = []
+        for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.grid_width and 0 <= ny < self.grid_height and grid[ny][nx] != 1:
+                neighbors.append((nx, ny))
+        return neighbors
+
+    def _add_node(self, position):
+        node = len(self.nodes)
+        self.node_index[position] = node
+        self.nodes.append(position)
+        self.adjacency.append([])
+        return node
+
+    def _build(self, road_types):
+        grid = self.grid
+        road_cells = []
+        for y in range(self.grid_height):
+            for x in range(self.grid_width):
+                if grid[y][x] == 1:
+                    continue
+                road_cells.append((x, y))
+                # Simpang dan jalan buntu (jalan buntu bertipe STRAIGHT, jadi cek jumlah tetangga)
+                if road_types[y][x] in JUNCTION_TYPES or len(self._road_neighbors(x, y)) <= 1:
+                    self._add_node((x, y))
+
+        for node in range(len(self.nodes)):
+            self._walk_edges(node)
+
+        # Putaran tertutup tanpa simpang: jadikan satu selnya sebagai node
+        for position in road_cells:
+            if position not in self.node_index and position not in self.cell_edge:
+                self._walk_edges(self._add_node(position))
+        # Sel jalan per node: ~1 berarti graf tidak mengompresi apa pun
+        self.compression = len(road_cells) / len(self.nodes) if self.nodes else 1.0
+
+    # Telusuri setiap ruas yang keluar dari node sampai bertemu node lain
+    def _walk_edges(self, node):
+        start = self.nodes[node]
+        for first in self._road_neighbors(*start):
+            # Ruas ini sudah tercatat dari ujung yang lain
+            if first in self.cell_edge:
+                continue
+            if first in self.node_index:
+                # Dua node bersebelahan: edge tanpa sel di antaranya, catat sekali saja
+                other = self.node_index[first]
+                if other > node:
+                    self._add_edge(node, other, [])
+                continue
+
+            cells = []
+            previous, current = start, first
+            while current not in self.node_index:
+                cells.append(current)
+                # Sel ruas selalu punya tepat dua tetangga jalan
+                a, b = self._road_neighbors(*current)
+                previous, current = current, (b if a == previous else a)
+            self._add_edge(node, self.node_index[current], cells)
+
+    def _add_edge(self, a, b, cells):
+        edge = len(self.edges)
+        weight = len(cells) + 1
+        self.edges.append((a, b, cells))
+        self.adjacency[a].append((b, weight, edge))
+        if b != a:
+            self.adjacency[b].append((a, weight, edge))
+        for offset, cell in enumerate(cells, 1):
+            self.cell_edge[cell] = (edge, offset)
+
+    # Jalur sel dari titik p ke node-node terdekat: [(node, biaya, sel setelah p sampai node)]
+    def _links_from(self, position):
+        node = self.node_index.get(position)
+        if node is not None:
+            return [(node, 0, [])]
+        edge, offset = self.cell_edge[position]
+        a, b, cells = self.edges[edge]
+        return [
+            (a, offset, cells[:offset - 1][::-1] + [self.nodes[a]]),
+            (b, len(cells) + 1 - offset, cells[offset:] + [self.nodes[b]]),
+        ]
+
+    # Jalur sel dari node-node terdekat ke titik p: {node: (biaya, sel setelah node sampai p)}
+    def _links_to(self, position):
+        node = self.node_index.get(position)
+        if node is not None:
+            return {node: (0, [])}
+        edge, offset = self.cell_edge[position]
+        a, b, cells = self.edges[edge]
+        links = {a: (offset, cells[:offset])}
+        to_b = (len(cells) + 1 - offset, cells[offset - 1:][::-1])
+        # Ruas melingkar (a == b): ambil sisi yang lebih pendek
+        if b not in links or to_b[0] < links[b][0]:
+            links[b] = to_b
+        return links
+
+    # Jalur langsung jika awal dan tujuan berada di ruas yang sama
+    def _direct_path(self, start, goal):
+        start_edge = self.cell_edge.get(start)
+        goal_edge = self.cell_edge.get(goal)
+        if start_edge is None or goal_edge is None or start_edge[0] != goal_edge[0]:
+            return None
+        cells = self.edges[start_edge[0]][2]
+        start_offset, goal_offset = start_edge[1], goal_edge[1]
+        if start_offset < goal_offset:
+            return cells[start_offset:goal_offset]
+        return cells[goal_offset - 1:start_offset - 1][::-1]
+
+    def _edge_cells(self, edge, from_node):
+        a, b, cells = self.edges[edge]
+        if a == from_node:
+            return cells + [self.nodes[b]]
+        return cells[::-1] + [self.nodes[a]]
+
+    # A* di graf terkompresi; hasilnya jalur sel seperti a_star.
+    # heading diterima agar sesuai antarmuka planner, bobot edge tetap jumlah sel
+    def find_path(self, start, goal, heading=None):
+        self.expanded = 0
+        self.open_peak = 0
+        if start == goal:
+            return []
+        grid = self.grid
+        if grid[goal[1]][goal[0]] == 1:
+            return []
+        if grid[start[1]][start[0]] == 1:
+            # Titik awal di luar jalan tidak ada di graf
+            return a_star(start, goal, grid)
+        if disconnected(grid, start, goal):
+            return []
+
+        def heuristic(node):
+            x, y = self.nodes[node]
+            return abs(x - goal[0]) + abs(y - goal[1])
+
+        goal_links = self._links_to(goal)
+        g_score = {}
+        came_from = {}
+        open_heap = []
+        counter = 0
+
+        for node, cost, cells in self._links_from(start):
+            if node not in g_score or cost < g_score[node]:
+                g_score[node] = cost
+                came_from[node] = (START_NODE, cells)
+                h = heuristic(node)
+                heapq.heappush(open_heap, (cost + h, h, counter, node))
+                counter += 1
+
+        direct = self._direct_path(start, goal)
+        if direct is not None:
+            g_score[GOAL_NODE] = len(direct)
+            came_from[GOAL_NODE] = (START_NODE, direct)
+            heapq.heappush(open_heap, (len(direct), 0, counter, GOAL_NODE))
+            counter += 1
+
+        closed_set = set()
+        while open_heap:
+            if len(open_heap) > self.open_peak:
+                self.open_peak = len(open_heap)
+            _, _, _, current = heapq.heappop(open_heap)
+            if current in closed_set:
+                continue
+            if current == GOAL_NODE:
+                return self._reconstruct(came_from)
+            closed_set.add(current)
+            self.expanded += 1
+            current_g = g_score[current]
+
+            if current in goal_links:
+                cost, cells = goal_links[current]
+                tentative_g_score = current_g + cost
+                if GOAL_NODE not in g_score or tentative_g_score < g_score[GOAL_NODE]:
+                    g_score[GOAL_NODE] = tentative_g_score
+                    came_from[GOAL_NODE] = (current, cells)
+                    heapq.heappush(open_heap, (tentative_g_score, 0, counter, GOAL_NODE))
+                    counter += 1
+
+            for neighbor, weight, edge in self.adjacency[current]:
+                if neighbor in closed_set:
+                    continue
+                tentative_g_score = current_g + weight
+                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                    g_score[neighbor] = tentative_g_score
+                    came_from[neighbor] = (current, edge)
+                    h = heuristic(neighbor)
+                    heapq.heappush(open_heap, (tentative_g_score + h, h, counter, neighbor))
+                    counter += 1
+        return []
+
+    def _reconstruct(self, came_from):
+        # Kumpulkan potongan jalur dari tujuan mundur ke awal
+        pieces = []
+        previous, link = came_from[GOAL_NODE]
+        pieces.append(link)
+        node = previous
+        while node != START_NODE:
+            previous, link = came_from[node]
+            if previous == START_NODE:
+                pieces.append(link)
+            else:
+                pieces.append(self._edge_cells(link, previous))
+            node = previous
+
+        path = []
+        for piece in reversed(pieces):
+            path.extend(piece)
+        return path
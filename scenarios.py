@@ -0,0 +1,207 @@
+import argparse
+import glob
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+
+from courier_core import generate_map
+from compact_grid import CompactGrid
+from simulation import HeadlessSimulation, make_planner
+
+# Batch runner skenario (peta, seed, jumlah paket) di process pool.
+# Setiap worker membangun grid sendiri, menjalankan siklus pickup/deliver
+# dengan a_star, lalu hasil semua skenario digabung menjadi distribusi.
+#
+# Format peta: "gen:LEBARxTINGGI" (jarak jalan acak 5-8),
+# "gen:LEBARxTINGGI:JARAK" (jarak jalan tetap), atau path gambar peta
+
+DEFAULT_GENERATED_SIZE = "150x100"
+MAP_FOLDER = "maps"
+
+# Persentil yang dilaporkan untuk setiap distribusi
+PERCENTILES = (50, 90, 99)
+
+# Peta gambar yang sudah dimuat di proses worker ini (path -> (CompactGrid, road_types))
+_image_maps = {}
+
+def build_map(map_spec, rng=None):
+    if map_spec.startswith("gen:"):
+        parts = map_spec[4:].split(":")
+        grid_width, grid_height = (int(value) for value in parts[0].split("x"))
+        road_spacing = int(parts[1]) if len(parts) > 1 else None
+        grid, road_types, _ = generate_map(grid_width, grid_height, road_spacing, rng)
+        return grid, road_types
+
+    if map_spec not in _image_maps:
+        # map_loader butuh pygame, jadi hanya diimpor jika peta gambar dipakai.
+        # Peta terkompilasi di cache sudah berisi mask koneksi untuk CompactGrid
+        from map_cache import load_compact_map
+        grid, road_types, _ = load_compact_map(map_spec)
+        _image_maps[map_spec] = (grid, road_types)
+    return _image_maps[map_spec]
+
+
+# Simulasi satu kurir yang mencatat panjang rute, lama pengiriman, dan waktu tiap pencarian jalur
+class ScenarioSimulation(HeadlessSimulation):
+    def __init__(self, grid, road_types, seed=None):
+        self.plan_ms = []           # Waktu tiap pemanggilan planner
+        self.path_lengths = []      # Jumlah sel (ke sumber + ke tujuan) per pengiriman
+        self.delivery_ticks = []    # Tick dari paket dibuat sampai diantar
+        self.route_length = 0
+        self.job_tick = 0
+
+        if not isinstance(grid, CompactGrid):
+            grid = CompactGrid.from_rows(grid)
+        base_planner = make_planner("astar", grid, road_types)
+
+        def timed_planner(start, goal, heading=None):
+            start_time = time.perf_counter()
+            path = base_planner(start, goal, heading)
+            self.plan_ms.append((time.perf_counter() - start_time) * 1000)
+            self.route_length += len(path)
+            return path
+
+        super().__init__(grid=grid, road_types=road_types, planner=timed_planner, seed=seed)
+
+    def new_job(self):
+        # Dipanggil setelah pengiriman selesai: catat paket sebelumnya dulu
+        if self.deliveries > len(self.delivery_ticks):
+            self.delivery_ticks.append(self.ticks - self.job_tick)
+            self.path_lengths.append(self.route_length)
+        self.route_length = 0
+        self.job_tick = self.ticks
+        super().new_job()
+
+
+# Jalankan satu skenario (peta, seed, jumlah paket); dipanggil di proses worker
+def run_scenario(scenario):
+    map_spec, seed, deliveries = scenario
+    start_time = time.perf_counter()
+    grid, road_types = build_map(map_spec, random.Random(seed))
+    sim = ScenarioSimulation(grid, road_types, seed)
+    # Batas tick agar peta tanpa rute tidak berjalan selamanya
+    stats = sim.run(deliveries=deliveries, max_ticks=deliveries * len(grid) * len(grid[0]))
+    return {
+        "map": map_spec,
+        "seed": seed,
+        "ticks": stats["ticks"],
+        "deliveries": stats["deliveries"],
+        "failed_routes": stats["failed_routes"],
+        "elapsed": time.perf_counter() - start_time,
+        "path_lengths": sim.path_lengths,
+        "delivery_ticks": sim.delivery_ticks,
+        "plan_ms": sim.plan_ms,
+    }
+
+def make_scenarios(map_specs, seeds, deliveries, first_seed=0):
+    return [(map_spec, seed, deliveries)
+            for map_spec in map_specs
+            for seed in range(first_seed, first_seed + seeds)]
+
+# Jalankan semua skenario; workers=1 berjalan di proses ini tanpa pool
+def run_scenarios(scenarios, workers=None, chunksize=None):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        return [run_scenario(scenario) for scenario in scenarios]
+    if chunksize is None:
+        # Beberapa potong per worker: overhead IPC kecil, beban tetap merata
+        chunksize = max(1, len(scenarios) // (workers * 8))
+    with Pool(workers) as pool:
+        return list(pool.imap(run_scenario, scenarios, chunksize))
+
+# Ringkasan distribusi: rata-rata, persentil (nearest-rank), dan maksimum
+def summarize(values):
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    count = len(ordered)
+    summary = {"count": count, "mean": sum(ordered) / count}
+    for percentile in PERCENTILES:
+        index = max(0, -(-percentile * count // 100) - 1)
+        summary[f"p{percentile}"] = ordered[index]
+    summary["max"] = ordered[-1]
+    return summary
+
+def _aggregate_group(results):
+    elapsed = sum(result["elapsed"] for result in results)
+    deliveries = sum(result["deliveries"] for result in results)
+    path_lengths = []
+    delivery_ticks = []
+    plan_ms = []
+    for result in results:
+        path_lengths.extend(result["path_lengths"])
+        delivery_ticks.extend(result["delivery_ticks"])
+        plan_ms.extend(result["plan_ms"])
+    return {
+        "scenarios": len(results),
+        "deliveries": deliveries,
+        "failed_routes": sum(result["failed_routes"] for result in results),
+        "ticks": sum(result["ticks"] for result in results),
+        # Throughput per detik CPU worker (tidak bergantung jumlah core)
+        "deliveries_per_cpu_second": deliveries / elapsed if elapsed else None,
+        "scenario_seconds": summarize([result["elapsed"] for result in results]),
+        "path_length": summarize(path_lengths),
+        "delivery_ticks": summarize(delivery_ticks),
+        "plan_ms": summarize(plan_ms),
+    }
+
+# Gabungkan hasil per peta dan keseluruhan
+def aggregate(results, wall_time=None):
+    by_map = {}
+    for result in results:
+        by_map.setdefault(result["map"], []).append(result)
+    report = {
+        "total": _aggregate_group(results),
+        "maps": {map_spec: _aggregate_group(group) for map_spec, group in by_map.items()},
+    }
+    if wall_time:
+        report["total"]["wall_time"] = wall_time
+        report["total"]["scenarios_per_second"] = len(results) / wall_time
+        report["total"]["deliveries_per_second"] = report["total"]["deliveries"] / wall_time
+    return report
+
+def default_map_specs():
+    specs = [f"gen:{DEFAULT_GENERATED_SIZE}:{spacing}" for spacing in range(5, 9)]
+    specs.extend(sorted(glob.glob(os.path.join(MAP_FOLDER, "*.png"))))
+    return specs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jalankan banyak skenario simulasi secara paralel")
+    parser.add_argument("--maps", nargs="*", default=None,
+                        help="peta: gen:LEBARxTINGGI[:JARAK] atau path gambar (default: jarak 5-8 + semua maps/*.png)")
+    parser.add_argument("--seeds", type=int, default=10, help="jumlah seed per peta")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed pertama")
+    parser.add_argument("--deliveries", type=int, default=20, help="jumlah pengiriman per skenario")
+    parser.add_argument("--workers", type=int, default=None, help="jumlah proses (default: jumlah core)")
+    parser.add_argument("--json", default=None, help="simpan ringkasan lengkap ke file JSON")
+    args = parser.parse_args()
+
+    map_specs = args.maps or default_map_specs()
+    scenarios = make_scenarios(map_specs, args.seeds, args.deliveries, args.first_seed)
+
+    start_time = time.perf_counter()
+    results = run_scenarios(scenarios, args.workers)
+    report = aggregate(results, time.perf_counter() - start_time)
+
+    total = report["total"]
+    print(f"{total['scenarios']} skenario, {total['deliveries']} pengiriman, {total['wall_time']:.2f} s "
+          f"({total['scenarios_per_second']:.1f} skenario/s)")
+    for map_spec, group in report["maps"].items():
+        path_length = group["path_length"]
+        delivery_ticks = group["delivery_ticks"]
+        plan_ms = group["plan_ms"]
+        print(f"{map_spec}: jalur p50 {path_length.get('p50')} p99 {path_length.get('p99')}, "
+              f"tick/pengiriman p50 {delivery_ticks.get('p50')} p99 {delivery_ticks.get('p99')}, "
+              f"a_star p50 {plan_ms.get('p50', 0):.3f} ms p99 {plan_ms.get('p99', 0):.3f} ms")
+
+    if args.json:
+        with open(args.json, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+import argparse
+import random
+import time
+from collections import deque
+from functools import partial
+
+from courier_core import (Courier, a_star, a_star_turns, classify_roads, generate_map, random_position, random_job,
+                          start_route, advance_courier, EVENT_PICKUP, EVENT_DELIVERED, EVENT_NO_ROUTE)
+from compact_grid import CompactGrid
+from fleet import Fleet
+from cooperative import CooperativeFleet, collisions
+from dstar_lite import ClosureAwareFleet
+from road_graph import RoadGraph
+from hierarchy import HierarchicalGraph
+from dispatch import road_neighbors
+from pickup_delivery import plan_stops
+from tick_trace import TraceRecorder
+
+# Simulasi tanpa layar: menjalankan siklus pickup/deliver secepat CPU
+# tanpa pygame, tkinter, maupun clock.tick(7)
+
+# Ukuran grid default sama dengan layar 1000x700 dengan TILE_SIZE 30
+DEFAULT_GRID_WIDTH = 1000 // 30
+DEFAULT_GRID_HEIGHT = 700 // 30
+
+# Pilihan router: "astar" = a_star per sel, "graph" = graf simpang terkompresi,
+# "turns" = a_star dengan arah hadap (tick belok ikut dihitung), "hpa" = graf pintu antar cluster
+ROUTERS = ("astar", "graph", "turns", "hpa")
+
+# Percobaan paket acak per kurir sebelum kurir ditunda ke tick berikutnya
+JOB_ATTEMPTS = 10
+# Kurir yang ditunda lagi menunggu dua kali lebih lama (1, 2, 4, ... tick, paling
+# lama MAX_RETRY_DELAY): kurir yang terkepung baru bisa keluar setelah tabel
+# reservasi berubah, jadi mencoba setiap tick hanya membuang perencanaan
+MAX_RETRY_DELAY = 16
+
+# Lama penutupan jalan (tick) sebelum sel dibuka kembali
+CLOSURE_TICKS = 30
+
+# Buat planner (start, goal, heading=None) -> jalur untuk grid tertentu
+def make_planner(router, grid, road_types=None):
+    if router == "astar":
+        return lambda start, goal, heading=None: a_star(start, goal, grid)
+    if router == "turns":
+        return lambda start, goal, heading=None: a_star_turns(start, goal, grid, heading)
+    if router == "graph":
+        if road_types is None:
+            road_types, _ = classify_roads(grid)
+        return RoadGraph(grid, road_types).find_path
+    if router == "hpa":
+        return HierarchicalGraph(grid).find_path
+    raise ValueError(f"Router tidak dikenal: {router}")
+
+
+# seed: peta, posisi kurir, dan paket diambil dari random.Random(seed) milik simulasi,
+# jadi run dengan seed yang sama bisa diulang persis (None = seed acak)
+class HeadlessSimulation:
+    def __init__(self, grid=None, grid_width=DEFAULT_GRID_WIDTH, grid_height=DEFAULT_GRID_HEIGHT,
+                 router="astar", road_types=None, planner=None, seed=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        if grid is None:
+            grid, road_types, _ = generate_map(grid_width, grid_height, rng=self.rng)
+        if not isinstance(grid, CompactGrid):
+            grid = CompactGrid.from_rows(grid)
+        self.grid = grid
+        # planner eksplisit menggantikan router (misalnya planner yang diukur waktunya)
+        if planner is None:
+            planner = make_planner(router, grid, road_types)
+        self.planner = planner
+        courier_x, courier_y = random_position(grid, self.rng)
+        self.courier = Courier(courier_x, courier_y, grid)
+        self.source = None
+        self.dest = None
+
+        # Statistik
+        self.ticks = 0
+        self.pickups = 0
+        self.deliveries = 0
+        self.failed_routes = 0
+        self.elapsed = 0.0
+        # trace.TraceRecorder opsional: state kurir dicatat setiap tick di run()
+        self.recorder = None
+
+        self.new_job()
+
+    def new_job(self):
+        # Buat paket baru dan langsung mulai rute (seperti Randomize + Start)
+        position = (self.courier.x, self.courier.y)
+        self.source, self.dest = random_job(self.grid, self.rng, position)
+        while not start_route(self.courier, self.source, self.dest, self.planner):
+            self.failed_routes += 1
+            self.source, self.dest = random_job(self.grid, self.rng, position)
+
+    def step(self):
+        self.ticks += 1
+        event = advance_courier(self.courier, self.source, self.dest, self.planner)
+        if event == EVENT_PICKUP:
+            self.pickups += 1
+        elif event == EVENT_NO_ROUTE:
+            # Paket dibatalkan, kurir dilepas dari paket dan diberi paket baru
+            self.pickups += 1
+            self.failed_routes += 1
+            self.courier.has_package = False
+            self.new_job()
+        elif event == EVENT_DELIVERED:
+            self.deliveries += 1
+            self.new_job()
+        return event
+
+    # Fungsi tanpa argumen yang merekam satu tick: diikat sekali per run agar
+    # rekaman tidak menambah pemanggilan berantai di setiap tick
+    def tick_recorder(self, recorder):
+        return recorder.courier_writer(self.courier)
+
+    def run(self, deliveries=None, max_ticks=None):
+        # Jalankan sampai jumlah pengiriman atau batas tick tercapai
+        start_time = time.perf_counter()
+        record = self.tick_recorder(self.recorder) if self.recorder is not None else None
+        step = self.step
+        while True:
+            if deliveries is not None and self.deliveries >= deliveries:
+                break
+            if max_ticks is not None and self.ticks >= max_ticks:
+                break
+            step()
+            if record is not None:
+                record()
+        self.elapsed += time.perf_counter() - start_time
+        return self.stats()
+
+    def stats(self):
+        elapsed = self.elapsed or 1e-9
+        return {
+            "ticks": self.ticks,
+            "pickups": self.pickups,
+            "deliveries": self.deliveries,
+            "failed_routes": self.failed_routes,
+            "elapsed": self.elapsed,
+            "ticks_per_second": self.ticks / elapsed,
+            "deliveries_per_second": self.deliveries / elapsed,
+            # Tick simulasi per pengiriman (per kurir): makin kecil makin produktif
+            "ticks_per_delivery": self.ticks / self.deliveries if self.deliveries else None,
+        }
+
+
+# Simulasi armada: banyak kurir, masing-masing dengan paketnya sendiri
+class FleetSimulation(HeadlessSimulation):
+    # cooperative=True: rute direncanakan lewat tabel reservasi ruang-waktu (router diabaikan)
+    # closures > 0: setiap tick sebanyak itu sel di sisa rute kurir acak ditutup selama
+    # CLOSURE_TICKS; rute yang terdampak diperbaiki (incremental=True: dengan D* Lite)
+    def __init__(self, num_couriers, grid=None, grid_width=DEFAULT_GRID_WIDTH, grid_height=DEFAULT_GRID_HEIGHT,
+                 router="astar", road_types=None, cooperative=False, seed=None, closures=0, incremental=False):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        if grid is None:
+            grid, road_types, _ = generate_map(grid_width, grid_height, rng=self.rng)
+        if not isinstance(grid, CompactGrid):
+            grid = CompactGrid.from_rows(grid)
+        self.grid = grid
+        self.cooperative = cooperative
+        self.closures = closures
+        if cooperative:
+            self.fleet = CooperativeFleet(grid)
+        else:
+            self.planner = make_planner(router, grid, road_types)
+            if closures:
+                self.fleet = ClosureAwareFleet(grid, planner=self.planner, incremental=incremental)
+            else:
+                self.fleet = Fleet(grid, planner=self.planner)
+
+        # Statistik
+        self.ticks = 0
+        self.pickups = 0
+        self.deliveries = 0
+        self.failed_routes = 0
+        self.collisions = 0
+        self.elapsed = 0.0
+        self.step_time = 0.0
+        self.waiting = []       # (tick coba lagi, indeks, jeda berikutnya) kurir yang semua percobaannya gagal
+        self.recorder = None
+        self.closed = deque()   # (tick dibuka kembali, x, y) urut tick
+        self.closed_roads = 0
+
+        # Semua kurir ditempatkan dulu agar rute kooperatif pertama sudah melihat posisi semuanya
+        occupied = set()
+        for _ in range(num_couriers):
+            position = random_position(grid, self.rng)
+            while cooperative and position in occupied:
+                position = random_position(grid, self.rng)
+            occupied.add(position)
+            self.fleet.add_courier(*position)
+        for index in range(num_couriers):
+            self.new_job(index)
+
+    def new_job(self, index, delay=1):
+        for _ in range(JOB_ATTEMPTS):
+            source, dest = random_job(self.grid, self.rng, (self.fleet.x[index], self.fleet.y[index]))
+            if self.fleet.assign_job(index, source, dest):
+                return
+            self.failed_routes += 1
+        self.waiting.append((self.ticks + delay, index, min(delay * 2, MAX_RETRY_DELAY)))
+
+    def step(self):
+        self.ticks += 1
+        waiting, self.waiting = self.waiting, []
+        for retry_tick, index, delay in waiting:
+            if retry_tick > self.ticks:
+                self.waiting.append((retry_tick, index, delay))
+            else:
+                self.new_job(index, delay)
+        start_time = time.perf_counter()
+        events = self.fleet.step()
+        self.step_time += time.perf_counter() - start_time
+        for index, event in events:
+            if event == EVENT_PICKUP:
+                self.pickups += 1
+            elif event == EVENT_NO_ROUTE:
+                self.pickups += 1
+                self.failed_routes += 1
+                self.fleet.has_package[index] = 0
+                self.new_job(index)
+            elif event == EVENT_DELIVERED:
+                self.deliveries += 1
+                self.new_job(index)
+        if self.cooperative:
+            self.collisions += collisions(self.fleet)
+        if self.closures:
+            self.update_closures()
+        return events
+
+    # Buka penutupan yang sudah habis waktunya, lalu tutup sel baru di sisa rute kurir
+    # acak. Kurir yang tidak punya rute lagi dihitung rute gagal dan diberi paket baru
+    def update_closures(self):
+        fleet = self.fleet
+        closed = self.closed
+        while closed and closed[0][0] <= self.ticks:
+            _, x, y = closed.popleft()
+            fleet.reopen_road(x, y)
+        for _ in range(self.closures):
+            index = self.rng.randrange(len(fleet))
+            # Sel terakhir (tujuan) tidak ditutup
+            remaining = fleet.remaining_path(index)[:-1]
+            if not remaining:
+                continue
+            x, y = remaining[self.rng.randrange(len(remaining))]
+            affected = fleet.close_road(x, y)
+            if affected is None:
+                continue
+            closed.append((self.ticks + CLOSURE_TICKS, x, y))
+            self.closed_roads += 1
+            for i in affected:
+                if not fleet.moving[i]:
+                    self.failed_routes += 1
+                    fleet.has_package[i] = 0
+                    self.new_job(i)
+
+    def tick_recorder(self, recorder):
+        return partial(recorder.record_fleet, self.fleet)
+
+    def stats(self):
+        stats = super().stats()
+        stats["couriers"] = len(self.fleet)
+        # Tick kurir per pengiriman: setiap tick semua kurir berjalan, jadi tick
+        # dikalikan jumlah kurir agar sebanding dengan simulasi satu kurir
+        if self.deliveries:
+            stats["ticks_per_delivery"] = self.ticks * len(self.fleet) / self.deliveries
+        # Waktu rata-rata fleet.step() saja, tanpa perencanaan rute paket baru
+        stats["step_ms"] = self.step_time / max(self.ticks, 1) * 1000
+        if self.cooperative:
+            fleet = self.fleet
+            stats["collisions"] = self.collisions
+            stats["plans"] = fleet.plans
+            stats["plans_per_second"] = fleet.plans / (fleet.plan_time or 1e-9)
+        if self.closures:
+            fleet = self.fleet
+            stats["closed_roads"] = self.closed_roads
+            stats["repairs"] = fleet.repairs
+            stats["repair_ms"] = fleet.repair_time / max(fleet.repairs, 1) * 1000
+        return stats
+
+
+# Simulasi kurir berkapasitas: ambil beberapa paket sekaligus lalu kunjungi
+# titik pickup/delivery sesuai urutan hasil optimasi pickup_delivery
+class MultiPackageSimulation(HeadlessSimulation):
+    def __init__(self, capacity, batch_size=None, grid=None, grid_width=DEFAULT_GRID_WIDTH,
+                 grid_height=DEFAULT_GRID_HEIGHT, router="astar", road_types=None, seed=None):
+        self.capacity = capacity
+        self.batch_size = batch_size or capacity * 2
+        self.jobs = []
+        self.stops = []
+        self.stop_index = 0
+        self.carried = 0
+        self.neighbors = None
+        super().__init__(grid, grid_width, grid_height, router, road_types, seed=seed)
+
+    def new_job(self):
+        # Ambil satu batch paket dan rencanakan urutan kunjungannya
+        if self.neighbors is None:
+            self.neighbors = road_neighbors(self.grid)
+        courier = self.courier
+        position = (courier.x, courier.y)
+        self.jobs = [random_job(self.grid, self.rng, position) for _ in range(self.batch_size)]
+        self.stops, _ = plan_stops(self.grid, (courier.x, courier.y), self.jobs, self.capacity,
+                                   neighbors=self.neighbors)
+        self.stop_index = 0
+        self.carried = 0
+        courier.has_package = False
+        self.route_to_stop()
+
+    def stop_position(self):
+        job, is_pickup = self.stops[self.stop_index]
+        source, dest = self.jobs[job]
+        return source if is_pickup else dest
+
+    def route_to_stop(self):
+        courier = self.courier
+        target = self.stop_position()
+        if (courier.x, courier.y) == target:
+            courier.path = []
+        else:
+            courier.path = self.planner((courier.x, courier.y), target, courier.direction)
+            if not courier.path:
+                # Titik tidak terjangkau: batalkan seluruh batch
+                self.failed_routes += 1
+                self.new_job()
+                return
+        courier.moving = True
+
+    def step(self):
+        self.ticks += 1
+        courier = self.courier
+        courier.follow_path()
+        if courier.path:
+            return None
+
+        if (courier.x, courier.y) != self.stop_position():
+            return None
+        _, is_pickup = self.stops[self.stop_index]
+        if is_pickup:
+            self.carried += 1
+            self.pickups += 1
+            event = EVENT_PICKUP
+        else:
+            self.carried -= 1
+            self.deliveries += 1
+            event = EVENT_DELIVERED
+        courier.has_package = self.carried > 0
+
+        self.stop_index += 1
+        if self.stop_index == len(self.stops):
+            self.new_job()
+        else:
+            self.route_to_stop()
+        return event
+
+    # Kolom paket trace = jumlah paket yang sedang dibawa, bukan hanya has_package
+    def tick_recorder(self, recorder):
+        return recorder.courier_writer(self.courier, lambda: self.carried)
+
+    def stats(self):
+        stats = super().stats()
+        stats["capacity"] = self.capacity
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulasi Smart Courier tanpa layar")
+    parser.add_argument("--deliveries", type=int, default=1000, help="jumlah pengiriman yang disimulasikan")
+    parser.add_argument("--max-ticks", type=int, default=None, help="batas jumlah tick")
+    parser.add_argument("--width", type=int, default=DEFAULT_GRID_WIDTH, help="lebar grid")
+    parser.add_argument("--height", type=int, default=DEFAULT_GRID_HEIGHT, help="tinggi grid")
+    parser.add_argument("--couriers", type=int, default=1, help="jumlah kurir (>1 = mode armada)")
+    parser.add_argument("--capacity", type=int, default=1, help="kapasitas paket per kurir (>1 = multi paket)")
+    parser.add_argument("--router", choices=ROUTERS, default="astar", help="algoritma pencarian jalur")
+    parser.add_argument("--cooperative", action="store_true",
+                        help="mode armada dengan rute bebas tabrakan (tabel reservasi ruang-waktu)")
+    parser.add_argument("--closures", type=int, default=0,
+                        help=f"mode armada: jumlah sel jalan yang ditutup per tick selama {CLOSURE_TICKS} tick")
+    parser.add_argument("--incremental", action="store_true",
+                        help="perbaiki rute yang terkena penutupan dengan D* Lite (default a_star ulang)")
+    parser.add_argument("--seed", type=int, default=None, help="seed peta, posisi kurir, dan paket")
+    parser.add_argument("--record", default=None, help="rekam state kurir per tick ke file trace ini")
+    args = parser.parse_args()
+
+    if args.couriers > 1 and args.capacity > 1:
+        parser.error("--capacity > 1 hanya didukung untuk satu kurir")
+    if args.closures and (args.couriers < 2 or args.cooperative):
+        parser.error("--closures hanya didukung untuk mode armada non-kooperatif")
+
+    if args.capacity > 1:
+        sim = MultiPackageSimulation(args.capacity, grid_width=args.width, grid_height=args.height,
+                                     router=args.router, seed=args.seed)
+    elif args.couriers > 1:
+        sim = FleetSimulation(args.couriers, grid_width=args.width, grid_height=args.height,
+                              router=args.router, cooperative=args.cooperative, seed=args.seed,
+                              closures=args.closures, incremental=args.incremental)
+    else:
+        sim = HeadlessSimulation(grid_width=args.width, grid_height=args.height, router=args.router,
+                                 seed=args.seed)
+    if args.record:
+        sim.recorder = TraceRecorder(args.record, args.couriers if args.couriers > 1 else 1,
+                                     sim.grid.width, sim.grid.height, args.seed)
+    stats = sim.run(deliveries=args.deliveries, max_ticks=args.max_ticks)
+    if sim.recorder is not None:
+        sim.recorder.close()
+    print(f"Ticks: {stats['ticks']}")
+    print(f"Pengiriman: {stats['deliveries']} (rute gagal: {stats['failed_routes']})")
+    print(f"Waktu: {stats['elapsed']:.3f} s")
+    print(f"Ticks per second: {stats['ticks_per_second']:.0f}")
+    print(f"Deliveries per second: {stats['deliveries_per_second']:.1f}")
+    if stats["ticks_per_delivery"] is not None:
+        print(f"Ticks per delivery: {stats['ticks_per_delivery']:.1f}")
+    if "step_ms" in stats:
+        print(f"Kurir: {stats['couriers']}, rata-rata fleet step: {stats['step_ms']:.3f} ms")
+    if "collisions" in stats:
+        print(f"Tabrakan: {stats['collisions']}, rute direncanakan: {stats['plans']} "
+              f"({stats['plans_per_second']:.0f} per detik)")
+    if "closed_roads" in stats:
+        print(f"Jalan ditutup: {stats['closed_roads']}, rute diperbaiki: {stats['repairs']} "
+              f"(rata-rata {stats['repair_ms']:.3f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+from dispatch import distance_field
+
+# Indeks spasial posisi kurir: grid dibagi menjadi bucket persegi berukuran
+# bucket_size sel, setiap bucket menyimpan kunci -> (x, y) kurir di dalamnya. Perpindahan
+# kurir hanya menyentuh bucket jika kurir pindah bucket, dan query k-terdekat
+# memeriksa bucket per cincin di sekitar titik query sampai cincin berikutnya
+# pasti lebih jauh dari kandidat ke-k.
+
+DEFAULT_BUCKET_SIZE = 4
+# Target rata-rata kurir per bucket untuk suggest_bucket_size
+KEYS_PER_BUCKET = 2
+# Kandidat Manhattan yang diperiksa jarak grid-nya di nearest_reachable
+DEFAULT_CANDIDATES = 8
+
+# Ukuran bucket agar rata-rata sekitar KEYS_PER_BUCKET kurir per bucket
+def suggest_bucket_size(grid_width, grid_height, count):
+    if count <= 0:
+        return DEFAULT_BUCKET_SIZE
+    return max(1, round((grid_width * grid_height * KEYS_PER_BUCKET / count) ** 0.5))
+
+class CourierIndex:
+    def __init__(self, grid_width, grid_height, bucket_size=DEFAULT_BUCKET_SIZE):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.bucket_size = bucket_size
+        self.bucket_width = -(-grid_width // bucket_size)
+        self.bucket_height = -(-grid_height // bucket_size)
+        self.buckets = [{} for _ in range(self.bucket_width * self.bucket_height)]
+        self.positions = {}     # kunci -> (x, y, indeks bucket)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def _bucket(self, x, y):
+        bucket_size = self.bucket_size
+        return (y // bucket_size) * self.bucket_width + x // bucket_size
+
+    def insert(self, key, x, y):
+        if key in self.positions:
+            self.remove(key)
+        bucket = self._bucket(x, y)
+        self.buckets[bucket][key] = (x, y)
+        self.positions[key] = (x, y, bucket)
+
+    def remove(self, key):
+        _, _, bucket = self.positions.pop(key)
+        del self.buckets[bucket][key]
+
+    def move(self, key, x, y):
+        _, _, bucket = self.positions[key]
+        new_bucket = self._bucket(x, y)
+        if new_bucket != bucket:
+            del self.buckets[bucket][key]
+        self.buckets[new_bucket][key] = (x, y)
+        self.positions[key] = (x, y, new_bucket)
+
+    def position(self, key):
+        x, y, _ = self.positions[key]
+        return x, y
+
+    # Ada kurir di sel (x, y): hanya bucket sel itu yang diperiksa
+    def occupied(self, x, y):
+        return (x, y) in self.buckets[self._bucket(x, y)].values()
+
+    # Ikuti Courier: setiap Courier.move yang berhasil memperbarui indeks
+    def track(self, key, courier):
+        self.insert(key, courier.x, courier.y)
+        courier.on_move = lambda moved: self.move(key, moved.x, moved.y)
+
+    # k kurir terdekat dari (x, y) menurut jarak Manhattan: [(jarak, kunci)] urut naik.
+    # accept(kunci) -> bool untuk melewati kurir tertentu (misal yang sedang sibuk)
+    def nearest(self, x, y, k=1, accept=None):
+        if not self.positions:
+            return []
+        bucket_size = self.bucket_size
+        bucket_width = self.bucket_width
+        bucket_height = self.bucket_height
+        buckets = self.buckets
+        center_x = x // bucket_size
+        center_y = y // bucket_size
+        # Jarak titik query ke tepi bucket-nya: batas bawah jarak ke cincin berikutnya
+        edge = min(x - center_x * bucket_size, (center_x + 1) * bucket_size - 1 - x,
+                   y - center_y * bucket_size, (center_y + 1) * bucket_size - 1 - y)
+        max_ring = max(center_x, bucket_width - 1 - center_x, center_y, bucket_height - 1 - center_y)
+
+        found = []
+        for ring in range(max_ring + 1):
+            # Bucket di keliling cincin (terpotong batas grid)
+            y0 = center_y - ring
+            y1 = center_y + ring
+            x0 = max(0, center_x - ring)
+            x1 = min(bucket_width - 1, center_x + ring)
+            for by in range(max(0, y0), min(bucket_height - 1, y1) + 1):
+                if ring and by != y0 and by != y1:
+                    columns = [bx for bx in (center_x - ring, center_x + ring) if 0 <= bx < bucket_width]
+                else:
+                    columns = range(x0, x1 + 1)
+                row = by * bucket_width
+                for bx in columns:
+                    bucket = buckets[row + bx]
+                    if not bucket:
+                        continue
+                    if accept is None:
+                        found.extend([(abs(key_x - x) + abs(key_y - y), key)
+                                      for key, (key_x, key_y) in bucket.items()])
+                    else:
+                        found.extend([(abs(key_x - x) + abs(key_y - y), key)
+                                      for key, (key_x, key_y) in bucket.items() if accept(key)])
+
+            if len(found) >= k:
+                found.sort()
+                del found[k:]
+                # Semua kurir di cincin berikutnya minimal sejauh ini
+                if found[-1][0] <= ring * bucket_size + edge:
+                    break
+        found.sort()
+        return found[:k]
+
+    # Kurir terdekat menurut jarak grid sebenarnya: ambil kandidat terdekat menurut
+    # Manhattan lalu hitung jarak jalan lewat BFS dari (x, y) yang berhenti begitu semua
+    # kandidat terjangkau. neighbors dari dispatch.road_neighbors. Kurir tak terjangkau dilewati.
+    def nearest_reachable(self, x, y, neighbors, k=1, candidates=DEFAULT_CANDIDATES, accept=None):
+        found = self.nearest(x, y, max(k, candidates), accept)
+        if not found:
+            return []
+        grid_width = self.grid_width
+        cells = {}
+        for _, key in found:
+            key_x, key_y, _ = self.positions[key]
+            cells[key] = key_y * grid_width + key_x
+        distances = distance_field(neighbors, grid_width, (x, y), set(cells.values()))
+        reachable = sorted((distances[cell], key) for key, cell in cells.items() if distances[cell] >= 0)
+        return reachable[:k]
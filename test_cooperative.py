@@ -0,0 +1,63 @@
+import pytest
+
+from cooperative import ReservationTable, collisions
+from simulation import FleetSimulation
+
+TICKS = 300
+SEED = 1234
+
+
+def run(num_couriers, **kwargs):
+    sim = FleetSimulation(num_couriers, seed=SEED, **kwargs)
+    for _ in range(TICKS):
+        sim.step()
+    return sim
+
+
+# Setiap kurir selalu memegang selnya sendiri di tabel reservasi (rute, tunggu, atau parkir)
+def assert_cells_reserved(fleet):
+    table = fleet.reservations
+    width = len(fleet.grid[0])
+    for index in range(len(fleet)):
+        if index in fleet.parking:
+            continue
+        cell = fleet.y[index] * width + fleet.x[index]
+        parked = table.parked.get(cell)
+        assert table.cells.get(cell, {}).get(fleet.tick) == index or \
+            parked is not None and parked[1] == index and parked[0] <= fleet.tick
+
+
+def test_reserve_rejects_taken_slot():
+    table = ReservationTable()
+    table.reserve(0, [(5, 0), (6, 1)])
+    with pytest.raises(ValueError):
+        table.reserve(1, [(7, 0), (6, 1)])
+
+
+def test_reserve_rejects_park_on_future_route():
+    table = ReservationTable()
+    table.reserve(0, [(5, 0), (6, 1), (7, 2)])
+    with pytest.raises(ValueError):
+        table.reserve(1, [(7, 0), (7, 1)], park=True)
+
+
+def test_cooperative_fleet_keeps_cells_reserved():
+    sim = FleetSimulation(20, cooperative=True, seed=SEED)
+    for _ in range(TICKS):
+        sim.step()
+        assert_cells_reserved(sim.fleet)
+    assert collisions(sim.fleet) == 0
+    assert sim.collisions == 0
+
+
+# Baseline non-kooperatif membiarkan kurir saling tembus, jadi di jalan selebar satu
+# sel armada kooperatif tidak bisa menyamainya; batasnya dekat angka terukur
+@pytest.mark.parametrize("num_couriers, size, ratio", [
+    (20, {}, 0.55),
+    (200, {"grid_width": 150, "grid_height": 100}, 0.8),
+])
+def test_dense_fleet_delivers(num_couriers, size, ratio):
+    baseline = run(num_couriers, **size)
+    sim = run(num_couriers, cooperative=True, **size)
+    assert sim.collisions == 0
+    assert sim.deliveries >= ratio * baseline.deliveries
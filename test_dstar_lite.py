@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from courier_core import a_star, generate_map, random_position
+from compact_grid import CompactGrid, set_cell
+from dstar_lite import DStarLite
+
+
+def assert_valid_path(grid, start, goal, path):
+    previous = start
+    for x, y in path:
+        assert abs(x - previous[0]) + abs(y - previous[1]) == 1
+        assert grid[y][x] != 1
+        previous = (x, y)
+    assert previous == goal
+
+
+# Tutup/buka sel acak di jalur kurir: panjang jalur D* Lite harus sama dengan a_star penuh
+@pytest.mark.parametrize("seed", range(4))
+def test_repaired_path_matches_a_star(seed):
+    rng = random.Random(seed)
+    rows, _, _ = generate_map(60, 40, rng=rng)
+    base = CompactGrid.from_rows(rows)
+    for _ in range(20):
+        grid = CompactGrid(base.width, base.height, bytearray(base.cells), base.masks)
+        start = random_position(grid, rng)
+        goal = random_position(grid, rng)
+        search = DStarLite(grid, start, goal)
+        path = search.path()
+        assert len(path) == len(a_star(start, goal, grid))
+        closed = []
+        for _ in range(10):
+            if closed and rng.random() < 0.4:
+                cell = closed.pop(rng.randrange(len(closed)))
+                set_cell(grid, *cell, 0)
+            elif len(path) >= 3:
+                # Kurir maju satu sel lalu sel di sisa jalurnya ditutup
+                start = path[0]
+                cell = path[rng.randrange(1, len(path) - 1)]
+                set_cell(grid, *cell, 1)
+                closed.append(cell)
+            else:
+                break
+            search.update_start(start)
+            search.update_cells([cell])
+            search.compute_shortest_path()
+            path = search.path(path)
+            assert len(path) == len(a_star(start, goal, grid))
+            if path:
+                assert_valid_path(grid, start, goal, path)
+
+
+def test_initial_search_expands_near_a_star():
+    rng = random.Random(1)
+    rows, _, _ = generate_map(150, 100, rng=rng)
+    grid = CompactGrid.from_rows(rows)
+    expanded = a_star_expanded = 0
+    for _ in range(20):
+        start = random_position(grid, rng)
+        goal = random_position(grid, rng)
+        expanded += DStarLite(grid, start, goal).expanded
+        stats = {}
+        a_star(start, goal, grid, stats)
+        a_star_expanded += stats["expanded"]
+    assert expanded <= 2 * a_star_expanded
+
@@ -0,0 +1,37 @@
+from simulation import FleetSimulation, HeadlessSimulation, MultiPackageSimulation
+from tick_trace import TraceReader, TraceRecorder, summarize
+
+
+def record(sim, path, courier_count, ticks):
+    sim.recorder = TraceRecorder(path, courier_count, sim.grid.width, sim.grid.height, sim.seed)
+    sim.run(max_ticks=ticks)
+    sim.recorder.close()
+    return TraceReader(path)
+
+
+def test_summary_counts_single_package_deliveries(tmp_path):
+    sim = HeadlessSimulation(seed=1)
+    with record(sim, tmp_path / "single.sctr", 1, 3000) as reader:
+        assert len(reader) == 3000
+        assert summarize(reader)["deliveries"] == sim.deliveries
+
+
+# Kurir multi paket mengantar beberapa paket sebelum tangannya kosong
+def test_summary_counts_multi_package_deliveries(tmp_path):
+    sim = MultiPackageSimulation(3, seed=1)
+    with record(sim, tmp_path / "multi.sctr", 1, 2000) as reader:
+        assert sim.failed_routes == 0
+        assert summarize(reader)["deliveries"] == sim.deliveries
+        assert max(frame[0].packages for frame in reader.frames()) > 1
+
+
+def test_fleet_frame_matches_fleet_state(tmp_path):
+    sim = FleetSimulation(120, seed=2, grid_width=60, grid_height=40)
+    with record(sim, tmp_path / "fleet.sctr", 120, 50) as reader:
+        fleet = sim.fleet
+        frame = reader.frame(len(reader) - 1)
+        assert [courier.x for courier in frame] == list(fleet.x)
+        assert [courier.y for courier in frame] == list(fleet.y)
+        assert [courier.has_package for courier in frame] == [bool(value) for value in fleet.has_package]
+        assert [courier.path_length for courier in frame] == \
+            [len(path) - index for path, index in zip(fleet.paths, fleet.path_index)]
@@ -0,0 +1,417 @@
+import argparse
+import mmap
+import random
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from functools import partial
+from itertools import repeat
+from operator import sub
+
+from courier_core import ROAD_TYPES, generate_map
+
+# Konversi kolom armada sekaligus jika numpy tersedia
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Rekaman state kurir per tick dalam format biner lebar tetap, untuk
+# mengulang run yang lambat atau rute yang aneh tanpa simulasi ulang.
+# Recorder hanya menyalin kolom state ke buffer yang dialokasikan sekali
+# (pack_into per tick, dikirim ke file setiap buffer penuh);
+# reader membaca lewat mmap, jadi tick mana pun bisa diambil langsung dari
+# offset-nya dan kolomnya bisa dibaca tanpa salinan untuk analisis.
+#
+# Format file (little endian):
+#   header : magic "SCTR", versi (H), jumlah kurir (I), lebar grid (I), tinggi grid (I),
+#            seed (q, -1 = tanpa seed)
+#   tick   : per kolom untuk semua kurir berurutan: x (H), y (H), rotation_angle (H),
+#            jumlah paket dibawa (B), panjang sisa jalur (H) = 9 byte per kurir per tick
+# Jumlah tick = sisa ukuran file / ukuran satu tick.
+#
+# Versi 1 menyimpan has_package (0/1) di kolom paket, jadi kurir multi paket
+# (--capacity) yang mengantar satu dari beberapa paket tidak terlihat. Tata letaknya
+# sama, sehingga file versi 1 tetap bisa dibaca (jumlah paket = has_package).
+
+TRACE_MAGIC = b"SCTR"
+TRACE_VERSION = 2
+# Versi yang bisa dibaca TraceReader
+READABLE_VERSIONS = (1, 2)
+HEADER = struct.Struct("<4sHIIIq")
+TRACE_EXTENSION = ".sctr"
+NO_SEED = -1
+
+# Byte per kurir per tick (x, y, sudut, paket, panjang jalur)
+COURIER_BYTES = 2 + 2 + 2 + 1 + 2
+# Panjang jalur lebih dari ini disimpan sebagai nilai maksimum (batas kolom H)
+PATH_LENGTH_MAX = 0xFFFF
+# Buffer ditulis ke file setelah sebesar ini
+FLUSH_BYTES = 1 << 20
+# Jendela replay: ukuran, tile, FPS render, tick per detik awal, dan geser kamera per frame
+REPLAY_WINDOW = (1000, 700)
+REPLAY_TILE_SIZE = 30
+REPLAY_FPS = 60
+REPLAY_TICKS_PER_SECOND = 7
+REPLAY_PAN_STEP = 60
+# Armada sekecil ini direkam dengan satu pack_into: biaya tetap numpy per tick (~15 us)
+# lebih mahal dari pack semua kolom
+NUMPY_MIN_COURIERS = 100
+
+# State satu kurir pada satu tick; punya x, y, rotation_angle, has_package seperti
+# Courier, jadi bisa langsung diberikan ke MapRenderer.draw_frame
+class TraceCourier(namedtuple("TraceCourier", ["x", "y", "rotation_angle", "packages", "path_length"])):
+    __slots__ = ()
+
+    @property
+    def has_package(self):
+        return self.packages > 0
+
+# array dibaca dengan byte order mesin; format file selalu little endian
+_SWAP = sys.byteorder == "big"
+
+def _column(typecode, values):
+    column = array(typecode, values)
+    if _SWAP:
+        column.byteswap()
+    return column
+
+# Versi numpy record_fleet: kolom array armada ditulis langsung ke baris tick di buffer,
+# tanpa loop Python per kurir dan tanpa bytes perantara
+def _fleet_tick_numpy(fleet, row):
+    count = len(fleet.x)
+    remaining = np.fromiter(map(len, fleet.paths), np.intc, count)
+    remaining -= np.frombuffer(fleet.path_index, np.intc)
+    row[:2 * count].view("<u2")[:] = np.frombuffer(fleet.x, np.intc)
+    row[2 * count:4 * count].view("<u2")[:] = np.frombuffer(fleet.y, np.intc)
+    row[4 * count:6 * count].view("<u2")[:] = np.frombuffer(fleet.rotation_angle, np.short)
+    row[6 * count:7 * count] = np.frombuffer(fleet.has_package, np.uint8)
+    np.minimum(remaining, PATH_LENGTH_MAX, out=row[7 * count:].view("<u2"), casting="unsafe")
+
+# Struct satu tick untuk courier_count kurir (kolom berurutan seperti format file)
+def tick_struct(courier_count):
+    n = courier_count
+    return struct.Struct(f"<{n}H{n}H{n}H{n}B{n}H")
+
+class TraceRecorder:
+    def __init__(self, path, courier_count, grid_width, grid_height, seed=None):
+        self.courier_count = courier_count
+        self.flushed_ticks = 0
+        # Satu pack_into per tick ke buffer tetap, tanpa kolom atau bytes perantara:
+        # biaya per tick sekecil mungkin. Buffer berisi sejumlah tick utuh
+        tick = tick_struct(courier_count)
+        self.pack_into = tick.pack_into
+        self.tick_bytes = tick.size
+        self.buffer = bytearray(max(FLUSH_BYTES // tick.size, 1) * tick.size)
+        self.offset = 0
+        # Buffer per baris tick untuk _fleet_tick_numpy (buffer tidak pernah diubah ukurannya)
+        self.rows = None
+        if np is not None and courier_count >= NUMPY_MIN_COURIERS:
+            self.rows = np.frombuffer(self.buffer, np.uint8).reshape(-1, tick.size)
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, courier_count, grid_width, grid_height,
+                                    NO_SEED if seed is None else seed))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Jumlah tick yang sudah direkam (di file maupun masih di buffer)
+    @property
+    def ticks(self):
+        return self.flushed_ticks + self.offset // self.tick_bytes
+
+    # Satu tick dari Fleet (struct-of-arrays): kolom diambil langsung dari array armada
+    def record_fleet(self, fleet):
+        if len(fleet.x) != self.courier_count:
+            raise ValueError(f"Trace untuk {self.courier_count} kurir, armada punya {len(fleet.x)}")
+        if self.rows is not None:
+            _fleet_tick_numpy(fleet, self.rows[self.offset // self.tick_bytes])
+        else:
+            remaining = map(sub, map(len, fleet.paths), fleet.path_index)
+            try:
+                self.pack_into(self.buffer, self.offset, *fleet.x, *fleet.y, *fleet.rotation_angle,
+                               *fleet.has_package, *remaining)
+            except struct.error:
+                # Ada jalur lebih panjang dari PATH_LENGTH_MAX (jarang): ulangi dengan batas
+                remaining = map(sub, map(len, fleet.paths), fleet.path_index)
+                self.pack_into(self.buffer, self.offset, *fleet.x, *fleet.y, *fleet.rotation_angle,
+                               *fleet.has_package, *map(min, remaining, repeat(PATH_LENGTH_MAX)))
+        self._advance()
+
+    # Satu tick dari daftar objek Courier (atau apa pun dengan atribut yang sama)
+    def record_couriers(self, couriers):
+        if len(couriers) == 1:
+            self.record_courier(couriers[0])
+            return
+        self.pack_into(self.buffer, self.offset,
+                       *[courier.x for courier in couriers],
+                       *[courier.y for courier in couriers],
+                       *[courier.rotation_angle % 360 for courier in couriers],
+                       *[courier.has_package for courier in couriers],
+                       *[min(len(courier.path), PATH_LENGTH_MAX) for courier in couriers])
+        self._advance()
+
+    # Satu tick untuk trace satu kurir
+    def record_courier(self, courier):
+        self.courier_writer(courier)()
+
+    # Fungsi tanpa argumen yang merekam satu tick kurir ini (HeadlessSimulation), jalur
+    # tercepat: buffer dan pack_into sudah terikat di closure, jadi per tick hanya satu
+    # pack_into. Courier selalu menyimpan rotation_angle dalam 0-359, jadi hanya panjang
+    # jalur yang bisa melewati batas kolom (struct.error, lalu diulang dengan batas).
+    # packages() -> jumlah paket yang dibawa (default has_package kurir)
+    def courier_writer(self, courier, packages=None):
+        if packages is None:
+            packages = partial(getattr, courier, "has_package")
+        pack_into = self.pack_into
+        buffer = self.buffer
+        tick_bytes = self.tick_bytes
+        end = len(buffer)
+
+        def record():
+            offset = self.offset
+            try:
+                pack_into(buffer, offset, courier.x, courier.y, courier.rotation_angle,
+                          packages(), len(courier.path))
+            except struct.error:
+                pack_into(buffer, offset, courier.x, courier.y, courier.rotation_angle % 360,
+                          min(packages(), 0xFF), min(len(courier.path), PATH_LENGTH_MAX))
+            offset += tick_bytes
+            self.offset = offset
+            if offset == end:
+                self.flush()
+        return record
+
+    def _advance(self):
+        self.offset += self.tick_bytes
+        if self.offset == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        with memoryview(self.buffer) as view:
+            self.file.write(view[:self.offset])
+        self.flushed_ticks += self.offset // self.tick_bytes
+        self.offset = 0
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+class TraceReader:
+    def __init__(self, path):
+        with open(path, "rb") as trace_file:
+            self.data = mmap.mmap(trace_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.data) < HEADER.size:
+            self.data.close()
+            raise ValueError(f"Bukan file trace: {path}")
+        magic, version, courier_count, grid_width, grid_height, seed = HEADER.unpack_from(self.data)
+        if magic != TRACE_MAGIC or version not in READABLE_VERSIONS:
+            self.data.close()
+            raise ValueError(f"Bukan file trace versi {READABLE_VERSIONS}: {path}")
+        self.version = version
+        self.courier_count = courier_count
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.seed = None if seed == NO_SEED else seed
+        self.tick_bytes = courier_count * COURIER_BYTES
+        # Tick terakhir yang terpotong (misal proses berhenti saat menulis) diabaikan
+        self.ticks = (len(self.data) - HEADER.size) // self.tick_bytes if self.tick_bytes else 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.ticks
+
+    # Kolom dari columns() yang masih dipegang menunjuk langsung ke mmap, jadi mmap
+    # belum bisa ditutup (BufferError): reader tetap ditutup dan pemetaan file baru
+    # dilepas saat kolom terakhir dibuang
+    def close(self):
+        if self.data is None:
+            return
+        try:
+            self.data.close()
+        except BufferError:
+            pass
+        self.data = None
+
+    # Kolom satu tick (0 = tick pertama yang direkam): (x, y, rotation_angle, packages, path_length),
+    # masing-masing berurutan per kurir. Tanpa salinan kecuali di mesin big endian; kolom tetap
+    # bisa dibaca setelah close() (lihat close)
+    def columns(self, tick):
+        if self.data is None:
+            raise ValueError("TraceReader sudah ditutup")
+        if not 0 <= tick < self.ticks:
+            raise IndexError(tick)
+        count = self.courier_count
+        view = memoryview(self.data)
+        offset = HEADER.size + tick * self.tick_bytes
+        columns = []
+        for typecode, size in (("H", 2), ("H", 2), ("H", 2), ("B", 1), ("H", 2)):
+            column = view[offset:offset + count * size].cast(typecode)
+            if _SWAP and size > 1:
+                column = _column(typecode, column)
+            columns.append(column)
+            offset += count * size
+        return tuple(columns)
+
+    # State semua kurir pada satu tick sebagai [TraceCourier]
+    def frame(self, tick):
+        return list(map(TraceCourier, *self.columns(tick)))
+
+    def frames(self, start=0, stop=None):
+        if stop is None or stop > self.ticks:
+            stop = self.ticks
+        for tick in range(start, stop):
+            yield self.frame(tick)
+
+# Ringkasan rekaman tanpa simulasi ulang: pengiriman = jumlah paket yang dibawa kurir
+# berkurang (paket yang dibatalkan karena rute gagal ikut terhitung). Trace versi 1
+# hanya punya has_package, jadi kurir multi paket terhitung sekali per paket terakhir
+def summarize(reader):
+    count = reader.courier_count
+    deliveries = 0
+    moved = 0
+    loaded = 0
+    previous = None
+    for tick in range(len(reader)):
+        xs, ys, _, packages, _ = reader.columns(tick)
+        packages = bytes(packages)
+        loaded += count - packages.count(0)
+        if previous is not None:
+            previous_xs, previous_ys, previous_packages = previous
+            deliveries += sum(before - after for before, after in zip(previous_packages, packages) if after < before)
+            moved += sum(1 for i in range(count) if xs[i] != previous_xs[i] or ys[i] != previous_ys[i])
+        previous = (array("H", xs), array("H", ys), packages)
+    samples = max(len(reader) * count, 1)
+    return {
+        "ticks": len(reader),
+        "couriers": count,
+        "grid": (reader.grid_width, reader.grid_height),
+        "seed": reader.seed,
+        "version": reader.version,
+        "deliveries": deliveries,
+        # Rata-rata per kurir per tick
+        "moves_per_tick": moved / samples,
+        "loaded_ratio": loaded / samples,
+    }
+
+# Putar ulang rekaman di jendela pygame: setiap frame dari TraceReader.frames() langsung
+# digambar MapRenderer.draw_frame. Peta dibuat ulang dari seed di header, sama seperti
+# simulation.py (generate_map dengan random.Random(seed) sebelum hal lain), jadi hanya
+# rekaman peta generate dengan --seed yang bisa diputar; jalan yang ditutup
+# (--closures) tidak terlihat. Spasi = jeda, titik = maju satu tick saat jeda,
+# +/- = tick per detik, panah = geser kamera, scroll = zoom, Esc = keluar
+def replay(reader, ticks_per_second=REPLAY_TICKS_PER_SECOND, start=0):
+    if reader.seed is None:
+        raise ValueError("Trace tanpa seed: peta tidak bisa dibuat ulang")
+    # pygame hanya diimpor saat replay agar analisis trace tidak membutuhkannya
+    import pygame
+    from renderer import MapRenderer
+
+    pygame.init()
+    screen = pygame.display.set_mode(REPLAY_WINDOW)
+    pygame.display.set_caption(f"Replay trace seed {reader.seed}")
+    grid, road_types, road_orientations = generate_map(reader.grid_width, reader.grid_height,
+                                                       rng=random.Random(reader.seed))
+
+    # Aset sama seperti Smart_courier_fix.py; tanpa file gambar dipakai warna dasar
+    size = (REPLAY_TILE_SIZE, REPLAY_TILE_SIZE)
+    try:
+        road = pygame.transform.scale(pygame.image.load("road_intersection.png"), size)
+        sand = pygame.transform.scale(pygame.image.load("sand.png"), size)
+        car = pygame.transform.scale(pygame.transform.rotate(pygame.image.load("courier_car.png"), 90), size)
+    except FileNotFoundError:
+        road = pygame.Surface(size)
+        road.fill((100, 100, 100))
+        sand = pygame.Surface(size)
+        sand.fill((150, 75, 0))
+        car = pygame.Surface(size)
+        car.fill((0, 0, 255))
+    renderer = MapRenderer({road_type: road for road_type in ROAD_TYPES.values()}, sand, car)
+    renderer.bake(grid, road_types, road_orientations, REPLAY_TILE_SIZE, REPLAY_WINDOW)
+    camera = renderer.camera
+
+    clock = pygame.time.Clock()
+    frames = reader.frames(start)
+    frame = next(frames, None)
+    tick = start
+    paused = False
+    elapsed = 0.0
+    while frame is not None:
+        advance = 0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                frame = None
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                paused = not paused
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_PERIOD and paused:
+                advance = 1
+            elif event.type == pygame.KEYDOWN and event.key in (pygame.K_PLUS, pygame.K_EQUALS):
+                ticks_per_second *= 2
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_MINUS:
+                ticks_per_second = max(1, ticks_per_second // 2)
+            elif event.type == pygame.MOUSEWHEEL:
+                camera.zoom_at(event.y, pygame.mouse.get_pos())
+        if frame is None:
+            break
+
+        keys = pygame.key.get_pressed()
+        pan_x = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * REPLAY_PAN_STEP
+        pan_y = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * REPLAY_PAN_STEP
+        if pan_x or pan_y:
+            camera.pan(pan_x, pan_y)
+
+        carried = sum(courier.packages for courier in frame)
+        hud_lines = [f"Tick {tick + 1}/{len(reader)}" + (" (jeda)" if paused else ""),
+                     f"{ticks_per_second} tick/s, paket dibawa: {carried}"]
+        dirty_rects = renderer.draw_frame(screen, frame, [], [], hud_lines, camera)
+        if dirty_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty_rects)
+
+        frame_seconds = clock.tick(REPLAY_FPS) / 1000
+        if not paused:
+            elapsed += frame_seconds * ticks_per_second
+            advance = int(elapsed)
+            elapsed -= advance
+        # Tick yang terlewat karena kecepatan tinggi tidak digambar
+        for _ in range(advance):
+            frame = next(frames, None)
+            if frame is None:
+                break
+            tick += 1
+    pygame.quit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Ringkasan file trace kurir")
+    parser.add_argument("trace", help="file trace dari simulation.py --record")
+    parser.add_argument("--tick", type=int, default=None, help="tampilkan state semua kurir pada tick ini")
+    parser.add_argument("--replay", action="store_true", help="putar ulang rekaman di jendela pygame")
+    parser.add_argument("--speed", type=int, default=REPLAY_TICKS_PER_SECOND, help="tick per detik saat replay")
+    args = parser.parse_args()
+
+    with TraceReader(args.trace) as reader:
+        if args.replay:
+            replay(reader, args.speed, args.tick or 0)
+            return
+        if args.tick is not None:
+            for index, courier in enumerate(reader.frame(args.tick)):
+                print(index, courier)
+            return
+        for key, value in summarize(reader).items():
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
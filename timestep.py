@@ -0,0 +1,94 @@
+import time
+from collections import namedtuple
+
+# Simulasi dengan timestep tetap yang terpisah dari laju render: setiap frame
+# waktu nyata ditambahkan ke akumulator lalu dijalankan sebanyak langkah
+# simulasi yang muat. Sisa akumulator (alpha) dipakai untuk interpolasi posisi
+# dan sudut mobil di antara dua langkah, jadi layar tetap halus di 60 FPS.
+
+RENDER_FPS = 60
+SIM_STEPS_PER_SECOND = 7        # Sama dengan laju lama clock.tick(7) pada kecepatan x1
+SIM_STEP = 1 / SIM_STEPS_PER_SECOND
+
+# Pengali kecepatan; None = secepat mungkin dalam batas waktu per frame
+SPEED_MULTIPLIERS = (1, 10, 100, None)
+
+# Batas waktu simulasi per frame agar render tetap 60 FPS; sisa langkah dibuang
+SIM_BUDGET = 0.010
+# Frame yang sangat lama (misal saat dialog file terbuka) tidak dikejar
+MAX_FRAME_SECONDS = 0.25
+
+# Posisi (sel, boleh pecahan) dan sudut mobil untuk digambar
+CourierPose = namedtuple("CourierPose", ["x", "y", "rotation_angle"])
+
+def courier_pose(courier):
+    return CourierPose(courier.x, courier.y, courier.rotation_angle)
+
+def interpolate_pose(previous, current, alpha):
+    # Sudut lewat arah putar terpendek, sama seperti Courier.update_rotation
+    angle_diff = (current.rotation_angle - previous.rotation_angle + 180) % 360 - 180
+    return CourierPose(previous.x + (current.x - previous.x) * alpha,
+                       previous.y + (current.y - previous.y) * alpha,
+                       (previous.rotation_angle + angle_diff * alpha) % 360)
+
+class FixedTimestep:
+    def __init__(self, step_seconds=SIM_STEP, budget=SIM_BUDGET):
+        self.step_seconds = step_seconds
+        self.budget = budget
+        self.speed_index = 0
+        self.accumulator = 0.0
+        self.steps = 0              # Total langkah simulasi
+        self.dropped = False        # Frame terakhir tidak sempat menjalankan semua langkah
+        self.previous_poses = {}    # kurir -> pose sebelum langkah terakhir
+
+    @property
+    def multiplier(self):
+        return SPEED_MULTIPLIERS[self.speed_index]
+
+    def set_speed(self, index):
+        self.speed_index = max(0, min(len(SPEED_MULTIPLIERS) - 1, index))
+        self.accumulator = 0.0
+
+    def speed_label(self):
+        multiplier = self.multiplier
+        return "max" if multiplier is None else f"x{multiplier}"
+
+    # Jalankan step() sebanyak waktu frame_seconds (dikali pengali kecepatan).
+    # couriers = kurir yang posenya diinterpolasi. Mengembalikan alpha 0..1
+    def advance(self, frame_seconds, step, couriers=()):
+        multiplier = self.multiplier
+        deadline = time.perf_counter() + self.budget
+        self.dropped = False
+
+        if multiplier is None:
+            # Secepat mungkin sampai batas waktu; tampilkan langsung keadaan terakhir
+            while True:
+                self._step(step, couriers)
+                if time.perf_counter() >= deadline:
+                    break
+            self.accumulator = 0.0
+            return 1.0
+
+        self.accumulator += min(frame_seconds, MAX_FRAME_SECONDS) * multiplier
+        while self.accumulator >= self.step_seconds:
+            if time.perf_counter() >= deadline:
+                # Tidak terkejar: buang sisa agar tidak menumpuk di frame berikutnya
+                self.accumulator %= self.step_seconds
+                self.dropped = True
+                break
+            self._step(step, couriers)
+            self.accumulator -= self.step_seconds
+        return self.accumulator / self.step_seconds
+
+    def _step(self, step, couriers):
+        self.previous_poses = {courier: courier_pose(courier) for courier in couriers}
+        step()
+        self.steps += 1
+
+    # Pose kurir di antara langkah sebelumnya dan sekarang; kurir baru langsung di posisinya
+    def pose(self, courier, alpha):
+        current = courier_pose(courier)
+        previous = self.previous_poses.get(courier)
+        if previous is None:
+            return current
+        return interpolate_pose(previous, current, alpha)